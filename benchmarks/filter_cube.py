@@ -0,0 +1,54 @@
+"""TAB2 필터 변경 1회당 지연 시간 비교
+- 이전: 선택할 때마다 통계 전체를 복사/필터링해 요약, 월별, 요일별, 국가별 지표를 다시 집계
+- 이후: 전처리 때 만든 필터 큐브에서 사전 조회
+
+사용법: python -m benchmarks.filter_cube [--out-dir ./data/processed] [--repeat 5]
+"""
+import argparse
+import time
+import numpy as np
+from src.preprocessor import (PROCESSED_DIR, FILTER_CUBE_TABLES, load_manifest, load_artifact,
+                              filter_cube_cell, filter_cube_lookup, month_quantiles_from_cube)
+
+def measure(func, combos, repeat):
+    """모든 필터 조합을 repeat번씩 실행한 1회당 지연 시간(ms) 목록"""
+    latencies = []
+    for _ in range(repeat):
+        for gender, age_group in combos:
+            start = time.perf_counter()
+            func(gender, age_group)
+            latencies.append((time.perf_counter() - start) * 1000)
+    return np.array(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='TAB2 필터 큐브 지연 시간 벤치마크')
+    parser.add_argument('--out-dir', default=PROCESSED_DIR)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    manifest = load_manifest(args.out_dir)
+    stats = load_artifact('running_Y_M_stats', manifest, args.out_dir)
+    hll = load_artifact('running_Y_M_hll', manifest, args.out_dir)
+    # 분위수 스케치는 조회 단위(성별 x 연령대 x 월/국가)로만 저장되므로 '전체'가 아닌 조합의 월 스케치를 다시 합친다
+    month_quantiles = month_quantiles_from_cube(load_artifact('filter_cube_monthly', manifest, args.out_dir),
+                                                load_artifact('filter_cube_monthly_quantiles', manifest, args.out_dir))
+    country_quantiles = load_artifact('filter_cube_country_quantiles', manifest, args.out_dir)
+    start = time.perf_counter()
+    cube = filter_cube_lookup({f'filter_cube_{name}': load_artifact(f'filter_cube_{name}', manifest, args.out_dir)
+                               for name in FILTER_CUBE_TABLES})
+    load_ms = (time.perf_counter() - start) * 1000
+    combos = list(cube)
+
+    results = {
+        '이전 (매번 재집계)': measure(lambda g, a: filter_cube_cell(stats.copy(), hll, month_quantiles, country_quantiles, g, a),
+                                  combos, args.repeat),
+        '이후 (큐브 조회)': measure(lambda g, a: cube[(g, a)], combos, args.repeat),
+    }
+    print(f"통계 {len(stats):,}행, 스케치 {len(hll):,}행, 필터 조합 {len(combos)}개 (큐브 로드 1회 {load_ms:.1f} ms)")
+    for name, latencies in results.items():
+        print(f"{name:<16} p50 {np.percentile(latencies, 50):10.4f} ms   p95 {np.percentile(latencies, 95):10.4f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,204 @@
+"""동시 세션 부하 테스트 (Streamlit AppTest, 브라우저/네트워크 없이 한 프로세스에서 여러 세션의 rerun을 동시에 실행)
+- 세션마다 시드로 정해진 사용자 흐름을 따라 위젯을 바꾸고 rerun한다:
+  화면 전환(lazy 모드), TAB1 해상도, TAB2 성별/연령대, TAB3 국가/주/기간
+- 국가는 러너 수가 많은 국가일수록, 주는 최근 주일수록 자주 고른다 (실제 접속처럼 세션 간 캐시 적중이 생기도록)
+- 세션들은 스레드 풀(--concurrency)에서 동시에 실행된다. Streamlit 서버처럼 한 프로세스 안에서 세션 스레드가 스크립트를
+  실행하므로 cache_resource/cache_data, src.queries 조회 캐시, Figure 캐시를 모든 세션이 공유한다
+- 결과: 동작별/전체 rerun 지연 p50/p95/p99, 조회/Figure 캐시 적중률, 프로세스 RSS (시작, 끝, 최대)
+모드(tabs/lazy)마다 새 프로세스에서 실행한다. tabs 모드의 탭 전환은 브라우저 안에서만 일어나 rerun이 없으므로 측정하지 않는다
+
+사용법: python -m benchmarks.load [--sessions 32] [--concurrency 8] [--actions 20] [--think-ms 0] [--json load.json]
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from src import queries
+from src.figure_cache import process_stats
+from src.preprocessor import HIST_LEVELS
+from src.profiling import memory_mb
+
+MAIN_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'main.py')
+MODES = {'tabs': '0', 'lazy': '1'}
+PERCENTILES = [50, 95, 99]
+# lazy 모드에서 한 동작마다 다른 화면으로 옮겨 갈 확률
+TAB_SWITCH_RATE = 0.25
+# 기간 선택 길이(주)
+PERIOD_WEEKS = [1, 4, 8, 13]
+
+def widget(widgets, label):
+    """라벨로 위젯 찾기 (현재 화면에 없으면 None)"""
+    return next((item for item in widgets if item.label == label), None)
+
+
+def recent_choice(rng, options, decay=0.7):
+    """최근(뒤쪽) 값일수록 자주 고르기"""
+    weights = [decay ** age for age in range(len(options))][::-1]
+    return rng.choices(options, weights)[0]
+
+
+def popular_choice(rng, options):
+    """앞쪽(인기) 값일수록 자주 고르기 (순위에 반비례)"""
+    return rng.choices(options, [1 / (rank + 1) for rank in range(len(options))])[0]
+
+
+def action_candidates(app, catalog, rng):
+    """현재 화면에서 할 수 있는 동작들 {이름: 위젯 값을 바꾸는 함수}"""
+    weeks, countries = catalog['weeks'], catalog['countries']
+    candidates = {}
+    if (resolution := widget(app.select_slider, "해상도 (구간 수)")) is not None:
+        candidates['resolution'] = lambda: resolution.set_value(rng.choice(HIST_LEVELS))
+    for name, label in [('gender', "성별 선택"), ('age_group', "연령대 선택")]:
+        if (box := widget(app.selectbox, label)) is not None:
+            candidates[name] = lambda box=box: box.set_value(rng.choice(box.options))
+    if (country := widget(app.selectbox, "(앱 사용자 국가 자동 선택)")) is not None:
+        candidates['country'] = lambda: country.set_value(popular_choice(rng, countries))
+    if (week := widget(app.selectbox, "주별 선택 (Default: 최근 주)")) is not None:
+        candidates['week'] = lambda: week.set_value(recent_choice(rng, weeks))
+    if (period := widget(app.select_slider, "기간 선택 (Default: 최근 4주)")) is not None:
+        def set_period():
+            end = weeks.index(recent_choice(rng, weeks))
+            period.set_range(weeks[max(end - rng.choice(PERIOD_WEEKS) + 1, 0)], weeks[end])
+        candidates['period'] = set_period
+    return candidates
+
+
+def timed_run(app):
+    """AppTest 1회 실행 시간(ms)과 예외 메시지 (없으면 None)"""
+    start = time.perf_counter()
+    app.run()
+    elapsed = (time.perf_counter() - start) * 1000
+    return elapsed, app.exception[0].value if app.exception else None
+
+
+def run_session(session, catalog, actions, think_ms, seed):
+    """세션 하나: 첫 화면(open) 후 actions번 위젯을 바꿔 rerun -> [(동작, ms)], 오류 목록"""
+    from streamlit.testing.v1 import AppTest
+    rng = random.Random(seed * 100003 + session)
+    app = AppTest.from_file(MAIN_FILE, default_timeout=600)
+    elapsed, error = timed_run(app)
+    samples, errors = [('open', elapsed)], []
+    for _ in range(actions):
+        if error:
+            errors.append(error)
+            break
+        if think_ms:
+            time.sleep(rng.uniform(0, 2 * think_ms) / 1000)
+        candidates = action_candidates(app, catalog, rng)
+        if app.radio and (not candidates or rng.random() < TAB_SWITCH_RATE):
+            tabs = app.radio[0]
+            name = 'tab'
+            tabs.set_value(rng.choice([page for page in tabs.options if page != tabs.value]))
+        else:
+            name = rng.choice(sorted(candidates))
+            candidates[name]()
+        elapsed, error = timed_run(app)
+        samples.append((name, elapsed))
+    return samples, errors
+
+
+def query_cache_info():
+    """src.queries 조회 캐시들의 적중/실패 횟수 합계"""
+    infos = [func.cache_info() for func in vars(queries).values() if callable(getattr(func, 'cache_info', None))]
+    return {'hits': sum(info.hits for info in infos), 'misses': sum(info.misses for info in infos)}
+
+
+def latency_stats(values):
+    """지연 시간 목록 -> 횟수, 평균, 백분위수(ms)"""
+    values = np.array(values)
+    return {'count': len(values), 'mean_ms': float(values.mean()),
+            **{f'p{p}_ms': float(np.percentile(values, p)) for p in PERCENTILES}}
+
+
+def measure(sessions, concurrency, actions, think_ms, seed):
+    """현재 프로세스에서 세션들을 동시에 실행하고 지연/캐시/메모리 집계"""
+    start_mb, _ = memory_mb()
+    weeks = queries.weeks()
+    catalog = {
+        'weeks': weeks,
+        'countries': queries.range_leaderboard(weeks[0], weeks[-1])['country'].tolist(),  # 러너 수 많은 순
+    }
+    queries_before = query_cache_info()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(lambda session: run_session(session, catalog, actions, think_ms, seed),
+                                range(sessions)))
+    seconds = time.perf_counter() - start
+
+    by_action = {}
+    for samples, _ in results:
+        for name, elapsed in samples:
+            by_action.setdefault(name, []).append(elapsed)
+    reruns = [elapsed for name, values in by_action.items() if name != 'open' for elapsed in values]
+    queries_after = query_cache_info()
+    query_hits = queries_after['hits'] - queries_before['hits']
+    query_lookups = query_hits + queries_after['misses'] - queries_before['misses']
+    end_mb, peak_mb = memory_mb()
+    return {
+        'seconds': seconds,
+        'reruns_per_second': (len(reruns) + len(by_action.get('open', []))) / seconds,
+        'rerun': latency_stats(reruns) if reruns else None,
+        'actions': {name: latency_stats(values) for name, values in sorted(by_action.items())},
+        'errors': [error for _, errors in results for error in errors],
+        'query_cache': {'hits': query_hits, 'lookups': query_lookups,
+                        'hit_rate': query_hits / query_lookups if query_lookups else 0.0},
+        'figure_cache': process_stats(),
+        'memory': {'start_rss_mb': start_mb, 'end_rss_mb': end_mb, 'peak_rss_mb': peak_mb},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='대시보드 동시 세션 부하 테스트 (rerun 지연, 캐시 적중률, 메모리)')
+    parser.add_argument('--sessions', type=int, default=32, help='전체 세션 수')
+    parser.add_argument('--concurrency', type=int, default=8, help='동시에 실행하는 세션 수')
+    parser.add_argument('--actions', type=int, default=20, help='세션당 위젯 변경 횟수 (첫 화면 제외)')
+    parser.add_argument('--think-ms', type=float, default=0, help='동작 사이 평균 대기 시간(ms)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--modes', nargs='+', default=list(MODES), choices=MODES)
+    parser.add_argument('--json', help='결과를 저장할 JSON 경로 (회귀 추적용)')
+    parser.add_argument('--child', choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    options = ['--sessions', str(args.sessions), '--concurrency', str(args.concurrency), '--actions', str(args.actions),
+               '--think-ms', str(args.think_ms), '--seed', str(args.seed)]
+
+    if args.child:
+        print(json.dumps(measure(args.sessions, args.concurrency, args.actions, args.think_ms, args.seed),
+                         ensure_ascii=False))
+        return
+
+    results = {}
+    for mode in args.modes:
+        env = dict(os.environ, DASHBOARD_LAZY_TABS=MODES[mode])
+        child = subprocess.run([sys.executable, '-m', 'benchmarks.load', '--child', mode, *options],
+                               env=env, capture_output=True, text=True, check=True)
+        results[mode] = result = json.loads(child.stdout.strip().splitlines()[-1])
+
+        print(f"{mode:<5} {args.sessions}세션 (동시 {args.concurrency}) {result['seconds']:7.1f}s"
+              f"   {result['reruns_per_second']:6.2f} rerun/s   오류 {len(result['errors'])}건")
+        for name, stats in [('rerun', result['rerun']), *result['actions'].items()]:
+            if stats:
+                print(f"      {name:<11} {stats['count']:5d}회   "
+                      + '   '.join(f"p{p} {stats[f'p{p}_ms']:8.1f} ms" for p in PERCENTILES))
+        query, figure, memory = result['query_cache'], result['figure_cache'], result['memory']
+        print(f"      조회 캐시 적중률 {query['hit_rate']:6.1%}   Figure 캐시 적중률 {figure['hit_rate']:6.1%}"
+              f" (항목 {figure['entries']}개, {figure['bytes'] / 1024 ** 2:.1f} MB, 제거 {figure['evictions']})")
+        print(f"      RSS 시작 {memory['start_rss_mb']:.1f} MB   끝 {memory['end_rss_mb']:.1f} MB"
+              f"   최대 {memory['peak_rss_mb']:.1f} MB")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'measured_at': time.strftime('%Y-%m-%dT%H:%M:%S'), 'sessions': args.sessions,
+                       'concurrency': args.concurrency, 'actions': args.actions, 'think_ms': args.think_ms,
+                       'seed': args.seed, 'results': results},
+                      f, ensure_ascii=False, indent=2)
+        print(f"결과 저장: {args.json}")
+
+
+if __name__ == '__main__':
+    main()
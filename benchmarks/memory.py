@@ -0,0 +1,156 @@
+"""동시 세션 수에 따른 대시보드 메모리 비교 (이전 방식 vs 프로세스당 한 번 로드해 공유하는 산출물)
+- before: 산출물을 CSV로 내보낸 뒤 예전 load_data처럼 pd.read_csv로 읽고(문자열 object 컬럼, int64/float64),
+  세션마다 st.cache_data처럼 pickle 복사본을 받고 TAB2에서 running_Y_M_stats.copy()를 한 번 더 만든다
+- after: src.queries가 빌드당 한 번 메모리 매핑한 산출물(작은 정수/float32/카테고리, 읽기 전용)을 모든 세션이 공유하고,
+  세션마다 TAB1~3 조회를 실행한다 (세션마다 필터/국가를 바꿔 조회 결과 캐시도 세션 수만큼 늘어나게)
+모드마다 새 프로세스에서 세션을 하나씩 늘리며 RSS를 재고, 세션당 증가량을 비교한다
+
+사용법: python -m benchmarks.memory [--out-dir ./data/processed] [--sessions 20] [--json memory.json]
+"""
+import os
+import gc
+import sys
+import json
+import pickle
+import argparse
+import tempfile
+import subprocess
+import pandas as pd
+from src import queries
+from src.preprocessor import PROCESSED_DIR, LEADERBOARD_METRICS, load_manifest, load_artifact, pyramid_level
+from src.profiling import memory_mb
+
+MODES = ['before', 'after']
+# 예전 대시보드가 CSV로 읽던 산출물과 그때의 컬럼 (합계/건수 컬럼 없이 평균만, 주는 'YYYY-W' 문자열)
+BEFORE_COLUMNS = {
+    'running_Y_M_stats': ['year', 'month', 'gender', 'age_group', 'weekday', 'country',
+                          'distance', 'duration', 'speed_per_hour', 'total_runners'],
+    'running_W_ranking': ['country', 'year_week', 'total_runners', 'distance', 'duration'],
+}
+
+def frame_mb(frames):
+    """프레임들이 차지하는 메모리 (문자열 포함, MB)"""
+    return sum(df.memory_usage(deep=True).sum() for df in frames) / 1024 ** 2
+
+
+def load_before(out_dir):
+    """산출물을 예전 컬럼 구성으로 CSV에 내보냈다가 예전 방식(pd.read_csv)으로 다시 읽기"""
+    manifest = load_manifest(out_dir)
+    frames = {name: load_artifact(name, manifest, out_dir) for name in BEFORE_COLUMNS}
+    ranking = frames['running_W_ranking']
+    weeks = ranking['week_key'].to_numpy()
+    frames['running_W_ranking'] = ranking.assign(year_week=[f'{week // 100}-{week % 100}' for week in weeks])
+    frames = {name: df[BEFORE_COLUMNS[name]] for name, df in frames.items()}
+    frames['distance_duration_df'] = pyramid_level(load_artifact('distance_duration_pyramid', manifest, out_dir))
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, df in frames.items():
+            df.to_csv(os.path.join(tmp, f'{name}.csv'), index=False)
+        return {name: pd.read_csv(os.path.join(tmp, f'{name}.csv')) for name in frames}
+
+
+def before_session(shared, session):
+    """예전 rerun 한 번이 만들던 세션별 데이터 (st.cache_data는 호출마다 pickle 복사본을 돌려준다)"""
+    frames = pickle.loads(pickle.dumps(shared))
+    frames['filtered_stats'] = frames['running_Y_M_stats'].copy()
+    return frames
+
+
+def load_after(out_dir):
+    """세션들이 공유하는 산출물과 색인 (빌드당 한 번만 로드)"""
+    names = ['filter_cube', 'distance_duration_pyramid', 'weekly_leaderboard', 'leaderboard_index', 'prefix_sums',
+             'running_W_ranking', 'running_W_hll', 'running_W_quantiles']
+    return {name: queries.resource(name, out_dir) for name in names}
+
+
+def after_session(shared, session, out_dir):
+    """현재 rerun 한 번이 실행하는 조회 (세션마다 다른 필터/국가)"""
+    options = queries.filter_options(out_dir=out_dir)
+    gender = options['gender'][session % len(options['gender'])]
+    age_group = options['age_group'][session // len(options['gender']) % len(options['age_group'])]
+    countries = queries.countries(out_dir=out_dir)
+    country = countries[session % len(countries)]
+    weeks = queries.weeks(out_dir=out_dir)
+    start, end = weeks[max(len(weeks) - 4, 0)], weeks[-1]
+    return [
+        queries.summary(gender, age_group, out_dir=out_dir),
+        queries.monthly_series(gender, age_group, out_dir=out_dir),
+        queries.weekday_profile(gender, age_group, out_dir=out_dir),
+        queries.country_speed(gender, age_group, out_dir=out_dir),
+        queries.distance_duration(out_dir=out_dir),
+        queries.country_distribution(end, end, country, out_dir=out_dir),
+        queries.country_distribution(start, end, country, out_dir=out_dir),
+        *[queries.weekly_leaderboard(end, metric, country, out_dir=out_dir) for metric in LEADERBOARD_METRICS],
+        *[queries.range_leaderboard(start, end, metric, out_dir=out_dir) for metric in LEADERBOARD_METRICS],
+    ]
+
+
+def shared_mb(shared):
+    """공유 데이터 크기 (DataFrame과 사전 안의 DataFrame/배열)"""
+    frames = []
+    for value in shared.values():
+        values = value.values() if isinstance(value, dict) else [value]
+        frames += [item for item in values if isinstance(item, pd.DataFrame)]
+        frames += [cell for item in values if isinstance(item, dict) for cell in item.values()
+                   if isinstance(cell, pd.DataFrame)]
+    return frame_mb(frames)
+
+
+def run_mode(mode, out_dir, sessions):
+    """모드 하나 실행 (새 프로세스 안에서): 로드 전/후와 세션 수별 RSS"""
+    gc.collect()
+    start_mb, _ = memory_mb()
+    if mode == 'before':
+        shared = load_before(out_dir)
+        open_session = lambda session: before_session(shared, session)
+    else:
+        shared = load_after(out_dir)
+        open_session = lambda session: after_session(shared, session, out_dir)
+    gc.collect()
+    loaded_mb, _ = memory_mb()
+
+    # 동시 접속처럼 세션 데이터를 모두 살려둔 채 하나씩 늘린다
+    alive, rss = [], []
+    for session in range(sessions):
+        alive.append(open_session(session))
+        gc.collect()
+        rss.append(memory_mb()[0])
+    return {
+        'start_rss_mb': start_mb,
+        'loaded_rss_mb': loaded_mb,
+        'shared_data_mb': shared_mb(shared),
+        'rss_mb': rss,
+        'per_session_mb': (rss[-1] - loaded_mb) / sessions,
+        'peak_rss_mb': memory_mb()[1],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='대시보드 세션당 메모리 비교')
+    parser.add_argument('--out-dir', default=PROCESSED_DIR)
+    parser.add_argument('--sessions', type=int, default=20, help='동시 세션 수')
+    parser.add_argument('--modes', nargs='+', default=MODES, choices=MODES)
+    parser.add_argument('--json', help='결과를 저장할 JSON 경로')
+    parser.add_argument('--child', choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_mode(args.child, args.out_dir, args.sessions)))
+        return
+
+    report = {'out_dir': args.out_dir, 'sessions': args.sessions, 'modes': {}}
+    for mode in args.modes:
+        command = [sys.executable, '-m', 'benchmarks.memory', '--child', mode,
+                   '--out-dir', args.out_dir, '--sessions', str(args.sessions)]
+        child = subprocess.run(command, capture_output=True, text=True, check=True)
+        result = report['modes'][mode] = json.loads(child.stdout.strip().splitlines()[-1])
+        print(f"{mode:<7} 공유 데이터 {result['shared_data_mb']:8.1f} MB   로드 후 RSS {result['loaded_rss_mb']:8.1f} MB"
+              f"   {args.sessions}세션 RSS {result['rss_mb'][-1]:8.1f} MB   세션당 {result['per_session_mb']:7.2f} MB")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"결과 저장: {args.json}")
+
+
+if __name__ == '__main__':
+    main()
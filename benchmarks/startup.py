@@ -0,0 +1,78 @@
+"""대시보드 콜드 스타트/재실행 시간 측정 (Streamlit AppTest, 브라우저 없이 스크립트만 실행)
+- tabs: 기본 st.tabs 화면 (rerun마다 세 탭 본문을 모두 실행)
+- lazy: DASHBOARD_LAZY_TABS=1 (라디오로 고른 화면만 실행, 화면별 첫 진입/재진입 시간도 측정)
+모드마다 새 프로세스에서 측정해 import와 cache_resource 로드가 콜드 스타트에 포함되도록 한다
+
+사용법: python -m benchmarks.startup [--reruns 5] [--json startup.json]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+import numpy as np
+
+MAIN_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'main.py')
+MODES = {'tabs': '0', 'lazy': '1'}
+
+def timed_run(app):
+    """AppTest 1회 실행 시간(ms), 예외가 나면 중단"""
+    start = time.perf_counter()
+    app.run()
+    elapsed = (time.perf_counter() - start) * 1000
+    if app.exception:
+        raise RuntimeError(app.exception[0].value)
+    return elapsed
+
+
+def measure(reruns):
+    """현재 프로세스에서 콜드 스타트 1회 + 재실행 reruns회 (lazy면 화면 전환도) 측정"""
+    from streamlit.testing.v1 import AppTest
+    app = AppTest.from_file(MAIN_FILE, default_timeout=600)
+    result = {'cold_ms': timed_run(app)}
+    result['rerun_ms'] = [timed_run(app) for _ in range(reruns)]
+    if app.radio:
+        # 화면별 첫 진입(데이터 로드 포함)과 재진입
+        result['switch_ms'] = {}
+        for page in app.radio[0].options[1:] + app.radio[0].options[:1]:
+            app.radio[0].set_value(page)
+            first = timed_run(app)
+            app.radio[0].set_value(page)
+            result['switch_ms'][page] = {'first': first, 'again': timed_run(app)}
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='대시보드 콜드 스타트/재실행 시간 측정')
+    parser.add_argument('--reruns', type=int, default=5)
+    parser.add_argument('--json', help='결과를 저장할 JSON 경로 (회귀 추적용)')
+    parser.add_argument('--child', choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.reruns), ensure_ascii=False))
+        return
+
+    results = {}
+    for mode, lazy in MODES.items():
+        env = dict(os.environ, DASHBOARD_LAZY_TABS=lazy)
+        child = subprocess.run([sys.executable, '-m', 'benchmarks.startup', '--child', mode, '--reruns', str(args.reruns)],
+                               env=env, capture_output=True, text=True, check=True)
+        results[mode] = json.loads(child.stdout.strip().splitlines()[-1])
+
+    for mode, result in results.items():
+        reruns = np.array(result['rerun_ms'])
+        print(f"{mode:<5} 콜드 스타트 {result['cold_ms']:9.1f} ms   재실행 p50 {np.percentile(reruns, 50):8.1f} ms"
+              f"   p95 {np.percentile(reruns, 95):8.1f} ms")
+        for page, switch in result.get('switch_ms', {}).items():
+            print(f"      {page:<20} 첫 진입 {switch['first']:8.1f} ms   재진입 {switch['again']:8.1f} ms")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'measured_at': time.strftime('%Y-%m-%dT%H:%M:%S'), 'reruns': args.reruns, 'results': results},
+                      f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+"""합성 데이터로 전처리/분포 압축/탭별 데이터 준비 시간과 메모리 측정 (결과는 JSON으로 저장해 실행 간 비교)
+- preprocess: 전체 빌드 (preprocess_data(full=True), 원본 스냅샷을 지우고 CSV를 파싱하면서 새로 쓴다)
+- preprocess_snapshot: 전체 빌드를 다시 실행 (CSV 대신 앞 단계에서 쓴 원본 스냅샷을 읽는다)
+- preprocess_noop: 바뀐 원본이 없을 때 다시 실행 (원본 해시 확인 + 산출물 로드)
+- data_compression: 원본의 거리/시간으로 100x100 분포 압축
+- tab1/tab2/tab3: 대시보드 탭별 데이터 준비 (cold = 산출물 로드 포함, warm = 로드된 산출물로 rerun 1회분)
+단계마다 새 프로세스에서 실행해 최대 RSS가 단계별로 분리되도록 한다
+
+사용법: python -m benchmarks.suite [--sizes 1M 10M 50M] [--json benchmark_results.json]
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import resource
+import subprocess
+import numpy as np
+import pandas as pd
+from benchmarks.synthetic import generate, parse_rows
+from src.preprocessor import (CHUNK_SIZE, FILTER_ALL, FILTER_CUBE_TABLES, LEADERBOARD_METRICS,
+                              preprocess_data, data_compression, load_manifest, load_artifact, filter_cube_lookup,
+                              pyramid_level, leaderboard_index, leaderboard_slice, prefix_sum_arrays,
+                              range_ranking, range_runners)
+
+DATA_DIR = './data/synthetic'
+STAGES = ['preprocess', 'preprocess_snapshot', 'preprocess_noop', 'data_compression', 'tab1', 'tab2', 'tab3']
+
+def peak_rss_mb():
+    """현재 프로세스와 (병렬 빌드의) 자식 프로세스의 최대 RSS (MB)"""
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return own / 1024, children / 1024
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def load_tab1(out_dir, manifest):
+    cube = filter_cube_lookup({f'filter_cube_{name}': load_artifact(f'filter_cube_{name}', manifest, out_dir)
+                               for name in FILTER_CUBE_TABLES})
+    return cube, load_artifact('distance_duration_pyramid', manifest, out_dir)
+
+
+def prep_tab1(loaded):
+    """KPI, 성별 x 연령대 러너 수, 기본 해상도 분포"""
+    cube, pyramid = loaded
+    overall = cube[(FILTER_ALL, FILTER_ALL)]['summary'].iloc[0]
+    crosstab = [(gender, age, cell['summary']['total_runners'].iloc[0])
+                for (gender, age), cell in cube.items() if FILTER_ALL not in (gender, age)]
+    return overall, crosstab, pyramid_level(pyramid, 100, 'linear')
+
+
+def load_tab2(out_dir, manifest):
+    return filter_cube_lookup({f'filter_cube_{name}': load_artifact(f'filter_cube_{name}', manifest, out_dir)
+                               for name in FILTER_CUBE_TABLES})
+
+
+def prep_tab2(cube):
+    """모든 성별 x 연령대 조합의 요약/월별/요일별/국가별 지표"""
+    for cell in cube.values():
+        monthly = cell['monthly'].assign(date=cell['monthly']['year'].astype(str) + '-' + cell['monthly']['month'].astype(str))
+        weekday = cell['weekday'].sort_values('weekday')
+        country = cell['country'].head(10)
+    return monthly, weekday, country
+
+
+def load_tab3(out_dir, manifest):
+    leaderboard = load_artifact('weekly_leaderboard', manifest, out_dir)
+    return {
+        'leaderboard': leaderboard,
+        'index': leaderboard_index(leaderboard),
+        'prefix_sums': prefix_sum_arrays(load_artifact('weekly_prefix_sums', manifest, out_dir)),
+        'ranking': load_artifact('running_W_ranking', manifest, out_dir),
+        'hll': load_artifact('running_W_hll', manifest, out_dir),
+    }
+
+
+def prep_tab3(loaded, country='United States'):
+    """최근 주 리더보드 3종 + 최근 4주 기간 랭킹"""
+    week = list(loaded['index']['segments'])[-1][0]
+    boards = [leaderboard_slice(loaded['leaderboard'], loaded['index'], week, metric, country)
+              for metric in LEADERBOARD_METRICS]
+    weeks = loaded['prefix_sums']['weeks']
+    start, end = max(len(weeks) - 4, 0), len(weeks) - 1
+    period = range_ranking(loaded['prefix_sums'], start, end).merge(
+        range_runners(loaded['ranking'], loaded['hll'], weeks[start], weeks[end]), on='country')
+    return boards, period
+
+
+TABS = {'tab1': (load_tab1, prep_tab1), 'tab2': (load_tab2, prep_tab2), 'tab3': (load_tab3, prep_tab3)}
+
+def run_stage(stage, raw_dir, out_dir, chunksize, workers, repeat):
+    """단계 하나 실행 (새 프로세스 안에서), 측정값 사전 반환"""
+    baseline_mb, _ = peak_rss_mb()
+    result = {}
+    if stage in ('preprocess', 'preprocess_snapshot', 'preprocess_noop'):
+        cache_dir = os.path.join(os.path.dirname(out_dir), 'cache')
+        if stage == 'preprocess':
+            shutil.rmtree(cache_dir, ignore_errors=True)
+        _, seconds = timed(lambda: preprocess_data(raw_dir, out_dir, chunksize, full=stage != 'preprocess_noop',
+                                                   workers=workers, cache_dir=cache_dir))
+        manifest = load_manifest(out_dir)
+        result.update(seconds=seconds, filtered_rows=manifest['filtered_rows'],
+                      raw_rows=sum(source['rows'] for source in manifest['sources'].values()))
+    elif stage == 'data_compression':
+        frames, read_seconds = timed(lambda: [
+            pd.read_csv(os.path.join(raw_dir, name), usecols=['distance', 'duration'], dtype='float32')
+            for name in sorted(os.listdir(raw_dir)) if name.endswith('.csv')])
+        df = pd.concat(frames, ignore_index=True)
+        df = df[(df['distance'] > 0) & (df['duration'] > 0)]
+        compressed, seconds = timed(lambda: data_compression(df))
+        result.update(seconds=seconds, read_seconds=read_seconds, rows=len(df), cells=len(compressed))
+    else:
+        load, prep = TABS[stage]
+        manifest = load_manifest(out_dir)
+        loaded, load_seconds = timed(lambda: load(out_dir, manifest))
+        _, first_seconds = timed(lambda: prep(loaded))
+        warm = np.array([timed(lambda: prep(loaded))[1] for _ in range(repeat)]) * 1000
+        result.update(cold_seconds=load_seconds + first_seconds, load_seconds=load_seconds,
+                      warm_p50_ms=float(np.percentile(warm, 50)), warm_p95_ms=float(np.percentile(warm, 95)))
+    own_mb, children_mb = peak_rss_mb()
+    result.update(baseline_rss_mb=baseline_mb, peak_rss_mb=own_mb, peak_children_rss_mb=children_mb)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='합성 데이터 벤치마크')
+    parser.add_argument('--sizes', nargs='+', default=['1M'], help='합성 데이터 행 수 (예: 1M 10M 50M)')
+    parser.add_argument('--data-dir', default=DATA_DIR, help='크기별 raw/processed를 둘 디렉터리')
+    parser.add_argument('--stages', nargs='+', default=STAGES, choices=STAGES)
+    parser.add_argument('--chunksize', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=20, help='탭별 warm 측정 반복 횟수')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--regenerate', action='store_true', help='합성 데이터가 있어도 다시 생성')
+    parser.add_argument('--json', default='benchmark_results.json')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        raw_dir, out_dir = (os.path.join(args.data_dir, args.sizes[0], name) for name in ('raw', 'processed'))
+        result = run_stage(args.child, raw_dir, out_dir, args.chunksize or None, args.workers, args.repeat)
+        print(json.dumps(result))
+        return
+
+    report = {
+        'measured_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'versions': {'pandas': pd.__version__, 'numpy': np.__version__},
+        'settings': {'chunksize': args.chunksize, 'workers': args.workers, 'repeat': args.repeat, 'seed': args.seed},
+        'sizes': {},
+    }
+    for size in args.sizes:
+        raw_dir = os.path.join(args.data_dir, size, 'raw')
+        if args.regenerate or not os.path.isdir(raw_dir) or not os.listdir(raw_dir):
+            _, seconds = timed(lambda: generate(parse_rows(size), raw_dir, seed=args.seed))
+            print(f"[{size}] 합성 데이터 생성 {seconds:.1f}s")
+        entry = report['sizes'][size] = {
+            'rows': parse_rows(size),
+            'raw_bytes': sum(os.path.getsize(os.path.join(raw_dir, name)) for name in os.listdir(raw_dir)),
+            'stages': {},
+        }
+        for stage in args.stages:
+            command = [sys.executable, '-m', 'benchmarks.suite', '--child', stage, '--sizes', size,
+                       '--data-dir', args.data_dir, '--chunksize', str(args.chunksize),
+                       '--workers', str(args.workers), '--repeat', str(args.repeat)]
+            child = subprocess.run(command, capture_output=True, text=True, check=True)
+            result = entry['stages'][stage] = json.loads(child.stdout.strip().splitlines()[-1])
+            seconds = result.get('seconds', result.get('cold_seconds'))
+            print(f"[{size}] {stage:<17} {seconds:8.2f}s   최대 RSS {result['peak_rss_mb']:8.1f} MB"
+                  + (f"   warm p50 {result['warm_p50_ms']:.2f} ms" if 'warm_p50_ms' in result else ''))
+
+    with open(args.json, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"결과 저장: {args.json}")
+
+
+if __name__ == '__main__':
+    main()
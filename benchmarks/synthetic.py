@@ -0,0 +1,121 @@
+"""원본(Kaggle run_ww_*_d.csv)과 같은 스키마의 합성 러닝 기록 생성
+- 원본처럼 (날짜, athlete) 하루 한 행이고, 달리지 않은 날은 거리/시간 0
+- athlete마다 성별/연령대/국가/평소 거리/페이스/활동 빈도를 정하고, 주말/계절에 따라 달릴 확률과 거리를 바꾼다
+- GPS 오류 같은 이상치(비현실적인 거리/시간)도 섞어 전처리의 이상치 필터를 거치게 한다
+- 블록 단위로 이어 써서 5천만 행도 메모리 사용량이 일정하다
+
+사용법: python -m benchmarks.synthetic --rows 10M [--out-dir ./data/synthetic/10M/raw] [--seed 0]
+"""
+import os
+import argparse
+import numpy as np
+import pandas as pd
+
+YEARS = [2019, 2020]
+BLOCK_ROWS = 1_000_000
+
+COUNTRIES = [
+    'United States', 'United Kingdom', 'Germany', 'France', 'Spain', 'Italy', 'Canada', 'Brazil', 'Mexico',
+    'Netherlands', 'Australia', 'Japan', 'South Korea', 'Sweden', 'Poland', 'Belgium', 'Switzerland', 'Ireland',
+    'Denmark', 'Norway', 'Austria', 'Portugal', 'Argentina', 'Chile', 'Colombia', 'China', 'India', 'Russia',
+    'Finland', 'New Zealand', 'South Africa', 'Czech Republic', 'Hungary', 'Greece', 'Israel', 'Singapore',
+    'Hong Kong', 'Taiwan', 'Philippines', 'Indonesia', 'Thailand', 'Malaysia', 'Turkey', 'Romania', 'Peru',
+    'Ecuador', 'Costa Rica', 'Kenya', 'Ethiopia', 'Morocco', 'Egypt', 'Ukraine', 'Croatia', 'Slovenia',
+    'Slovakia', 'Estonia', 'Latvia', 'Lithuania', 'Luxembourg', 'Iceland',
+]
+AGE_GROUPS = ['18 - 34', '35 - 54', '55 +']
+AGE_WEIGHTS = [0.35, 0.5, 0.15]
+MAJORS = ['CHICAGO 2019', 'BERLIN 2018', 'BOSTON 2019', 'NEW YORK 2018', 'LONDON 2019', 'TOKYO 2019',
+          'BERLIN 2016,CHICAGO 2018', 'NEW YORK 2017,BOSTON 2018,LONDON 2019']
+
+def parse_rows(text):
+    """'1M', '500k', '50M' 같은 행 수 표기를 정수로"""
+    text = str(text).strip().lower().replace('_', '')
+    units = {'k': 1_000, 'm': 1_000_000}
+    if text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+
+def make_athletes(n, rng):
+    """athlete별 고정 속성 (성별/연령대/국가와 평소 거리/페이스/활동 빈도)"""
+    country_weights = 1 / np.arange(1, len(COUNTRIES) + 1) ** 1.1 # 미국, 영국 등 상위 국가에 몰리는 분포
+    age_group = rng.choice(len(AGE_GROUPS), n, p=AGE_WEIGHTS)
+    gender = np.where(rng.random(n) < 0.78, 'M', 'F')
+    return pd.DataFrame({
+        'athlete': rng.permutation(n) + 1,
+        'gender': gender,
+        'age_group': np.array(AGE_GROUPS)[age_group],
+        'country': rng.choice(COUNTRIES, n, p=country_weights / country_weights.sum()),
+        'major': rng.choice(MAJORS, n),
+        'base_distance': rng.lognormal(np.log(8), 0.35, n), # km
+        'pace': rng.normal(5.6, 0.7, n).clip(3.2, 9) + (gender == 'F') * 0.4 + age_group * 0.3, # 분/km
+        'activity': rng.beta(2, 3, n), # 하루에 달릴 확률
+    })
+
+
+def make_block(athletes, days, rng):
+    """days x athletes 행 (날짜 순, 달리지 않은 날은 0)"""
+    n_days, n_athletes = len(days), len(athletes)
+    day = np.repeat(np.arange(n_days), n_athletes)
+    ath = np.tile(np.arange(n_athletes), n_days)
+    weekend = np.asarray(days.dayofweek >= 5)[day]
+    season = 1 + 0.2 * np.sin((np.asarray(days.dayofyear)[day] - 80) / 365 * 2 * np.pi) # 봄/여름에 더 자주
+
+    runs = rng.random(len(day)) < athletes['activity'].to_numpy()[ath] * season * np.where(weekend, 1.2, 0.9)
+    distance = athletes['base_distance'].to_numpy()[ath] * rng.lognormal(0, 0.35, len(day)) * np.where(weekend, 1.4, 1)
+    duration = distance * athletes['pace'].to_numpy()[ath] * rng.normal(1, 0.06, len(day)).clip(0.7, 1.5)
+
+    # 이상치: GPS 오류로 거리가 튀거나, 기록 종료를 잊어 시간이 길게 남은 경우
+    glitch = rng.random(len(day))
+    distance = np.where(glitch < 0.0005, distance * 40, distance)
+    duration = np.where((glitch >= 0.0005) & (glitch < 0.001), duration + 1440, duration)
+
+    block = athletes.iloc[ath][['athlete', 'gender', 'age_group', 'country', 'major']].reset_index(drop=True)
+    block.insert(0, 'datetime', days.strftime('%Y-%m-%d')[day])
+    block.insert(2, 'distance', np.where(runs, distance, 0).round(2))
+    block.insert(3, 'duration', np.where(runs, duration, 0).round(2))
+    return block
+
+
+def generate(rows, out_dir, years=YEARS, seed=0):
+    """rows행을 연도별 CSV(run_ww_<연도>_d.csv)로 나눠 생성하고 파일 경로 목록 반환"""
+    rng = np.random.default_rng(seed)
+    os.makedirs(out_dir, exist_ok=True)
+    rows_per_year = -(-rows // len(years))
+    athletes = make_athletes(-(-rows_per_year // 365), rng)
+    paths = []
+    for i, year in enumerate(years):
+        target = min(rows_per_year, rows - i * rows_per_year)
+        days = pd.date_range(f'{year}-01-01', f'{year}-12-31', freq='D')
+        days_per_block = max(1, BLOCK_ROWS // len(athletes))
+        path = os.path.join(out_dir, f'run_ww_{year}_d.csv')
+        tmp_path = path + '.tmp'
+        written = 0
+        with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+            for start in range(0, len(days), days_per_block):
+                block = make_block(athletes, days[start:start + days_per_block], rng).iloc[:target - written]
+                block.index = pd.RangeIndex(written, written + len(block))
+                block.to_csv(f, header=written == 0)
+                written += len(block)
+                if written >= target:
+                    break
+        os.replace(tmp_path, path)
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description='합성 러닝 기록 생성')
+    parser.add_argument('--rows', default='1M', help='전체 행 수 (예: 1M, 10M, 50M)')
+    parser.add_argument('--out-dir', help='기본값: ./data/synthetic/<rows>/raw')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    out_dir = args.out_dir or os.path.join('./data/synthetic', args.rows, 'raw')
+    for path in generate(parse_rows(args.rows), out_dir, seed=args.seed):
+        print(f"{path} ({os.path.getsize(path) / 1024 ** 2:,.1f} MB)")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,37 +1,103 @@
 import os
+import time
+import threading
+import numpy as np
 import pandas as pd
 import streamlit as st
 import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import plotly.colors as pc
-import matplotlib.pyplot as plt
-import seaborn as sns
-plt.rcParams['font.family'] = 'Malgun Gothic'
-from src.preprocessor import preprocess_data
-from src.design import add_custom_css, create_animated_metric_card, create_gamified_ranking_plot
+from src import queries
+from src.preprocessor import HIST_LEVELS
+from src.design import (RANKING_CHARTS, add_custom_css, create_animated_metric_card, create_gamified_ranking_plot,
+                        week_label)
+from src.figure_cache import FigureCache
+from src import profiling
+from src.profiling import stage
+
+# 1이면 탭 대신 라디오로 고른 화면 하나만 실행 (선택한 화면의 데이터만 로드)
+LAZY_TABS = os.environ.get('DASHBOARD_LAZY_TABS', '0') == '1'
+
+def draw_distance_duration(distance_duration_df, hist_bins, scale):
+    """거리x시간 분포 hexbin PNG (matplotlib은 이 그래프에만 쓰여 처음 그릴 때 import)
+    세션들이 동시에 그려도 서로의 그림을 건드리지 않도록 pyplot 전역 상태 대신 Figure 객체에 그린다"""
+    import io
+    from matplotlib.figure import Figure
+    font = {'fontfamily': 'Malgun Gothic'}
+
+    # 구간별 건수를 가중치(C)로 넘겨 러닝 기록 수가 아닌 구간 수만큼만 그린다
+    fig = Figure(figsize=(8, 6))
+    ax = fig.subplots()
+    hb = ax.hexbin(distance_duration_df['distance'], distance_duration_df['duration'],
+                   C=distance_duration_df['count'], reduce_C_function=np.sum,
+                   gridsize=int(hist_bins * 0.6), cmap='turbo', bins='log', xscale=scale, yscale=scale)
+    ax.set_xlabel('Distance (km)', **font)
+    ax.set_ylabel('Duration (min)', **font)
+    ax.set_title('Running Distance x Running Duration', **font)
+    fig.colorbar(hb, ax=ax).set_label('log10(Count)', **font)
+    fig.tight_layout()
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', bbox_inches='tight', dpi=200) # st.pyplot과 같은 설정
+    return buffer.getvalue()
+
+
+def percentile_caption(values, metric, unit):
+    """평균 아래에 붙일 중앙값/p90 문구"""
+    return f"중앙값 {values[f'{metric}_p50']:.2f} {unit} · p90 {values[f'{metric}_p90']:.2f} {unit}"
+
+
+def distribution_caption(country, values):
+    """TAB3 선택 국가의 거리/시간/속도 중앙값(p90) 한 줄"""
+    if np.isnan(values['distance_p50']):
+        return f"{country}: 선택한 기간에 1Km 이상 러닝 기록이 없습니다."
+    return (f"📏 {country} 기록 분포 — 거리 중앙값 {values['distance_p50']:.1f} km (p90 {values['distance_p90']:.1f} km)"
+            f" · 시간 중앙값 {values['duration_p50']:.0f} 분 (p90 {values['duration_p90']:.0f} 분)"
+            f" · 속도 중앙값 {values['speed_per_hour_p50']:.1f} km/h (p90 {values['speed_per_hour_p90']:.1f} km/h)")
+
+
+def draw_debug_panel(since, figures):
+    """이번 rerun(같은 세션 스레드)에서 기록된 단계별 시간/메모리와 Figure 캐시 적중률"""
+    with st.expander("🔧 단계별 측정 (PROFILE_STAGES=1)"):
+        entries = profiling.recent(since, thread=threading.get_ident())
+        st.dataframe(pd.DataFrame(entries, columns=['stage', 'seconds', 'rows', 'rss_mb', 'peak_rss_mb']),
+                     use_container_width=True, hide_index=True)
+        st.json(figures.stats())
+        st.caption(f"전체 기록은 {profiling.LOG_PATH}에 한 줄씩 저장됩니다. (요약: python -m src.profiling)")
+
 
 def draw_dashboard():
     # CSS 스타일 적용
     add_custom_css()
     
-    @st.cache_data
-    def load_data(data):
-        path = f'./data/processed/{data}.csv'
-        if not os.path.exists(path):
-            df = preprocess_data(data)
-        else:
-            df = pd.read_csv(path)
-        return df
+    # 데이터 조회는 src.queries가 담당 (산출물 로드와 조회 결과를 프로세스 안에서 캐시해 모든 세션이 공유)
+    @st.cache_data(max_entries=2 * len(HIST_LEVELS))
+    def render_distance_duration(build_id, hist_bins, scale):
+        # 해상도/구간 종류별 hexbin은 한 번만 그려 모든 세션이 PNG를 재사용
+        distance_duration_df = queries.distance_duration(hist_bins, scale)
+        with stage('figure/hexbin', rows=len(distance_duration_df)):
+            return draw_distance_duration(distance_duration_df, hist_bins, scale)
+
+    @st.cache_resource
+    def figure_cache():
+        # 모든 세션이 공유하는 Figure 캐시 (manifest의 build_id가 바뀌면 캐시가 스스로 비워진다)
+        return FigureCache()
+
+    # 전처리 산출물은 빌드 단계(python -m src.preprocessor)에서만 생성하고, 대시보드는 manifest만 읽는다
+    manifest = queries.manifest()
+    if manifest is None:
+        st.error("전처리 데이터가 없습니다. 먼저 `python -m src.preprocessor`로 빌드해주세요.")
+        st.stop()
     
     # Streamlit 설정
     st.set_page_config(page_title="🏃‍♂️ Running Dashboard", layout="wide")
     st.title("🏃‍♂️ Running Dashboard")
     
-    # 탭 구성
-    TAB1, TAB2, TAB3 = st.tabs(["📊 전체 데이터 요약", "🧑‍🤝‍🧑 성별/연령대별 지표", "🏆 랭킹 대시보드"])
+    # PROFILE_STAGES=1이면 이번 rerun에서 기록된 단계를 화면 아래 디버그 패널에 보여준다
+    rerun_started = time.time()
+    
+    # Figure는 (탭, 필터, 주, 국가 등) 파라미터별로 공유 캐시에서 꺼내고 없을 때만 그린다
+    figures = figure_cache()
+    build_id = manifest['build_id']
     
-    with TAB1:
+    def draw_summary_tab():
         st.markdown("""
         <div style="text-align: center; padding: 20px;">
             <h1 style="color: black; font-size: 3em; text-shadow: 2px 2px 4px rgba(0,0,0,0.5);">
@@ -40,31 +106,21 @@ def draw_dashboard():
         </div>
         """, unsafe_allow_html=True)
         
-        running_Y_M_stats = load_data('running_Y_M_stats')
-        distance_duration_df = load_data('distance_duration_df')
-        
-        # 게임화된 메트릭 카드
+        # 게임화된 메트릭 카드 (필터 큐브의 전체/전체 조합, 평균은 합계/건수로 가중 평균)
+        overall = queries.summary()
         col1, col2, col3, col4 = st.columns(4)
         with col1:
-            create_animated_metric_card("총 러너 수", running_Y_M_stats['total_runners'].sum(), "명", "👥")
+            create_animated_metric_card("총 러너 수", overall['total_runners'], "명", "👥")
         with col2:
-            create_animated_metric_card("평균 속도", running_Y_M_stats['speed_per_hour'].mean(), "km/h", "⚡")
+            create_animated_metric_card("평균 속도", overall['speed_per_hour'], "km/h", "⚡")
         with col3:
-            create_animated_metric_card("평균 거리", running_Y_M_stats['distance'].mean(), "km", "🏃")
+            create_animated_metric_card("평균 거리", overall['distance'], "km", "🏃")
         with col4:
-            create_animated_metric_card("평균 시간", running_Y_M_stats['duration'].mean(), "분", "⏱️")
+            create_animated_metric_card("평균 시간", overall['duration'], "분", "⏱️")
         
-        col2, col3 = st.columns(2)
-        with col2:
-            crosstab_data = pd.crosstab(
-                running_Y_M_stats['age_group'],
-                running_Y_M_stats['gender'],
-                values=running_Y_M_stats['total_runners'],
-                aggfunc='sum'
-            ).fillna(0).reset_index()
-
-            # 데이터 melt로 변환 (Plotly용)
-            crosstab_melt = crosstab_data.melt(id_vars='age_group', var_name='gender', value_name='total_runners')
+        def build_gender_age():
+            # 필터 큐브의 성별 x 연령대 조합별 고유 러너 수 (Plotly용 long 형식)
+            crosstab_melt = queries.runners_by_gender_age()
 
             # Plotly bar chart (stacked)
             fig_gender_age = px.bar(
@@ -87,24 +143,22 @@ def draw_dashboard():
                 legend=dict(title='성별', orientation='h', yanchor='bottom', y=1.02, xanchor='right', x=1)
             )
             fig_gender_age.update_traces(marker_line_color='black', marker_line_width=1, textfont_color='black')
-            st.plotly_chart(fig_gender_age, use_container_width=True)
+            return fig_gender_age
+        
+        col2, col3 = st.columns(2)
+        with col2:
+            st.plotly_chart(figures.get(build_id, ('tab1', 'gender_age'), build_gender_age), use_container_width=True)
         with col3:
-            x_list, y_list = [], []
-            for idx, row in distance_duration_df.iterrows():
-                x_list.extend([row['distance']] * int(row['count']))
-                y_list.extend([row['duration']] * int(row['count']))
-
-            plt.figure(figsize=(8, 6))
-            plt.hexbin(x_list, y_list, gridsize=60, cmap='turbo', bins='log')
-            plt.xlabel('Distance (km)')
-            plt.ylabel('Duration (min)')
-            plt.title('Running Distance x Running Duration')
-            plt.colorbar(label='log10(Count)')
-            plt.tight_layout()
-            st.pyplot(plt)
-            plt.close()
-
-    with TAB2:
+            # 미리 만든 해상도 피라미드에서 골라 원본 없이 확대/로그 구간 전환
+            bins_col, scale_col = st.columns(2)
+            with bins_col:
+                hist_bins = st.select_slider("해상도 (구간 수)", options=HIST_LEVELS, value=100)
+            with scale_col:
+                log_scale = st.toggle("로그 구간", value=False)
+            scale = 'log' if log_scale else 'linear'
+            st.image(render_distance_duration(build_id, hist_bins, scale), use_container_width=True)
+
+    def draw_filter_tab():
         st.markdown("""
         <div style="text-align: center; padding: 20px;">
             <h1 style="color: black; font-size: 3em; text-shadow: 2px 2px 4px rgba(0,0,0,0.5);">
@@ -112,6 +166,8 @@ def draw_dashboard():
             </h1>
         </div>
         """, unsafe_allow_html=True)
+        filter_options = queries.filter_options()
+        
         # 성별과 연령대 필터 추가
         st.markdown("### 성별/연령대 설정")
         # 필터를 컬럼으로 배치
@@ -119,76 +175,49 @@ def draw_dashboard():
         
         with filter_col1:
             # 성별 필터
-            gender_options = ["전체"] + sorted(running_Y_M_stats['gender'].unique().tolist())
-            selected_gender = st.selectbox("성별 선택", gender_options)
+            selected_gender = st.selectbox("성별 선택", filter_options['gender'])
         
         with filter_col2:
             # 연령대 필터
-            age_options = ["전체"] + sorted(running_Y_M_stats['age_group'].unique().tolist())
-            selected_age = st.selectbox("연령대 선택", age_options)
-        
-        # 필터링된 데이터 생성
-        filtered_stats = running_Y_M_stats.copy()
-        
-        if selected_gender != "전체":
-            filtered_stats = filtered_stats[filtered_stats['gender'] == selected_gender]
-            
-        if selected_age != "전체":
-            filtered_stats = filtered_stats[filtered_stats['age_group'] == selected_age]
+            selected_age = st.selectbox("연령대 선택", filter_options['age_group'])
         
+        # 미리 계산한 필터 조합에서 조회
+        filtered_overall = queries.summary(selected_gender, selected_age)
+
         # 필터링된 데이터로 메트릭 업데이트
-        if len(filtered_stats) > 0:
+        if filtered_overall['run_count'] > 0:
             col_1, col_2 = st.columns(2)
             with col_1:
-                st.metric(label=f"총 러너 수", value=f"{filtered_stats['total_runners'].sum():,d} 명")
-                st.metric(label=f"평균 러닝 속도", value=f"{filtered_stats['speed_per_hour'].mean():.2f} km/h")
+                st.metric(label=f"총 러너 수", value=f"{int(filtered_overall['total_runners']):,d} 명")
+                st.metric(label=f"평균 러닝 속도", value=f"{filtered_overall['speed_per_hour']:.2f} km/h")
+                st.caption(percentile_caption(filtered_overall, 'speed_per_hour', 'km/h'))
             with col_2:
-                st.metric(label=f"평균 러닝 거리", value=f"{filtered_stats['distance'].mean():.2f} km")
-                st.metric(label=f"평균 러닝 시간", value=f"{filtered_stats['duration'].mean():.2f} 분")
+                st.metric(label=f"평균 러닝 거리", value=f"{filtered_overall['distance']:.2f} km")
+                st.caption(percentile_caption(filtered_overall, 'distance', 'km'))
+                st.metric(label=f"평균 러닝 시간", value=f"{filtered_overall['duration']:.2f} 분")
+                st.caption(percentile_caption(filtered_overall, 'duration', '분'))
         else:
             st.warning("선택한 필터 조건에 해당하는 데이터가 없습니다.")
 
-        monthly_summary = filtered_stats.groupby(['year', 'month']).agg(
-            total_runners=('total_runners', 'sum'),
-            distance=('distance', 'mean'),
-            speed_per_hour=('speed_per_hour', 'mean'),
-            duration=('duration', 'mean')
-        ).reset_index()
-        monthly_summary['date'] = monthly_summary['year'].astype(str) + '-' + monthly_summary['month'].astype(str)
-        col4, col5, col6 = st.columns(3)
-
-        with col4:
-            fig1 = px.line(monthly_summary, x='date', y='total_runners', title="월별 총 러너 수", 
-                           labels={'date': '년도-월', 'total_runners': '총 러너 수'},
-                           line_shape='spline')  # 부드러운 곡선으로 변경
-            fig1.update_layout(xaxis_tickangle=-90)
-            st.plotly_chart(fig1, use_container_width=True)
-
-            fig2 = px.line(monthly_summary, x='date', y='duration', title="월별 평균 러닝 시간 (분)",
-                           labels={'date': '년도-월', 'duration': '평균 시간 (분)'},
-                           line_shape='spline')
-            fig2.update_layout(xaxis_tickangle=-90)
-            st.plotly_chart(fig2, use_container_width=True)
-
-        with col5:
-            fig3 = px.line(monthly_summary, x='date', y='distance', title="월별 평균 거리 (km)",
-                           labels={'date': '년도-월', 'distance': '평균 거리 (km)'},
-                           line_shape='spline')
-            fig3.update_layout(xaxis_tickangle=-90)
-            st.plotly_chart(fig3, use_container_width=True)
-
-            fig4 = px.line(monthly_summary, x='date', y='speed_per_hour', title="월별 평균 속도 (km/h)",
-                           labels={'date': '년도-월', 'speed_per_hour': '평균 속도 (km/h)'},
-                           line_shape='spline')
-            fig4.update_layout(xaxis_tickangle=-90)
-            st.plotly_chart(fig4, use_container_width=True)
+        def build_monthly_line(y, title, y_label):
+            monthly_summary = queries.monthly_series(selected_gender, selected_age)
+            fig = px.line(monthly_summary, x='date', y=y, title=title,
+                          labels={'date': '년도-월', y: y_label},
+                          line_shape='spline')  # 부드러운 곡선으로 변경
+            if f'{y}_p50' in monthly_summary:
+                # 평균은 극단값에 끌려가므로 중앙값~p90 구간을 띠로 함께 표시
+                fig.data[0].update(name='평균', showlegend=True)
+                fig.add_scatter(x=monthly_summary['date'], y=monthly_summary[f'{y}_p50'], name='중앙값',
+                                mode='lines', line=dict(dash='dash', shape='spline', color='#7f8c8d'))
+                fig.add_scatter(x=monthly_summary['date'], y=monthly_summary[f'{y}_p90'], name='p90',
+                                mode='lines', line=dict(dash='dot', shape='spline', color='#7f8c8d'),
+                                fill='tonexty', fillcolor='rgba(127, 140, 141, 0.15)')
+            fig.update_layout(xaxis_tickangle=-90)
+            return fig
 
-        with col6:
-            # 요일별 평균 러너 수 Plotly
-            weekday_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-            weekday_dist_df = filtered_stats.groupby('weekday')['total_runners'].mean().reset_index()
-            weekday_dist_df['weekday'] = pd.Categorical(weekday_dist_df['weekday'], categories=weekday_order, ordered=True)
-            weekday_dist_df = weekday_dist_df.sort_values('weekday')
+        def build_weekday():
+            # 요일별 평균 러너 수 Plotly (월별 요일 고유 러너 수의 평균)
+            weekday_dist_df = queries.weekday_profile(selected_gender, selected_age)
 
             fig_weekday = px.bar(
                 weekday_dist_df,
@@ -209,11 +238,11 @@ def draw_dashboard():
                 yaxis=dict(title_font=dict(color='black'), tickfont=dict(color='black'))
             )
             fig_weekday.update_traces(marker_line_color='black', marker_line_width=1)
-            st.plotly_chart(fig_weekday, use_container_width=True)
+            return fig_weekday
 
+        def build_country_speed():
             # 국가별 평균 속도 Plotly
-            top_countries = filtered_stats.groupby('country')['speed_per_hour'].mean().reset_index()
-            top_countries = top_countries.sort_values(by='speed_per_hour', ascending=True).head(10)
+            top_countries = queries.country_speed(selected_gender, selected_age, top=10)
 
             fig_speed = px.bar(
                 top_countries,
@@ -223,7 +252,9 @@ def draw_dashboard():
                 color='speed_per_hour',
                 color_continuous_scale='Viridis_r',
                 title='국가별 평균 속도 (Top 10)',
-                labels={'speed_per_hour': '평균 속도 (km/h)', 'country': '국가'},
+                labels={'speed_per_hour': '평균 속도 (km/h)', 'country': '국가',
+                        'speed_per_hour_p50': '속도 중앙값 (km/h)', 'speed_per_hour_p90': '속도 p90 (km/h)'},
+                hover_data={'speed_per_hour_p50': ':.2f', 'speed_per_hour_p90': ':.2f'},
                 text_auto='.2f'
             )
             fig_speed.update_layout(
@@ -235,9 +266,30 @@ def draw_dashboard():
                 yaxis=dict(title_font=dict(color='black'), tickfont=dict(color='black'))
             )
             fig_speed.update_traces(marker_line_color='black', marker_line_width=1)
-            st.plotly_chart(fig_speed, use_container_width=True)
+            return fig_speed
+
+        def tab2_figure(name, build):
+            return figures.get(build_id, ('tab2', selected_gender, selected_age, name), build)
+
+        col4, col5, col6 = st.columns(3)
+
+        with col4:
+            st.plotly_chart(tab2_figure('monthly_runners', lambda: build_monthly_line(
+                'total_runners', "월별 총 러너 수", '총 러너 수')), use_container_width=True)
+            st.plotly_chart(tab2_figure('monthly_duration', lambda: build_monthly_line(
+                'duration', "월별 평균 러닝 시간 (분)", '평균 시간 (분)')), use_container_width=True)
 
-    with TAB3:
+        with col5:
+            st.plotly_chart(tab2_figure('monthly_distance', lambda: build_monthly_line(
+                'distance', "월별 평균 거리 (km)", '평균 거리 (km)')), use_container_width=True)
+            st.plotly_chart(tab2_figure('monthly_speed', lambda: build_monthly_line(
+                'speed_per_hour', "월별 평균 속도 (km/h)", '평균 속도 (km/h)')), use_container_width=True)
+
+        with col6:
+            st.plotly_chart(tab2_figure('weekday', build_weekday), use_container_width=True)
+            st.plotly_chart(tab2_figure('country_speed', build_country_speed), use_container_width=True)
+
+    def draw_ranking_tab():
         st.markdown("""
         <div style="text-align: center; padding: 20px;">
             <h1 style="color: black; font-size: 3em; text-shadow: 2px 2px 4px rgba(0,0,0,0.5);">
@@ -249,26 +301,15 @@ def draw_dashboard():
         </div>
         """, unsafe_allow_html=True)
         
-        running_W_ranking = load_data('running_W_ranking')
-               
-        country_options = sorted(running_W_ranking['country'].unique().tolist())
+        country_options = queries.countries()
         selected_country = st.selectbox(
             "(앱 사용자 국가 자동 선택)", 
             country_options, 
             index=country_options.index("United States") if "United States" in country_options else 0
         )
         
-        date_options = [x.split('-')[0] + '년 ' + x.split('-')[1] + '주차' for x in running_W_ranking['year_week'].unique()]
-        selected_date = st.selectbox("주별 선택 (Default: 최근 주)", date_options, index=len(date_options)-1)
-        selected_date = selected_date.split('년 ')[0] + '-' + selected_date.split('년 ')[1].split('주차')[0]
-        filtered_stats = running_W_ranking[running_W_ranking['year_week'] == selected_date]
-        
-        # 국가별 집계
-        ranking_df = filtered_stats.groupby('country').agg({
-            'total_runners': 'sum',
-            'distance': 'mean',
-            'duration': 'mean'
-        }).reset_index().sort_values(by='total_runners', ascending=False)
+        weeks = queries.weeks() # 시간순 정수 week_key (선택 값은 키 그대로, 표시만 'N년 M주차')
+        selected_date = st.selectbox("주별 선택 (Default: 최근 주)", weeks, index=len(weeks)-1, format_func=week_label)
         
         st.markdown("""
         <div class="ranking-card">
@@ -277,36 +318,76 @@ def draw_dashboard():
         </div>
         """, unsafe_allow_html=True)
         
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            fig1 = create_gamified_ranking_plot(
-                ranking_df=ranking_df,
-                selected_country=selected_country,
-                column_name='total_runners',
-                title='러너 수 랭킹 (Top 20)',
-                x_label='Active Users'
-            )
-            st.plotly_chart(fig1, use_container_width=True)
-            
-        with col2:
-            fig2 = create_gamified_ranking_plot(
-                ranking_df=ranking_df,
+        def build_week_ranking(metric, title, x_label):
+            # 미리 계산한 순위표에서 상위 20개 + 선택 국가 행만 잘라온다
+            return create_gamified_ranking_plot(
+                ranking_df=queries.weekly_leaderboard(selected_date, metric, selected_country),
                 selected_country=selected_country,
-                column_name='distance',
-                title='평균 러닝 거리 랭킹 (Top 20)',
-                x_label='Distance (km)'
+                column_name=metric,
+                title=title,
+                x_label=x_label
             )
-            st.plotly_chart(fig2, use_container_width=True)
-            
-        with col3:
-            fig3 = create_gamified_ranking_plot(
-                ranking_df=ranking_df,
+        
+        for col, (metric, title, x_label) in zip(st.columns(3), RANKING_CHARTS):
+            with col:
+                fig = figures.get(build_id, ('tab3', 'week', selected_date, metric, selected_country),
+                                  lambda: build_week_ranking(metric, title, x_label))
+                st.plotly_chart(fig, use_container_width=True, key=f'week_{metric}')
+        st.caption(distribution_caption(selected_country, queries.country_distribution(
+            selected_date, selected_date, selected_country)))
+
+        st.markdown("""
+        <div class="ranking-card">
+            <h3 style="color: #2c3e50; margin-bottom: 15px;">🗓️ 기간별 랭킹</h3>
+            <p style="color: #7f8c8d; font-size: 0.9em;">선택한 기간 전체의 러닝 기록으로 집계합니다. 평균 거리/시간은 기간 길이와 무관하게 바로 계산되지만, 러너 수는 기간 안의 주별 집계를 합치므로 기간이 길수록 오래 걸립니다.</p>
+        </div>
+        """, unsafe_allow_html=True)
+        
+        start, end = st.select_slider(
+            "기간 선택 (Default: 최근 4주)",
+            options=weeks,
+            value=(weeks[max(len(weeks) - 4, 0)], weeks[-1]),
+            format_func=week_label
+        )
+        
+        def build_period_ranking(metric, title, x_label):
+            # 누적합 차이로 국가별 합계/평균, 고유 러너 수는 주별 스케치를 합쳐 추정
+            return create_gamified_ranking_plot(
+                ranking_df=queries.range_leaderboard(start, end, metric),
                 selected_country=selected_country,
-                column_name='duration',
-                title='평균 러닝 시간 랭킹 (Top 20)',
-                x_label='Duration (min)'
+                column_name=metric,
+                title=title,
+                x_label=x_label
             )
-            st.plotly_chart(fig3, use_container_width=True)
+        
+        for col, (metric, title, x_label) in zip(st.columns(3), RANKING_CHARTS):
+            with col:
+                fig = figures.get(build_id, ('tab3', 'range', start, end, metric, selected_country),
+                                  lambda: build_period_ranking(metric, title, x_label))
+                st.plotly_chart(fig, use_container_width=True, key=f'period_{metric}')
+        st.caption(distribution_caption(selected_country, queries.country_distribution(start, end, selected_country)))
+
+    def draw_page(draw_tab):
+        with stage(f'tab/{draw_tab.__name__}'):
+            draw_tab()
+
+    # 탭 구성 (각 화면은 자기 데이터만 로드한다)
+    tab_pages = [
+        ("📊 전체 데이터 요약", draw_summary_tab),
+        ("🧑‍🤝‍🧑 성별/연령대별 지표", draw_filter_tab),
+        ("🏆 랭킹 대시보드", draw_ranking_tab),
+    ]
+    if LAZY_TABS:
+        # st.tabs는 rerun마다 모든 탭 본문을 실행하므로 선택한 화면만 실행
+        selected_tab = st.radio("화면 선택", [name for name, _ in tab_pages], horizontal=True, label_visibility='collapsed')
+        draw_page(dict(tab_pages)[selected_tab])
+    else:
+        for tab, (_, draw_tab) in zip(st.tabs([name for name, _ in tab_pages]), tab_pages):
+            with tab:
+                draw_page(draw_tab)
+
+    if profiling.ENABLED:
+        draw_debug_panel(rerun_started, figures)
 
 def main():
 
@@ -1,11 +1,19 @@
 # CSS 스타일 추가
 import streamlit as st
-import plotly.express as px
 import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import plotly.colors as pc
 import pandas as pd
 
+# TAB3 랭킹 차트 (지표, 제목, x축 이름) - 대시보드와 정적 내보내기(src.export)가 같은 차트를 그린다
+RANKING_CHARTS = [
+    ('total_runners', '러너 수 랭킹 (Top 20)', 'Active Users'),
+    ('distance', '평균 러닝 거리 랭킹 (Top 20)', 'Distance (km)'),
+    ('duration', '평균 러닝 시간 랭킹 (Top 20)', 'Duration (min)'),
+]
+
+def week_label(week_key):
+    """week_key(ISO 연도 * 100 + 주)를 'N년 M주차'로"""
+    return f"{week_key // 100}년 {week_key % 100}주차"
+
 def add_custom_css():
     st.markdown("""
     <style>
@@ -107,6 +115,14 @@ def create_gamified_ranking_plot(ranking_df, selected_country, column_name, titl
     
     plot_data = plot_data.sort_values(by=column_name, ascending=True)
     
+    # 순위 변화 표시 (리더보드 슬라이스에 rank_change가 있을 때만, 전주 기록이 없으면 NEW)
+    if 'rank_change' in plot_data.columns:
+        rank_moves = [' NEW' if pd.isna(change) else f" ▲{change:.0f}" if change > 0 else f" ▼{-change:.0f}" if change < 0 else ' -'
+                      for change in plot_data['rank_change']]
+        rank_info = plot_data[['rank', 'percentile']].to_numpy()
+    else:
+        rank_moves, rank_info = [''] * len(plot_data), None
+
     # 메달 색상 정의 (상위 3개에 메달 색상 적용)
     colors = []
     for i in range(len(plot_data)):
@@ -137,10 +153,13 @@ def create_gamified_ranking_plot(ranking_df, selected_country, column_name, titl
                 solidity=0.2
             )
         ),
-        text=[f"{val:,.0f}" if column_name == 'total_runners' else f"{val:.2f}" for val in plot_data[column_name]],
+        text=[(f"{val:,.0f}" if column_name == 'total_runners' else f"{val:.2f}") + move
+              for val, move in zip(plot_data[column_name], rank_moves)],
         textposition='auto',
+        customdata=rank_info,
         hovertemplate='<b>%{y}</b><br>' +
                       f'{x_label}: %{{x:,.0f}}<br>' +
+                      ('순위: %{customdata[0]:.0f}위 (백분위 %{customdata[1]:.0f})<br>' if rank_info is not None else '') +
                       '<extra></extra>',
         name=''
     ))
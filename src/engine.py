@@ -0,0 +1,254 @@
+"""원본 러닝 기록 임의 집계 엔진 (pandas 청크 스트리밍 / DuckDB SQL, 같은 인터페이스와 같은 이상치 규칙)
+
+- pandas: 원본 CSV를 바이트 구간 x 청크로 읽어 prepare_chunk로 거른 뒤 그룹별 합계/건수와 (그룹, athlete) 쌍을 모아 합친다
+- duckdb: 같은 규칙을 SQL 뷰(runs)로 정의하고 집계를 쿼리로 실행 (파일을 여러 스레드로 스캔하고 조건은 스캔 단계로 내려보낸다)
+  export_parquet()로 정제된 기록을 Parquet으로 한 번 떨궈 두면 필요한 컬럼만 읽고 행 그룹 통계로 조건에 안 맞는 구간을 건너뛴다
+- DuckDB는 선택 의존성 (pip install duckdb), 없으면 engine='duckdb'일 때만 ImportError
+
+사용법: python -m src.engine [--engine pandas|duckdb] [--source ./data/raw] --by country week_key [--where gender=F] [--active]
+"""
+import os
+import argparse
+import pandas as pd
+from src.preprocessor import (RAW_DIR, RAW_DTYPES, CHUNK_SIZE, TASK_BYTES, STATS_KEYS, RANKING_KEYS, SUM_COLUMNS,
+                              MAX_DISTANCE, MAX_DURATION, MAX_SPEED, ACTIVE_DISTANCE, list_raw_files, run_tasks,
+                              byte_ranges, read_raw_chunks, prepare_chunk, concat_frames, order_stats, order_ranking,
+                              sort_by_keys)
+from src.profiling import stage, stage_iter
+
+ENGINES = ['pandas', 'duckdb']
+# 기본 엔진 (QUERY_ENGINE=duckdb로 바꿀 수 있다)
+DEFAULT_ENGINE = os.environ.get('QUERY_ENGINE', 'pandas')
+# 그룹/조건에 쓸 수 있는 컬럼 (prepare_chunk가 만드는 파생변수 포함)
+DIMENSIONS = ['year', 'month', 'week', 'weekday', 'week_key', 'month_key', 'partition', 'gender', 'age_group', 'country']
+# export_parquet 행 그룹 크기 (날짜순으로 쓰므로 연도/주 조건이면 행 그룹 통계로 건너뛸 수 있다)
+PARQUET_ROW_GROUP = 1_000_000
+
+# prepare_chunk와 같은 파생변수 + 이상치 규칙 (거리/시간은 pandas 경로처럼 float32로 계산해 경계값 판정을 맞춘다)
+RUNS_SQL = f"""
+SELECT *, week_key AS "partition"
+FROM (
+    SELECT datetime, athlete, distance, duration, speed_per_hour, gender, age_group, country,
+           year(datetime) AS year, month(datetime) AS month, week(datetime) AS week, dayname(datetime) AS weekday,
+           isoyear(datetime) * 100 + week(datetime) AS week_key, year(datetime) * 100 + month(datetime) AS month_key
+    FROM (
+        SELECT TRY_CAST(datetime AS TIMESTAMP) AS datetime, athlete,
+               CAST(distance AS FLOAT) AS distance, CAST(duration AS FLOAT) AS duration,
+               CAST(distance AS FLOAT) / CAST(duration AS FLOAT) * 60 AS speed_per_hour,
+               gender, age_group, country
+        FROM {{source}}
+    )
+    WHERE distance > 0 AND duration > 0 AND datetime IS NOT NULL
+      AND distance < {MAX_DISTANCE} AND duration < {MAX_DURATION} AND speed_per_hour < {MAX_SPEED}
+)
+"""
+
+def get_engine(name=None, source=RAW_DIR, **options):
+    """이름(pandas/duckdb, 기본은 QUERY_ENGINE)으로 엔진 만들기"""
+    name = name or DEFAULT_ENGINE
+    if name == 'pandas':
+        return PandasEngine(source, **options)
+    if name == 'duckdb':
+        return DuckDBEngine(source, **options)
+    raise ValueError(f"알 수 없는 엔진: {name} ({ENGINES} 중 하나)")
+
+
+class Engine:
+    """엔진 공통 인터페이스: aggregate()만 구현하면 기존 산출물 형태의 집계도 같은 결과로 만든다"""
+
+    def aggregate(self, by, where=None, active=False):
+        """정제된 기록을 by로 묶은 고유 러너 수, 평균 거리/시간/속도와 합계/건수 (by 기준 정렬)
+        where = {컬럼: 값 또는 값 목록}, active=True면 1km 넘게 달린 기록만 (주별 랭킹 기준)"""
+        raise NotImplementedError
+
+    def running_Y_M_stats(self):
+        """전처리 산출물 running_Y_M_stats와 같은 집계 (total_runners는 정확한 값, 산출물은 HLL 추정값)"""
+        stats = self.aggregate(STATS_KEYS)
+        return order_stats(stats[STATS_KEYS + ['distance', 'duration', 'speed_per_hour', 'total_runners'] + SUM_COLUMNS])
+
+    def running_W_ranking(self):
+        """전처리 산출물 running_W_ranking과 같은 집계 (total_runners는 정확한 값, 산출물은 HLL 추정값)"""
+        ranking = self.aggregate(RANKING_KEYS, active=True)
+        return order_ranking(ranking[RANKING_KEYS + ['total_runners', 'distance', 'duration',
+                                                     'distance_sum', 'duration_sum', 'run_count']])
+
+
+def check_query(by, where):
+    """by/where 컬럼 확인 (SQL에 이름을 그대로 넣으므로 허용 목록만 받는다)"""
+    by = [by] if isinstance(by, str) else list(by)
+    where = {col: list(value) if isinstance(value, (list, tuple, set)) else [value]
+             for col, value in (where or {}).items()}
+    unknown = [col for col in by + list(where) if col not in DIMENSIONS]
+    if unknown or not by:
+        raise ValueError(f"그룹/조건 컬럼은 {DIMENSIONS} 중에서 골라야 합니다: {unknown or by}")
+    return by, where
+
+
+def finish(df, by):
+    """두 엔진의 결과를 같은 형태로 (평균 컬럼 추가, 키는 문자열/int64, by 기준 정렬)"""
+    for col in SUM_COLUMNS:
+        if col != 'run_count':
+            df[col.removesuffix('_sum')] = df[col] / df['run_count']
+    for col in by:
+        if pd.api.types.is_integer_dtype(df[col]):
+            df[col] = df[col].astype('int64')
+    df = df.astype({'run_count': 'int64', 'total_runners': 'int64'})
+    columns = by + ['total_runners', 'run_count', 'distance', 'duration', 'speed_per_hour',
+                    'distance_sum', 'duration_sum', 'speed_per_hour_sum']
+    return sort_by_keys(df[columns], by)
+
+
+class PandasEngine(Engine):
+    """원본 CSV를 청크로 읽어 집계 (workers > 1이면 바이트 구간을 프로세스 풀에서)
+    고유 러너 수를 정확히 세려고 (그룹, athlete) 쌍을 모으므로 메모리는 청크 크기가 아니라 쌍의 수에 비례한다"""
+
+    def __init__(self, source=RAW_DIR, chunksize=CHUNK_SIZE, workers=1):
+        self.source = source
+        self.chunksize = chunksize
+        self.workers = workers
+
+    def aggregate(self, by, where=None, active=False):
+        by, where = check_query(by, where)
+        tasks = [(os.path.join(self.source, name), start, end, by, where, active, self.chunksize)
+                 for name in list_raw_files(self.source)
+                 for start, end in byte_ranges(os.path.join(self.source, name), TASK_BYTES)]
+        with stage('engine/pandas') as s:
+            sums, pairs = merge_results(run_tasks(aggregate_range, tasks, self.workers), by)
+            runners = pairs.groupby(by, observed=True).size().rename('total_runners').reset_index()
+            result = finish(sums.merge(runners, on=by), by)
+            s.rows = len(result)
+        return result
+
+
+def aggregate_range(path, start, end, by, where, active, chunksize=CHUNK_SIZE):
+    """원본 파일 바이트 구간 하나의 그룹별 합계/건수와 (그룹, athlete) 쌍 (프로세스 풀 작업 단위, 청크별 결과는 끝에서 한 번에 합친다)"""
+    results = []
+    for chunk in stage_iter('read_csv', read_raw_chunks(path, chunksize, start, end)):
+        df = prepare_chunk(chunk)
+        for col, values in where.items():
+            df = df[df[col].isin(values)]
+        if active:
+            df = df[df['distance'] > ACTIVE_DISTANCE]
+        df = df.astype({'distance': 'float64', 'duration': 'float64', 'speed_per_hour': 'float64'})
+        sums = df.groupby(by, observed=True).agg(
+            distance_sum=('distance', 'sum'),
+            duration_sum=('duration', 'sum'),
+            speed_per_hour_sum=('speed_per_hour', 'sum'),
+            run_count=('distance', 'size'),
+        ).reset_index()
+        results.append((sums, df[by + ['athlete']].drop_duplicates()))
+    return merge_results(results, by) if results else None
+
+
+def merge_results(results, by):
+    """구간별 결과 합치기 (합계/건수는 더하고 (그룹, athlete) 쌍은 중복 제거)"""
+    results = [result for result in results if result is not None]
+    if not results:
+        raise ValueError('집계할 원본 기록이 없습니다.')
+    sums = concat_frames([sums for sums, _ in results]).groupby(by, observed=True, sort=False).sum().reset_index()
+    pairs = concat_frames([pairs for _, pairs in results]).drop_duplicates(ignore_index=True)
+    return sums, pairs
+
+
+class DuckDBEngine(Engine):
+    """DuckDB로 원본 CSV 폴더 또는 Parquet 파일(export_parquet 결과, 이미 정제됨)을 SQL로 집계"""
+
+    def __init__(self, source=RAW_DIR, threads=None, database=':memory:'):
+        try:
+            import duckdb
+        except ImportError as e:
+            raise ImportError("DuckDB 엔진을 쓰려면 duckdb가 필요합니다: pip install duckdb "
+                              "(기본 pandas 엔진은 추가 설치 없이 동작합니다)") from e
+        self.source = source
+        self.con = duckdb.connect(database)
+        if threads:
+            self.con.execute(f"SET threads = {int(threads)}")
+        self.con.execute(f"CREATE OR REPLACE TEMP VIEW runs AS {self.runs_sql()}")
+
+    def runs_sql(self):
+        """정제된 기록 뷰의 SELECT 문 (Parquet은 이미 정제된 기록이라 그대로 읽는다)"""
+        if self.source.endswith('.parquet'):
+            return f"SELECT * FROM read_parquet({sql_literal(self.source)})"
+        files = [os.path.join(self.source, name) for name in list_raw_files(self.source)]
+        if not files:
+            raise ValueError(f"{self.source}에 원본 CSV가 없습니다.")
+        types = {col: 'VARCHAR' if dtype in ('str', 'category') else 'INTEGER' if dtype == 'int32' else 'FLOAT'
+                 for col, dtype in RAW_DTYPES.items()}
+        types_sql = ', '.join(f"{sql_literal(col)}: {sql_type!r}" for col, sql_type in types.items())
+        source = f"read_csv([{', '.join(sql_literal(path) for path in files)}], header = true, types = {{{types_sql}}})"
+        return RUNS_SQL.format(source=source)
+
+    def sql(self, query, params=None):
+        """runs 뷰에 대한 임의 SQL 실행 -> DataFrame"""
+        return self.con.execute(query, params or []).df()
+
+    def aggregate(self, by, where=None, active=False):
+        by, where = check_query(by, where)
+        # 컬럼 이름은 허용 목록이라 그대로 넣고 (partition은 예약어라 따옴표), 값은 파라미터로 넘긴다
+        conditions, params = [f'"{col}" IS NOT NULL' for col in by], []
+        for col, values in where.items():
+            conditions.append(f'"{col}" IN ({", ".join("?" * len(values))})')
+            params += values
+        if active:
+            conditions.append(f"distance > {ACTIVE_DISTANCE}")
+        keys = ', '.join(f'"{col}"' for col in by)
+        query = f"""
+            SELECT {keys},
+                   COUNT(DISTINCT athlete) AS total_runners,
+                   SUM(CAST(distance AS DOUBLE)) AS distance_sum,
+                   SUM(CAST(duration AS DOUBLE)) AS duration_sum,
+                   SUM(CAST(speed_per_hour AS DOUBLE)) AS speed_per_hour_sum,
+                   COUNT(*) AS run_count
+            FROM runs
+            WHERE {' AND '.join(conditions)}
+            GROUP BY {keys}
+        """
+        with stage('engine/duckdb') as s:
+            result = finish(self.sql(query, params), by)
+            s.rows = len(result)
+        return result
+
+    def export_parquet(self, path, row_group_size=PARQUET_ROW_GROUP):
+        """정제된 기록을 날짜순 Parquet으로 저장 (이후 DuckDBEngine(path)로 열면 원본 CSV 파싱 없이 집계)"""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with stage('engine/export_parquet'):
+            self.con.execute(f"COPY (SELECT * FROM runs ORDER BY datetime) TO {sql_literal(path)} "
+                             f"(FORMAT parquet, ROW_GROUP_SIZE {int(row_group_size)})")
+        return path
+
+
+def sql_literal(value):
+    """SQL 문자열 리터럴 (작은따옴표 이스케이프)"""
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='원본 러닝 기록 임의 집계')
+    parser.add_argument('--engine', choices=ENGINES, default=DEFAULT_ENGINE)
+    parser.add_argument('--source', default=RAW_DIR, help='원본 CSV 폴더 또는 (duckdb) 정제된 Parquet 파일')
+    parser.add_argument('--by', nargs='+', choices=DIMENSIONS)
+    parser.add_argument('--where', nargs='*', default=[], metavar='컬럼=값', help='같은 컬럼을 여러 번 주면 IN 조건')
+    parser.add_argument('--active', action='store_true', help='1km 넘게 달린 기록만 (주별 랭킹 기준)')
+    parser.add_argument('--workers', type=int, help='pandas 프로세스 수 (기본 1) / duckdb 스레드 수 (기본 전체 코어)')
+    parser.add_argument('--export-parquet', metavar='경로', help='(duckdb) 정제된 기록을 Parquet으로 저장만 하고 종료')
+    args = parser.parse_args()
+    if args.export_parquet and args.engine != 'duckdb':
+        parser.error('--export-parquet은 --engine duckdb에서만 쓸 수 있습니다.')
+    if not args.export_parquet and not args.by:
+        parser.error('--by로 그룹 컬럼을 하나 이상 지정해주세요.')
+
+    where = {}
+    for condition in args.where:
+        col, value = condition.split('=', 1)
+        where.setdefault(col, []).append(int(value) if value.lstrip('-').isdigit() else value)
+    options = {'workers': args.workers or 1} if args.engine == 'pandas' else {'threads': args.workers}
+    engine = get_engine(args.engine, args.source, **options)
+    if args.export_parquet:
+        print(engine.export_parquet(args.export_parquet))
+        return
+    with pd.option_context('display.max_rows', 200, 'display.width', 200):
+        print(engine.aggregate(args.by, where, args.active))
+
+
+if __name__ == '__main__':
+    main()
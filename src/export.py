@@ -0,0 +1,192 @@
+"""TAB3 주별 랭킹 차트를 (주, 국가)마다 정적 HTML/JSON으로 미리 그려 두는 내보내기 (정적 파일 서버로 기본 화면 제공)
+
+- 페이지 하나 = 주 하나 x 선택 국가 하나의 랭킹 차트 3개 (대시보드 TAB3와 같은 create_gamified_ranking_plot)
+- 주 단위로 프로세스 풀에 나눠 그리고, 페이지마다 입력(리더보드 조각 + 국가 + 차트 코드)의 해시를 index.json에 남겨
+  다음 실행에서 해시가 같은 페이지는 그리지도 쓰지도 않는다 (새 주가 추가되면 그 주와 순위 변화가 바뀐 주만 다시 그림)
+- HTML은 같은 이름의 JSON(Plotly Figure 3개)을 읽어 그리는 얇은 페이지, plotly.js는 내보내기 폴더에 한 번만 두고 공유한다
+
+사용법: python -m src.export [--out-dir ./data/processed] [--export-dir ./data/static] [--workers 0] [--weeks 202052 202053]
+"""
+import os
+import re
+import json
+import time
+import inspect
+import hashlib
+import argparse
+import pandas as pd
+import plotly
+from plotly.offline import get_plotlyjs
+from src import queries
+from src.preprocessor import PROCESSED_DIR, run_tasks
+from src.design import RANKING_CHARTS, create_gamified_ranking_plot, week_label
+from src.profiling import stage
+
+EXPORT_DIR = './data/static'
+INDEX_FILE = 'index.json'
+PLOTLY_JS = f'plotly-{plotly.__version__}.min.js'
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="ko">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<script src="../{plotly_js}"></script>
+<style>
+body {{ font-family: sans-serif; margin: 20px; }}
+.charts {{ display: flex; flex-wrap: wrap; gap: 12px; }}
+.charts > div {{ flex: 1 1 420px; min-width: 0; }}
+</style>
+</head>
+<body>
+<h2>🏅 {title}</h2>
+<p>1회 1Km 이상 러닝한 사람을 대상으로 집계합니다.</p>
+<div class="charts" id="charts"></div>
+<script>
+fetch('{data_file}').then(response => response.json()).then(page => {{
+    for (const [metric, figure] of Object.entries(page.charts)) {{
+        const div = document.createElement('div');
+        document.getElementById('charts').appendChild(div);
+        Plotly.newPlot(div, figure.data, figure.layout, {{responsive: true}});
+    }}
+}});
+</script>
+</body>
+</html>
+"""
+
+def page_name(country):
+    """국가 페이지 파일 이름 (확장자 제외, 파일 이름에 못 쓰는 문자는 _로)"""
+    return re.sub(r'[^0-9A-Za-z_.-]+', '_', country)
+
+
+def page_path(week_key, country):
+    """페이지 상대 경로 (확장자 제외): <week_key>/<국가>"""
+    return f'{week_key}/{page_name(country)}'
+
+
+def chart_version():
+    """차트/페이지 코드 해시 (코드가 바뀌면 모든 페이지를 다시 그린다)"""
+    source = ''.join(inspect.getsource(func) for func in (create_gamified_ranking_plot, render_page))
+    return hashlib.sha256((source + PAGE_TEMPLATE + repr(RANKING_CHARTS)).encode('utf-8')).hexdigest()[:12]
+
+
+def page_hash(boards, country, version):
+    """페이지 입력 해시 (리더보드 조각 3개 + 선택 국가 + 차트 코드 버전)"""
+    digest = hashlib.sha256(f'{version}|{country}'.encode('utf-8'))
+    for board in boards:
+        digest.update(pd.util.hash_pandas_object(board, index=False).to_numpy().tobytes())
+    return digest.hexdigest()[:20]
+
+
+def render_page(week_key, country, boards):
+    """차트 3개를 그려 (HTML, JSON) 문자열로"""
+    figures = {metric: create_gamified_ranking_plot(ranking_df=board, selected_country=country, column_name=metric,
+                                                    title=title, x_label=x_label)
+               for board, (metric, title, x_label) in zip(boards, RANKING_CHARTS)}
+    title = f"{week_label(week_key)} 국가별 랭킹 - {country}"
+    html = PAGE_TEMPLATE.format(title=title, plotly_js=PLOTLY_JS, data_file=page_name(country) + '.json')
+    data = {'week_key': week_key, 'country': country,
+            'charts': {metric: json.loads(fig.to_json()) for metric, fig in figures.items()}}
+    return html, json.dumps(data, ensure_ascii=False)
+
+
+def write_text(path, text):
+    """임시 파일에 쓴 뒤 교체 (정적 서버가 쓰다 만 파일을 보내지 않도록)"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def export_week(out_dir, export_dir, week_key, countries, old_hashes, version):
+    """주 하나의 모든 국가 페이지 (해시가 같고 파일이 있으면 건너뜀, 프로세스 풀 작업 단위) -> ({페이지: 해시}, 그린 수)"""
+    hashes, rendered = {}, 0
+    with stage('export/week', rows=len(countries)):
+        for country in countries:
+            boards = [queries.weekly_leaderboard(week_key, metric, country, out_dir=out_dir)
+                      for metric, _, _ in RANKING_CHARTS]
+            page = page_path(week_key, country)
+            hashes[page] = digest = page_hash(boards, country, version)
+            base = os.path.join(export_dir, page)
+            if old_hashes.get(page) == digest and os.path.exists(base + '.html') and os.path.exists(base + '.json'):
+                continue
+            with stage('export/render'):
+                html, data = render_page(week_key, country, boards)
+            write_text(base + '.html', html)
+            write_text(base + '.json', data)
+            rendered += 1
+    return hashes, rendered
+
+
+def load_index(export_dir):
+    """이전 내보내기 색인 (없으면 빈 색인)"""
+    try:
+        with open(os.path.join(export_dir, INDEX_FILE), encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {'pages': {}}
+
+
+def export_leaderboards(out_dir=PROCESSED_DIR, export_dir=EXPORT_DIR, weeks=None, workers=1):
+    """(주, 국가)별 랭킹 페이지를 내보내고 index.json 기록 (weeks를 주면 그 주만, 나머지 주의 페이지는 그대로 둔다)"""
+    start = time.time()
+    all_weeks = queries.weeks(out_dir=out_dir)
+    countries = queries.countries(out_dir=out_dir)
+    unknown = [week for week in weeks or [] if week not in all_weeks]
+    if unknown:
+        raise ValueError(f"알 수 없는 주: {unknown}")
+    targets = weeks or all_weeks
+
+    old = load_index(export_dir)
+    js_path = os.path.join(export_dir, PLOTLY_JS)
+    if not os.path.exists(js_path):
+        write_text(js_path, get_plotlyjs())
+
+    version = chart_version()
+    pages = dict(old['pages']) if weeks else {}
+    rendered = 0
+    with stage('export', rows=len(targets) * len(countries)):
+        tasks = [(out_dir, export_dir, week, countries,
+                  {page: digest for page, digest in old['pages'].items() if page.startswith(f'{week}/')}, version)
+                 for week in targets]
+        for hashes, count in run_tasks(export_week, tasks, workers):
+            pages.update(hashes)
+            rendered += count
+
+    # 전체 내보내기면 이번 산출물에 없는 주/국가의 페이지는 지운다
+    for page in set(old['pages']) - set(pages):
+        for ext in ('.html', '.json'):
+            path = os.path.join(export_dir, page + ext)
+            if os.path.exists(path):
+                os.remove(path)
+    index = {
+        'build_id': queries.build_id(out_dir),
+        'exported_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'chart_version': version,
+        'latest_week': all_weeks[-1],
+        'weeks': all_weeks,
+        'countries': {country: page_name(country) for country in countries},
+        'pages': dict(sorted(pages.items())),
+    }
+    write_text(os.path.join(export_dir, INDEX_FILE), json.dumps(index, ensure_ascii=False, indent=2))
+    return {'pages': len(pages), 'rendered': rendered, 'skipped': len(targets) * len(countries) - rendered,
+            'seconds': round(time.time() - start, 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='TAB3 주별 랭킹을 (주, 국가)별 정적 HTML/JSON으로 내보내기')
+    parser.add_argument('--out-dir', default=PROCESSED_DIR)
+    parser.add_argument('--export-dir', default=EXPORT_DIR)
+    parser.add_argument('--weeks', nargs='+', type=int, help='이 week_key들만 다시 내보내기 (기본: 전체)')
+    parser.add_argument('--workers', type=int, default=1, help='병렬 프로세스 수 (0이면 CPU 코어 수)')
+    args = parser.parse_args()
+
+    result = export_leaderboards(args.out_dir, args.export_dir, args.weeks, args.workers or os.cpu_count())
+    print(f"내보내기 완료: 페이지 {result['pages']:,}개 (새로 그림 {result['rendered']:,}, 변경 없음 {result['skipped']:,}), "
+          f"{result['seconds']}s -> {args.export_dir}")
+
+
+if __name__ == '__main__':
+    main()
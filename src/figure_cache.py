@@ -0,0 +1,90 @@
+import json
+import threading
+import weakref
+from collections import OrderedDict
+import plotly.graph_objects as go
+from src.profiling import stage
+
+# 직렬화된 Figure JSON 총 크기 상한 (넘으면 가장 오래 안 쓴 것부터 제거)
+FIGURE_CACHE_BYTES = 64 * 1024 * 1024
+
+# 이 프로세스에서 만든 캐시들 (대시보드 밖에서 통계를 볼 때, 예: benchmarks.load)
+_caches = weakref.WeakSet()
+
+class FigureCache:
+    """Plotly Figure를 (탭, 필터, 주, 국가 등) 파라미터 튜플별 JSON으로 저장하는 크기 제한 LRU 캐시 (세션 간 공유)"""
+
+    def __init__(self, max_bytes=FIGURE_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.build_id = None
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+        _caches.add(self)
+
+    def get(self, build_id, key, build):
+        """key의 Figure 반환 (없으면 build()로 만들어 저장, build_id가 바뀌면 전체 무효화)"""
+        with self.lock:
+            if build_id != self.build_id:
+                self.clear(build_id)
+            spec = self.entries.get(key)
+            if spec is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+        if spec is None:
+            # 세션들이 서로 기다리지 않도록 Figure 생성은 잠금 밖에서
+            with stage(f'figure/{key[0]}'):
+                spec = build().to_json()
+            with self.lock:
+                if build_id == self.build_id:
+                    self.put(key, spec)
+        # 저장된 JSON은 이미 검증된 Figure에서 나온 것이라 검증 없이 복원 (세션마다 새 객체라 수정해도 안전)
+        return go.Figure(json.loads(spec), _validate=False)
+
+    def put(self, key, spec):
+        """JSON 저장 후 크기 상한을 넘으면 오래된 항목부터 제거 (lock을 잡은 상태에서 호출)"""
+        if len(spec) > self.max_bytes:
+            return
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.size -= len(old)
+        self.entries[key] = spec
+        self.size += len(spec)
+        while self.size > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= len(evicted)
+            self.evictions += 1
+
+    def clear(self, build_id=None):
+        """전체 비우기 (새 빌드의 build_id로 교체)"""
+        self.build_id = build_id
+        self.entries.clear()
+        self.size = 0
+
+    def stats(self):
+        """적중/실패 횟수와 사용량"""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'entries': len(self.entries),
+                'bytes': self.size,
+                'max_bytes': self.max_bytes,
+            }
+
+
+def process_stats():
+    """이 프로세스의 모든 FigureCache 통계 합계 (st.cache_resource 안의 캐시를 스크립트 밖에서 확인)"""
+    stats = [cache.stats() for cache in list(_caches)]
+    total = {key: sum(item[key] for item in stats) for key in ('hits', 'misses', 'evictions', 'entries', 'bytes')}
+    lookups = total['hits'] + total['misses']
+    total['hit_rate'] = total['hits'] / lookups if lookups else 0.0
+    return total
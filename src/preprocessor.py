@@ -1,85 +1,1195 @@
+import io
+import os
+import json
+import time
+import hashlib
+import uuid
+import shutil
+import argparse
+import functools
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
 import pandas as pd
 import numpy as np
+from src.sketches import (HLL_PRECISION, QUANTILE_ACCURACY, QUANTILE_METRICS, hll_registers, hll_estimate,
+                          count_runners, quantile_buckets, quantiles, sketch_quantiles)
+from src.storage import SCHEMA_FILE, save_table, load_table, save_tables, load_tables
+from src.profiling import stage, stage_iter
 
-def preprocess_data(data):
-    # 데이터 로드
-    df = pd.concat([pd.read_csv('./data/raw/run_ww_2019_d.csv', index_col=0), 
-                    pd.read_csv('./data/raw/run_ww_2020_d.csv', index_col=0)]).reset_index(drop=True)
-    
-    # 전처리
-    df['datetime'] = pd.to_datetime(df['datetime'], errors='coerce') # NA 처리
-    # 파생변수 생성
-    df['year'] = df['datetime'].dt.year
-    df['month'] = df['datetime'].dt.month
-    df['week'] = df['datetime'].dt.isocalendar().week.astype('int')
+RAW_DIR = './data/raw'
+PROCESSED_DIR = './data/processed'
+PARTITIONS_DIR = 'partitions'
+MANIFEST_FILE = 'manifest.json'
+# 빌드마다 산출물을 builds/<build_id>/에 새로 쓰고 manifest만 교체한다 (읽는 중인 이전 빌드 파일은 건드리지 않음)
+# 교체 직전에 이전 manifest를 읽은 프로세스가 계속 로드할 수 있도록 직전 빌드 하나는 남겨 둔다
+BUILDS_DIR = 'builds'
+# 파싱한 원본 스냅샷 (원본 파일 sha256별 디렉터리, 다시 빌드할 때 CSV 파싱 대신 메모리 매핑으로 읽는다)
+RAW_CACHE_DIR = './data/cache/raw'
+SNAPSHOT_FILE = '_snapshot.json'
+# 부분 집계/산출물 구성이 바뀌면 올린다 (manifest의 형식이나 build_params()가 다르면 증분 대신 전체 재빌드)
+BUILD_FORMAT = 8
+
+# 원본 컬럼별 타입 (기본 object/float64 대신 작은 타입으로 읽는다)
+RAW_DTYPES = {
+    'datetime': 'str',
+    'athlete': 'int32',
+    'distance': 'float32',
+    'duration': 'float32',
+    'gender': 'category',
+    'age_group': 'category',
+    'country': 'category',
+}
+CHUNK_SIZE = 1_000_000 # 청크당 행 수 (None이면 작업 구간 전체를 한 번에 처리)
+TASK_BYTES = 64 * 1024 * 1024 # 원본 파일을 나누는 작업 단위 (바이트, 병렬 실행 여부와 무관하게 같은 구간으로 나눈다)
+
+SUM_COLUMNS = ['distance_sum', 'duration_sum', 'speed_per_hour_sum', 'run_count']
+STATS_KEYS = ['year', 'month', 'gender', 'age_group', 'weekday', 'country']
+RANKING_KEYS = ['country', 'week_key']
+HIST_KEYS = ['scale', 'gender', 'age_group', 'xbin', 'ybin']
+
+# 이상치 기준 (이 값 이상이면 제외, src.engine의 SQL 경로도 같은 값을 쓴다)
+MAX_DISTANCE = 150 # 달린 거리 150Km (마라톤 연속 3회)
+MAX_DURATION = 1200 # 달린 시간 1200분 (20시간)
+MAX_SPEED = 50 # 시간당 50Km (우사인 볼트 최고 순간 시속 44km)
+ACTIVE_DISTANCE = 1 # active user = 1회에 1km 넘게 러닝한 사람
+
+# 부분 집계 테이블별 그룹 키 (고유 러너는 그룹별 HLL 레지스터라 행 수가 그룹 수 x 1024를 넘지 않는다)
+PARTIAL_KEYS = {
+    'stats': STATS_KEYS,
+    'stats_hll': STATS_KEYS + ['register'],
+    'ranking': RANKING_KEYS,
+    'ranking_hll': RANKING_KEYS + ['register'],
+    'hist': HIST_KEYS,
+    'month_quantiles': ['year', 'month', 'gender', 'age_group', 'metric', 'bucket'],
+    'ranking_quantiles': RANKING_KEYS + ['metric', 'bucket'],
+    'country_quantiles': ['gender', 'age_group', 'country', 'metric', 'bucket'],
+}
+# 월(통계)/주(랭킹) 행으로 나뉘는 부분 집계 (증분 빌드는 영향받은 월/주의 행만 다시 합친다)
+MONTHLY_PARTIALS = ['stats', 'stats_hll', 'month_quantiles']
+WEEKLY_PARTIALS = ['ranking', 'ranking_hll', 'ranking_quantiles']
+# max로 합치는 부분 집계 (HLL 레지스터), 나머지는 합계/건수라 더한다
+MAX_PARTIALS = ['stats_hll', 'ranking_hll']
+# 월/주 행이 없이 전체 기간을 더하는 부분 집계 (증분 빌드는 이전 합계에서 바뀐 원본의 몫만 빼고 더한다)
+TOTAL_PARTIALS = ['hist', 'country_quantiles']
+
+# TAB2 필터 큐브 (성별 x 연령대, '전체' 포함)
+FILTER_ALL = '전체'
+FILTER_CUBE_TABLES = ['summary', 'monthly', 'weekday', 'country']
+# 필터 조합 x 월 단위 큐브 테이블의 키 (증분 빌드는 영향받은 월의 행과 스케치만 다시 계산해 교체)
+FILTER_CUBE_KEYS = ['gender', 'age_group', 'year', 'month']
+FILTER_CUBE_MONTHLY_TABLES = ['filter_cube_monthly', 'filter_cube_monthly_hll', 'filter_cube_monthly_quantiles',
+                              'filter_cube_monthly_weekday']
+
+# TAB3 주별 리더보드 지표 (표시 순서)
+LEADERBOARD_METRICS = ['total_runners', 'distance', 'duration']
+
+# 기간별 랭킹용 국가별 주 누적합 컬럼
+PREFIX_SUM_COLUMNS = ['run_count', 'distance_sum', 'duration_sum']
+
+# 거리x시간 분포 격자 (청크별 히스토그램을 합칠 수 있도록 범위를 고정)
+# linear는 이상치 기준 범위, log는 긴 꼬리(울트라 러닝, 20시간)까지 고르게 보도록 로그 간격 (하한 미만은 첫 칸)
+HIST_RANGES = {
+    'linear': {'distance': (0, MAX_DISTANCE), 'duration': (0, MAX_DURATION)},
+    'log': {'distance': (0.1, MAX_DISTANCE), 'duration': (1, MAX_DURATION)},
+}
+# 해상도 피라미드: 가장 촘촘한 격자로 한 번만 세고 나머지는 칸을 묶어서 만든다
+HIST_LEVELS = [50, 100, 200, 400]
+
+def preprocess_data(raw_dir=RAW_DIR, out_dir=PROCESSED_DIR, chunksize=CHUNK_SIZE, full=False, workers=1,
+                    cache_dir=RAW_CACHE_DIR):
+    """새로 들어왔거나 바뀐 원본 파일만 집계해 영향받은 파티션(ISO 주)과 산출물 행만 갱신하고 manifest를 기록
+    (workers > 1이면 원본 구간 집계와 파티션 합치기를 프로세스 풀에서 실행, 결과는 순차 실행과 동일)
+    cache_dir이 있으면 원본마다 파싱한 스냅샷을 남기고, 같은 내용의 원본을 다시 집계할 때는 스냅샷을 읽는다 (None이면 사용 안 함)"""
+    start = time.time()
+    # previous = 지금 대시보드가 읽고 있는 빌드 (전체 재빌드여도 교체가 끝날 때까지 지우지 않는다)
+    previous = load_manifest(out_dir)
+    manifest = previous
+    if full or previous is None or previous.get('format') != BUILD_FORMAT or previous.get('params') != build_params():
+        manifest = None
+    partitions_dir = os.path.join(out_dir, PARTITIONS_DIR)
+    if manifest is None:
+        shutil.rmtree(partitions_dir, ignore_errors=True)
+
+    old_sources = manifest['sources'] if manifest else {}
+    with stage('scan_sources'):
+        sources, changed = scan_sources(raw_dir, old_sources)
+    removed = [name for name in old_sources if name not in sources]
+
+    # 바뀌었거나 삭제된 파일의 기존 부분 집계 제거 (전체 기간 합계에서 뺄 몫은 지우기 전에 읽어 둔다)
+    touched, removed_totals = set(), []
+    for name in changed + removed:
+        for part in old_sources.get(name, {}).get('partitions', []):
+            source_dir = source_partial_dir(partitions_dir, part, name)
+            if os.path.exists(source_dir):
+                removed_totals.append(load_tables(source_dir, TOTAL_PARTIALS, mmap=False))
+            shutil.rmtree(source_dir, ignore_errors=True)
+            touched.add(part)
+
+    # 바뀐 파일만 바이트 구간으로 나눠 청크 단위로 집계하고, 구간 결과는 돌아오는 즉시 파티션별 조각으로 디스크에 쓴다
+    # 메모리는 원본 전체가 아니라 구간 하나(TASK_BYTES)와 파티션(ISO 주) 하나의 부분 집계 크기에 비례한다
+    # 원본 파일 x 파티션별 조각은 구간 순서대로 한 번에 합치므로 workers 수와 상관없이 같은 값이 나온다
+    # 스냅샷이 있는 파일은 CSV 대신 스냅샷의 같은 구간을 읽고, 없는 파일은 CSV를 읽으면서 스냅샷을 쓴다
+    tasks, snapshots, writing = [], {}, set()
+    for name in changed:
+        file_tasks, snapshots[name] = ingest_tasks(raw_dir, name, sources[name]['sha256'], chunksize, cache_dir,
+                                                   writing)
+        tasks += file_tasks
+    clear_range_partials(partitions_dir)
+    rows, parts = {name: 0 for name in changed}, {name: set() for name in changed}
+    with stage('ingest') as s:
+        for i, ((name, *_), (range_rows, partial)) in enumerate(zip(tasks, run_tasks(ingest_range, tasks, workers))):
+            rows[name] += range_rows
+            parts[name] |= spill_range_partial(partitions_dir, name, i, partial)
+        s.rows = sum(rows.values())
+    merges = [(partitions_dir, part, name) for name in changed for part in sorted(parts[name])]
+    with stage('merge_ranges', rows=len(merges)):
+        list(run_tasks(merge_range_partials, merges, workers))
+    for name in changed:
+        sources[name]['rows'] = rows[name]
+        sources[name]['partitions'] = sorted(parts[name])
+        touched |= parts[name]
+    if cache_dir:
+        with stage('save_snapshots'):
+            for name, snapshot in snapshots.items():
+                if snapshot:
+                    finish_snapshot(snapshot, os.path.join(raw_dir, name), sources[name]['sha256'], rows[name])
+            prune_snapshots(cache_dir, {os.path.abspath(os.path.join(raw_dir, name)): source['sha256']
+                                        for name, source in sources.items()})
+
+    if manifest is not None and not touched:
+        # 바뀐 원본이 없으면 기존 산출물 그대로
+        return {name: load_artifact(name, manifest, out_dir) for name in manifest['artifacts']}
+
+    # 영향받은 파티션만 다시 합치고, 그 파티션에 걸친 월/주의 행만 다시 계산
+    with stage('refresh_partitions', rows=len(touched)):
+        months, week_keys = partition_keys(partitions_dir, touched)
+        list(run_tasks(refresh_partition, [(partitions_dir, part) for part in sorted(touched)], workers))
+        new_months, new_week_keys = partition_keys(partitions_dir, touched)
+    with stage('build_artifacts'):
+        added_totals = [load_tables(source_partial_dir(partitions_dir, part, name), TOTAL_PARTIALS)
+                        for name in changed for part in sources[name]['partitions']]
+        artifacts = build_artifacts(out_dir, manifest, months | new_months, week_keys | new_week_keys,
+                                    added_totals, removed_totals)
+        # 월 단위 분위수 구간은 필터 큐브의 조합 x 월 스케치로만 저장한다
+        month_quantiles = artifacts.pop('month_quantiles')
+        # 저장될 값(float32 평균)으로 순위를 매겨야 전체 빌드와 증분 빌드의 결과가 같다
+        artifacts = {name: compact_floats(artifact) for name, artifact in artifacts.items()}
+    # TAB2 필터 조합별 지표는 영향받은 월의 행과 스케치만 다시 계산하고, 요약/요일별/국가별은 월 단위 큐브에서 합친다
+    with stage('filter_cube'):
+        old_cube = None if manifest is None else {
+            name: load_artifact(name, manifest, out_dir) for name in FILTER_CUBE_MONTHLY_TABLES}
+        artifacts.update(build_filter_cube(artifacts['running_Y_M_stats'], artifacts['running_Y_M_hll'], month_quantiles,
+                                           artifacts['filter_cube_country_quantiles'],
+                                           months | new_months if old_cube else None, old_cube))
+    with stage('leaderboard'):
+        artifacts['weekly_leaderboard'] = build_leaderboard(artifacts['running_W_ranking'])
+        artifacts['weekly_prefix_sums'] = build_prefix_sums(artifacts['running_W_ranking'])
+
+    # 새 빌드 디렉터리에 컬럼 단위 .npy로 저장 (manifest는 모든 산출물이 저장된 뒤 마지막에 교체)
+    build_id = uuid.uuid4().hex[:12]
+    with stage('save_artifacts', rows=sum(len(artifact) for artifact in artifacts.values())):
+        for name, artifact in artifacts.items():
+            save_table(compact_floats(artifact), os.path.join(out_dir, BUILDS_DIR, build_id, name))
+
+    current = write_manifest(out_dir, build_id, sources, artifacts,
+                             filtered_rows=int(artifacts['running_Y_M_stats']['run_count'].sum()),
+                             build_seconds=time.time() - start, chunksize=chunksize)
+    prune_builds(out_dir, [current, previous])
+    return artifacts
+
+
+def list_raw_files(raw_dir=RAW_DIR):
+    """원본 폴더의 CSV 파일 목록 (연도별 파일 + 매일 추가되는 파일)"""
+    return sorted(name for name in os.listdir(raw_dir) if name.endswith('.csv'))
+
+
+def scan_sources(raw_dir, old_sources):
+    """원본 파일 목록과 새로 들어왔거나 내용이 바뀐 파일 찾기 (크기/수정 시각이 같으면 해시 계산 생략)"""
+    sources, changed = {}, []
+    for name in list_raw_files(raw_dir):
+        path = os.path.join(raw_dir, name)
+        stat = os.stat(path)
+        old = old_sources.get(name)
+        if old and (old['size'], old['mtime']) == (stat.st_size, stat.st_mtime):
+            sources[name] = old
+            continue
+        sha256 = file_hash(path)
+        sources[name] = {**(old or {}), 'sha256': sha256, 'size': stat.st_size, 'mtime': stat.st_mtime}
+        if not old or old['sha256'] != sha256:
+            changed.append(name)
+    return sources, changed
+
+
+def run_tasks(func, tasks, workers=1):
+    """tasks를 순서대로 실행하거나(workers <= 1) 프로세스 풀에서 실행 (결과는 항상 tasks 순서)"""
+    if workers <= 1:
+        yield from (func(*task) for task in tasks)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(func, *zip(*tasks)) if tasks else ()
 
-    df['weekday'] = df['datetime'].dt.day_name()
+
+def byte_ranges(path, task_bytes=TASK_BYTES):
+    """헤더를 뺀 본문을 약 task_bytes 크기의 줄 단위 바이트 구간으로 나누기"""
+    size = os.path.getsize(path)
+    ranges = []
+    with open(path, 'rb') as f:
+        f.readline()
+        start = f.tell()
+        while start < size:
+            f.seek(min(start + task_bytes, size))
+            f.readline() # 구간 끝을 줄 끝에 맞춘다
+            end = min(f.tell(), size)
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def ingest_range(name, path, start, end, chunksize=CHUNK_SIZE, snapshot=None):
+    """원본 파일의 바이트 구간 하나를 청크 단위로 읽어 부분 집계로 (프로세스 풀 작업 단위)
+    청크별 부분 집계는 모아 두었다가 구간 끝에서 한 번에 합친다 (청크마다 누적 결과 전체를 다시 묶지 않도록)
+    start가 None이면 path는 스냅샷 구간, snapshot을 주면 파싱한 구간을 그 경로에 스냅샷으로 저장"""
+    rows, partials, parsed = 0, [], []
+    with stage('ingest_range') as s:
+        if start is None:
+            chunks = stage_iter('load_snapshot', snapshot_chunks(path, chunksize))
+        else:
+            chunks = stage_iter('read_csv', read_raw_chunks(path, chunksize, start, end))
+        for chunk in chunks:
+            rows += len(chunk)
+            chunk = parse_raw(chunk)
+            if snapshot:
+                parsed.append(chunk[list(RAW_DTYPES)])
+            partials.append(aggregate_chunk(prepare_chunk(chunk)))
+        s.rows = rows
+    total = None
+    if partials:
+        with stage('merge_partials', rows=len(partials)):
+            total = partials[0] if len(partials) == 1 else merge_partials(partials)
+    if parsed:
+        with stage('write_snapshot', rows=rows):
+            save_table(concat_frames(parsed), snapshot)
+    return rows, total
+
+
+def ingest_tasks(raw_dir, name, sha256, chunksize=CHUNK_SIZE, cache_dir=RAW_CACHE_DIR, writing=None):
+    """원본 파일 하나의 구간별 집계 작업과 새로 쓸 스냅샷 경로 (스냅샷이 있으면 스냅샷 구간을 읽고 새로 쓰지 않는다)
+    writing = 이번 빌드에서 스냅샷을 쓰고 있는 sha256 집합 (내용이 같은 원본이 여럿이면 첫 파일만 스냅샷을 쓴다)"""
+    path = os.path.join(raw_dir, name)
+    ranges = snapshot_ranges(cache_dir, sha256) if cache_dir else None
+    if ranges is not None:
+        return [(name, range_path, None, None, chunksize, None) for range_path in ranges], None
+    writing = set() if writing is None else writing
+    snapshot = os.path.join(cache_dir, sha256 + '.tmp') if cache_dir and sha256 not in writing else None
+    if snapshot:
+        writing.add(sha256)
+        shutil.rmtree(snapshot, ignore_errors=True)
+    return [(name, path, start, end, chunksize, snapshot and os.path.join(snapshot, f'{i:05d}'))
+            for i, (start, end) in enumerate(byte_ranges(path))], snapshot
+
+
+def snapshot_info(path):
+    """스냅샷 정보 (다 쓴 스냅샷이 아니거나 원본 타입/구간 크기가 바뀌었으면 None)"""
+    try:
+        with open(os.path.join(path, SNAPSHOT_FILE), encoding='utf-8') as f:
+            info = json.load(f)
+    except FileNotFoundError:
+        return None
+    if info.get('dtypes') != RAW_DTYPES or info.get('task_bytes') != TASK_BYTES:
+        return None
+    return info
+
+
+def snapshot_ranges(cache_dir, sha256):
+    """원본 sha256의 스냅샷 구간 경로 목록 (바이트 구간 순서, 쓸 수 있는 스냅샷이 없으면 None)"""
+    path = os.path.join(cache_dir, sha256)
+    info = snapshot_info(path)
+    return None if info is None else [os.path.join(path, name) for name in info['ranges']]
+
+
+def snapshot_chunks(path, chunksize=CHUNK_SIZE):
+    """스냅샷 구간을 chunksize 행씩 (CSV를 읽을 때와 같은 청크 경계, 메모리 매핑이라 파싱/복사 없음)"""
+    df = load_table(path)
+    step = chunksize or max(len(df), 1)
+    return (df.iloc[start:start + step] for start in range(0, len(df), step))
+
+
+def finish_snapshot(snapshot, path, sha256, rows):
+    """구간별로 쓴 스냅샷에 정보 파일을 남기고 sha256 디렉터리로 교체 (정보 파일이 있어야 다 쓴 스냅샷)"""
+    final = snapshot.removesuffix('.tmp')
+    # 구간이 없어(헤더만 있는 CSV) 쓴 것이 없거나, 이미 다 쓴 스냅샷이 있으면 그대로 둔다
+    if not os.path.isdir(snapshot) or snapshot_info(final) is not None:
+        shutil.rmtree(snapshot, ignore_errors=True)
+        return
+    info = {
+        'source': os.path.abspath(path),
+        'sha256': sha256,
+        'rows': rows,
+        'dtypes': RAW_DTYPES,
+        'task_bytes': TASK_BYTES,
+        'ranges': sorted(name for name in os.listdir(snapshot) if not name.endswith('.tmp')),
+    }
+    with open(os.path.join(snapshot, SNAPSHOT_FILE), 'w', encoding='utf-8') as f:
+        json.dump(info, f, ensure_ascii=False, indent=2)
+    shutil.rmtree(final, ignore_errors=True)
+    os.replace(snapshot, final)
+
+
+def prune_snapshots(cache_dir, sources):
+    """원본이 바뀌었거나 사라진 스냅샷과 쓰다 만 스냅샷 지우기 (sources = {원본 절대 경로: sha256})
+    다른 원본 폴더의 스냅샷은 원본 파일이 남아 있는 한 그대로 둔다"""
+    if not os.path.exists(cache_dir):
+        return
+    for name in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, name)
+        if name.endswith('.tmp'):
+            shutil.rmtree(path, ignore_errors=True)
+            continue
+        info = snapshot_info(path)
+        if info is None or not os.path.exists(info['source']) or sources.get(info['source'], name) != name:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def read_raw_chunks(path, chunksize=CHUNK_SIZE, start=None, end=None):
+    """원본 CSV를 지정한 타입으로 chunksize 행씩 읽기 (start/end를 주면 그 바이트 구간만)"""
+    source = path
+    if start is not None:
+        with open(path, 'rb') as f:
+            header = f.readline()
+            f.seek(start)
+            source = io.BytesIO(header + f.read(end - start))
+    reader = pd.read_csv(source, usecols=list(RAW_DTYPES), dtype=RAW_DTYPES, chunksize=chunksize)
+    return [reader] if chunksize is None else reader
+
+
+def parse_raw(df):
+    """문자열 날짜를 datetime으로 (스냅샷에서 읽은 청크는 이미 파싱되어 있어 그대로)"""
+    if not pd.api.types.is_datetime64_dtype(df['datetime']):
+        with stage('to_datetime', rows=len(df)):
+            df['datetime'] = pd.to_datetime(df['datetime'], errors='coerce') # NA 처리
+    return df
+
+
+def prepare_chunk(df):
+    """파생변수 생성 + 이상치 제거"""
+    # 전처리
+    df = parse_raw(df)
     df['speed_per_hour'] = df['distance'] / df['duration'] * 60 # 시간당 속도
 
     # 이상치 처리
-    df = df[~((df['distance'] >= 150) # 달린 거리가 150Km를 넘거나 (마라톤 연속 3회)
-            | (df['duration'] >= 1200) # 달린 시간이 1200분을 넘거나 (20시간)
-            | (df['speed_per_hour'] >= 50))] # 속도가 시간당 50Km를 넘거나 (우사인 볼트 최고 순간 시속 44km)
+    df = df[~((df['distance'] >= MAX_DISTANCE) # 달린 거리가 150Km를 넘거나 (마라톤 연속 3회)
+            | (df['duration'] >= MAX_DURATION) # 달린 시간이 1200분을 넘거나 (20시간)
+            | (df['speed_per_hour'] >= MAX_SPEED))] # 속도가 시간당 50Km를 넘거나 (우사인 볼트 최고 순간 시속 44km)
             # 그러면 제외한다
 
-    # 운동했을 때 분포를 보기 위해 거리와 시간이 0인 경우 제외
-    df = df[(df['distance'] > 0) & (df['duration'] > 0)]
+    # 운동했을 때 분포를 보기 위해 거리와 시간이 0인 경우 제외 (날짜가 없으면 파티션을 정할 수 없어 제외)
+    df = df[(df['distance'] > 0) & (df['duration'] > 0) & df['datetime'].notna()].copy()
+
+    # 파생변수 생성 (행마다 datetime 접근자를 부르지 않고 날짜 서수로 달력 차원을 조회)
+    with stage('calendar', rows=len(df)):
+        days = df['datetime'].to_numpy().astype('datetime64[D]').astype('int64')
+        first = int(days.min()) if len(days) else 0
+        calendar = calendar_days(first, int(days.max()) if len(days) else 0).take(days - first)
+        for col in CALENDAR_COLUMNS:
+            df[col] = calendar[col].values
+        df['partition'] = df['week_key'] # ISO 연도-주 파티션
+    return df
+
+
+# 달력 차원 컬럼: week_key = ISO 연도 * 100 + ISO 주, month_key = 연 * 100 + 월 (정수라 그대로 정렬된다)
+CALENDAR_COLUMNS = ['year', 'month', 'week', 'weekday', 'week_key', 'month_key']
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+@functools.lru_cache(maxsize=16)
+def calendar_days(first, last):
+    """날짜 서수(1970-01-01부터 일 수) [first, last] 구간의 날짜별 달력 차원 (청크마다 날짜 범위만큼 한 번 계산)"""
+    days = pd.date_range(pd.Timestamp(first, unit='D'), pd.Timestamp(last, unit='D'), freq='D')
+    iso = days.isocalendar()
+    return pd.DataFrame({
+        'year': days.year.astype('int16'),
+        'month': days.month.astype('int8'),
+        'week': iso['week'].to_numpy().astype('int8'),
+        'weekday': pd.Categorical.from_codes(days.dayofweek, WEEKDAYS),
+        'week_key': (iso['year'] * 100 + iso['week']).to_numpy().astype('int32'),
+        'month_key': (days.year * 100 + days.month).astype('int32'),
+    })
+
+
+def aggregate_chunk(df):
+    """청크 하나를 파티션별로 합칠 수 있는 부분 집계로 변환 (평균 대신 합계/건수, 고유 러너는 그룹별 HLL 레지스터)"""
+    # 합계는 청크를 계속 더해가므로 float64로 누적
+    df = df.astype({'distance': 'float64', 'duration': 'float64', 'speed_per_hour': 'float64'})
+    with stage('groupby_stats', rows=len(df)):
+        stats = df.groupby(['partition'] + STATS_KEYS, observed=True).agg(
+            distance_sum=('distance', 'sum'),
+            duration_sum=('duration', 'sum'),
+            speed_per_hour_sum=('speed_per_hour', 'sum'),
+            run_count=('distance', 'size'),
+        ).reset_index()
+    with stage('hll_sketch', rows=len(df)):
+        stats_hll = hll_registers(df, ['partition'] + STATS_KEYS)
+
+    ## active user = 1회에 1km 이상 러닝한 사람
+    with stage('groupby_ranking', rows=len(df)):
+        active = df[df['distance'] > ACTIVE_DISTANCE]
+        ranking = active.groupby(['partition'] + RANKING_KEYS, observed=True).agg(
+            distance_sum=('distance', 'sum'),
+            duration_sum=('duration', 'sum'),
+            run_count=('distance', 'size'),
+        ).reset_index()
+        ranking_hll = hll_registers(active, ['partition'] + RANKING_KEYS)
+
+    # 거리x시간 분포 (구간 종류/성별/연령대별 가장 촘촘한 격자 칸 번호별 건수)
+    with stage('histogram', rows=len(df)):
+        hist = pd.concat([
+            df[['partition', 'gender', 'age_group']].assign(
+                scale=scale,
+                xbin=hist_bins(df['distance'], hist_edges(scale, 'distance')),
+                ybin=hist_bins(df['duration'], hist_edges(scale, 'duration')),
+            )
+            for scale in HIST_RANGES
+        ]).astype({'scale': 'category'})
+        hist = hist.groupby(['partition'] + HIST_KEYS, observed=True).size().rename('count').reset_index()
+
+    # 중앙값/p90용 지표별 로그 구간 건수 (조회하는 단위로만: TAB2 성별/연령대 x 월, TAB3 국가 x 주)
+    # 통계 그룹(요일, 국가까지) 단위로 세면 구간 행이 실행 기록 수만큼 늘어난다
+    with stage('quantile_sketch', rows=len(df)):
+        month_quantiles = quantile_partial(df, ['partition', 'year', 'month', 'gender', 'age_group'])
+        ranking_quantiles = quantile_partial(active, ['partition'] + RANKING_KEYS)
+        # TAB2 국가별 속도 중앙값/p90은 전체 기간을 합치므로 월 없이 성별/연령대/국가별로 따로 센다
+        country_quantiles = quantile_partial(df, ['partition', 'gender', 'age_group', 'country'], ['speed_per_hour'])
+    return {
+        'stats': stats,
+        'stats_hll': stats_hll,
+        'ranking': ranking,
+        'ranking_hll': ranking_hll,
+        'hist': hist,
+        'month_quantiles': month_quantiles,
+        'ranking_quantiles': ranking_quantiles,
+        'country_quantiles': country_quantiles,
+    }
+
+
+def quantile_partial(df, keys, metrics=QUANTILE_METRICS):
+    """그룹 x 지표 x 로그 구간별 건수 (구간 건수는 더하기만 하면 되므로 청크/파티션끼리 합칠 수 있다)"""
+    buckets = pd.concat([
+        df[keys].assign(metric=metric, bucket=quantile_buckets(df[metric]))
+        for metric in metrics
+    ]).astype({'metric': 'category'})
+    return buckets.groupby(keys + ['metric', 'bucket'], observed=True).size().rename('count').reset_index()
+
+
+def hist_edges(scale, col, bins=max(HIST_LEVELS)):
+    """구간 종류(linear/log)별 격자 경계"""
+    low, high = HIST_RANGES[scale][col]
+    return np.linspace(low, high, bins + 1) if scale == 'linear' else np.geomspace(low, high, bins + 1)
+
+
+def hist_bins(values, edges):
+    """값이 속한 격자 칸 번호 (범위 밖 값은 양 끝 칸)"""
+    bins = np.searchsorted(edges, values.to_numpy(), side='right') - 1
+    return np.clip(bins, 0, len(edges) - 2).astype('int16')
+
+
+def merge_partials(partials, names=None):
+    """부분 집계 합치기 (합계/건수는 더하고 HLL 레지스터는 max, names를 주면 그 테이블만)"""
+    merged = {}
+    for name in names or PARTIAL_KEYS:
+        keys = PARTIAL_KEYS[name]
+        frame = concat_frames([p[name] for p in partials])
+        keys = (['partition'] if 'partition' in frame.columns else []) + keys
+        grouped = frame.groupby(keys, observed=True, sort=False)
+        merged[name] = (grouped.max() if name in MAX_PARTIALS else grouped.sum()).reset_index()
+    return merged
+
+
+def split_partitions(partial):
+    """partition 컬럼 기준으로 부분 집계를 파티션별로 나누기"""
+    if partial is None:
+        return {}
+    parts = sorted(set(partial['stats']['partition']))
+    split = {part: {} for part in parts}
+    for name, frame in partial.items():
+        groups = dict(list(frame.groupby('partition')))
+        for part in parts:
+            sub = groups.get(part, frame.iloc[:0])
+            split[part][name] = sub.drop(columns='partition').reset_index(drop=True)
+    return split
+
+
+def partition_name(part):
+    """파티션 번호(ISO 연도*100 + 주)를 디렉터리 이름으로"""
+    return f'{part // 100}-W{part % 100:02d}'
+
+
+def source_partial_dir(partitions_dir, part, source):
+    return os.path.join(partitions_dir, partition_name(part), 'sources', source)
+
+
+def range_partials_dir(partitions_dir, part, source):
+    return os.path.join(partitions_dir, partition_name(part), 'ranges', source)
+
+
+def spill_range_partial(partitions_dir, name, i, partial):
+    """원본 구간 i의 부분 집계를 파티션별 조각으로 저장 -> 조각을 쓴 파티션 집합"""
+    parts = split_partitions(partial)
+    with stage('save_ranges', rows=len(parts)):
+        for part, part_partial in parts.items():
+            save_tables(part_partial, os.path.join(range_partials_dir(partitions_dir, part, name), f'{i:05d}'))
+    return set(parts)
+
+
+def merge_range_partials(partitions_dir, part, name):
+    """원본 파일 하나의 파티션 조각들을 구간 순서대로 합쳐 그 파일의 파티션 부분 집계로 저장 (프로세스 풀 작업 단위)
+    조각이 하나뿐이면(구간 경계에 걸치지 않은 주) 이미 구간 안에서 합친 값이므로 디렉터리만 옮긴다"""
+    ranges_dir = range_partials_dir(partitions_dir, part, name)
+    pieces = [os.path.join(ranges_dir, piece) for piece in sorted(os.listdir(ranges_dir))]
+    target = source_partial_dir(partitions_dir, part, name)
+    shutil.rmtree(target, ignore_errors=True)
+    if len(pieces) == 1:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(pieces[0], target)
+    else:
+        with stage('merge_partials', rows=len(pieces)):
+            save_tables(merge_partials([load_tables(piece) for piece in pieces]), target)
+    shutil.rmtree(ranges_dir)
+
+
+def clear_range_partials(partitions_dir):
+    """중간에 멈춘 빌드가 남긴 구간 조각 지우기 (이번 빌드의 조각과 섞이지 않도록)"""
+    if os.path.exists(partitions_dir):
+        for name in os.listdir(partitions_dir):
+            shutil.rmtree(os.path.join(partitions_dir, name, 'ranges'), ignore_errors=True)
+
+
+def partition_sources(part_dir):
+    """파티션에 부분 집계가 있는 원본 파일 이름 목록"""
+    sources_dir = os.path.join(part_dir, 'sources')
+    return sorted(os.listdir(sources_dir)) if os.path.exists(sources_dir) else []
+
+
+def refresh_partition(partitions_dir, part):
+    """파티션에 속한 원본 파일별 부분 집계를 합쳐 파티션 집계로 저장 (남은 원본이 없으면 파티션 삭제)
+    원본이 하나뿐이면 합계를 따로 쓰지 않고 그 원본의 부분 집계를 그대로 쓴다 (대부분의 주는 연도별 파일 하나에만 걸친다)"""
+    part_dir = os.path.join(partitions_dir, partition_name(part))
+    names = partition_sources(part_dir)
+    if not names:
+        shutil.rmtree(part_dir, ignore_errors=True)
+        return
+    merged_dir = os.path.join(part_dir, 'merged')
+    if len(names) == 1:
+        shutil.rmtree(merged_dir, ignore_errors=True)
+        return
+    merged = merge_partials([load_tables(os.path.join(part_dir, 'sources', name)) for name in names])
+    save_tables(merged, merged_dir)
+
+
+def partition_tables_dir(part_dir):
+    """파티션 집계 디렉터리 (원본이 여럿이면 merged, 하나면 그 원본의 부분 집계, 없으면 None)"""
+    merged_dir = os.path.join(part_dir, 'merged')
+    if os.path.exists(merged_dir):
+        return merged_dir
+    names = partition_sources(part_dir)
+    return os.path.join(part_dir, 'sources', names[0]) if len(names) == 1 else None
+
+
+def list_partitions(partitions_dir):
+    """집계가 저장된 파티션 디렉터리 목록"""
+    if not os.path.exists(partitions_dir):
+        return []
+    return sorted(name for name in os.listdir(partitions_dir)
+                  if partition_tables_dir(os.path.join(partitions_dir, name)) is not None)
+
+
+def partition_keys(partitions_dir, parts):
+    """파티션 집계에 들어 있는 month_key와 week_key"""
+    months, week_keys = set(), set()
+    for part in parts:
+        tables_dir = partition_tables_dir(os.path.join(partitions_dir, partition_name(part)))
+        if tables_dir is None:
+            continue
+        tables = load_tables(tables_dir, ['stats', 'ranking'])
+        months |= set(month_key(tables['stats']))
+        week_keys |= set(tables['ranking']['week_key'].tolist())
+    return months, week_keys
+
+
+def month_key(df):
+    return (df['year'].astype('int32') * 100 + df['month'].astype('int32')).to_numpy()
 
+
+def covering_partitions(months, week_keys):
+    """month_key와 week_key에 해당하는 날짜가 걸친 ISO 주 파티션 이름 (week_key는 파티션 번호와 같다)"""
+    days = [pd.date_range(pd.Timestamp(key // 100, key % 100, 1), periods=pd.Timestamp(key // 100, key % 100, 1).days_in_month)
+            for key in months]
+    parts = set(week_keys)
+    if days:
+        iso = days[0].append(days[1:]).isocalendar()
+        parts |= set(iso['year'] * 100 + iso['week'])
+    return {partition_name(part) for part in parts}
+
+
+def build_artifacts(out_dir, manifest, months, week_keys, added_totals=(), removed_totals=()):
+    """파티션 집계로 산출물 만들기 (기존 산출물이 있으면 다시 계산한 월/주의 행만 교체)
+    증분 빌드는 그 월/주에 걸친 파티션의 통계/랭킹만 읽고, 전체 기간 합계(히스토그램)는 이전 빌드의 합계에
+    added_totals(새로 집계한 원본의 몫)를 더하고 removed_totals(바뀌었거나 삭제된 원본의 이전 몫)를 빼서 만든다"""
+    partitions_dir = os.path.join(out_dir, PARTITIONS_DIR)
+    parts = list_partitions(partitions_dir)
+    if not parts:
+        raise FileNotFoundError(f'{partitions_dir}에 집계할 원본 데이터가 없습니다.')
+    if manifest is None:
+        return finalize_partial(merge_partials([
+            load_tables(partition_tables_dir(os.path.join(partitions_dir, part))) for part in parts]))
+
+    covering = sorted(covering_partitions(months, week_keys) & set(parts))
+    month_keys, week_keys = list(months), list(week_keys)
+    partials = []
+    for part in covering:
+        partial = load_tables(partition_tables_dir(os.path.join(partitions_dir, part)),
+                              MONTHLY_PARTIALS + WEEKLY_PARTIALS)
+        for name in MONTHLY_PARTIALS:
+            partial[name] = partial[name][np.isin(month_key(partial[name]), month_keys)]
+        for name in WEEKLY_PARTIALS:
+            partial[name] = partial[name][np.isin(partial[name]['week_key'], week_keys)]
+        partials.append(partial)
+    old = {name: load_artifact(name, manifest, out_dir) for name in manifest['artifacts']}
+    finest = old['distance_duration_pyramid']
+    finest = finest[finest['bins'] == max(HIST_LEVELS)][HIST_KEYS + ['count']]
+    totals = update_totals({'hist': finest, 'country_quantiles': old['filter_cube_country_quantiles']},
+                           added_totals, removed_totals)
+    new = finalize_partial({**merge_partials(partials, MONTHLY_PARTIALS + WEEKLY_PARTIALS), **totals})
+
+    running_Y_M_stats, (running_Y_M_hll,) = splice_artifact(
+        old['running_Y_M_stats'], new['running_Y_M_stats'], [old['running_Y_M_hll']], [new['running_Y_M_hll']],
+        replaced=np.isin(month_key(old['running_Y_M_stats']), month_keys), order=order_stats)
+    running_W_ranking, (running_W_hll, running_W_quantiles) = splice_artifact(
+        old['running_W_ranking'], new['running_W_ranking'],
+        [old['running_W_hll'], old['running_W_quantiles']], [new['running_W_hll'], new['running_W_quantiles']],
+        replaced=np.isin(old['running_W_ranking']['week_key'], week_keys), order=order_ranking)
+    return {
+        'running_Y_M_stats': running_Y_M_stats,
+        'running_Y_M_hll': running_Y_M_hll,
+        'distance_duration_pyramid': new['distance_duration_pyramid'],
+        'running_W_ranking': running_W_ranking,
+        'running_W_hll': running_W_hll,
+        'running_W_quantiles': running_W_quantiles,
+        'filter_cube_country_quantiles': new['filter_cube_country_quantiles'],
+        'month_quantiles': new['month_quantiles'],
+    }
+
+
+def update_totals(totals, added, removed):
+    """전체 기간 합계 + 새로 집계한 원본의 몫 - 이전 몫 (건수가 0이 된 행은 뺀다, 건수는 정수라 전체 빌드와 같다)"""
+    updated = {}
+    for name, total in totals.items():
+        frame = concat_frames([total] + [partial[name] for partial in added]
+                              + [partial[name].assign(count=-partial[name]['count']) for partial in removed])
+        frame = frame.groupby(PARTIAL_KEYS[name], observed=True)['count'].sum().reset_index()
+        updated[name] = frame[frame['count'] != 0].reset_index(drop=True)
+    return updated
+
+
+def splice_artifact(old, new, old_sketches, new_sketches, replaced, order):
+    """기존 산출물의 replaced 행을 새로 계산한 행으로 바꾸고, 스케치들의 group_id를 바뀐 행 번호에 맞게 다시 매기기"""
+    kept = old[~replaced]
+    combined = order(pd.concat([
+        kept.assign(old_id=kept.index, new_id=-1),
+        new.assign(old_id=-1, new_id=new.index),
+    ], ignore_index=True))
+    sketches = []
+    for old_sketch, new_sketch in zip(old_sketches, new_sketches):
+        sketch = concat_frames([
+            remap_group_ids(old_sketch[old_sketch['group_id'].isin(kept.index)], combined['old_id']),
+            remap_group_ids(new_sketch, combined['new_id']),
+        ])
+        # 두 조각은 각각 (group_id, 나머지 키) 순서이고 group_id가 겹치지 않으므로 group_id만 안정 정렬하면 된다
+        order_ids = np.argsort(sketch['group_id'].to_numpy(), kind='stable')
+        sketches.append(sketch.iloc[order_ids].reset_index(drop=True))
+    return combined.drop(columns=['old_id', 'new_id']), sketches
+
+
+def remap_group_ids(sketch, ids):
+    """ids(새 행 번호 -> 이전 행 번호)에 따라 스케치의 group_id 바꾸기"""
+    mapping = pd.Series(ids.index, index=ids.to_numpy())
+    mapping = mapping[mapping.index >= 0]
+    return sketch.assign(group_id=sketch['group_id'].map(mapping).astype('int32'))
+
+
+def concat_frames(frames):
+    """카테고리 컬럼의 카테고리를 맞춘 뒤 concat (다르면 object로 바뀌어 메모리가 커진다)"""
+    frames = list(frames)
+    for col in frames[0].columns:
+        if isinstance(frames[0][col].dtype, pd.CategoricalDtype):
+            categories = pd.api.types.union_categoricals([f[col] for f in frames]).categories
+            frames = [f.assign(**{col: f[col].cat.set_categories(categories)}) for f in frames]
+    return pd.concat(frames, ignore_index=True)
+
+
+def finalize_partial(partial):
+    """부분 집계를 대시보드용 산출물로 변환"""
     # 통계 데이터 만들기
-    running_Y_M_stats = df.groupby(['year', 'month','gender','age_group','weekday','country']).agg({
-        'distance': 'mean',
-        'duration': 'mean', 
-        'speed_per_hour': 'mean',
-        'athlete': 'nunique'
-    }).reset_index().rename(columns={'athlete': 'total_runners'})
-    # 저장
-    running_Y_M_stats.to_csv("./data/processed/running_Y_M_stats.csv", index=False)
-
-    # 거리x시간 분포 데이터 만들기
-    distance_duration_df = data_compression(df, 'distance', 'duration', x_bins=100, y_bins=100)
-    # 저장
-    distance_duration_df.to_csv("./data/processed/distance_duration_df.csv", index=False)
+    # 고유 러너 수는 그룹별 HLL 레지스터로 추정 (작은 그룹은 linear counting이라 거의 정확)
+    stats = partial['stats'].merge(runner_counts(partial['stats_hll'], STATS_KEYS), on=STATS_KEYS)
+    # 평균과 함께 합계/건수 컬럼을 남겨 대시보드에서 어떤 단위로든 정확히 재집계할 수 있게 한다
+    running_Y_M_stats = stats[STATS_KEYS].assign(
+        distance=stats['distance_sum'] / stats['run_count'],
+        duration=stats['duration_sum'] / stats['run_count'],
+        speed_per_hour=stats['speed_per_hour_sum'] / stats['run_count'],
+        total_runners=stats['total_runners'],
+    ).join(stats[SUM_COLUMNS])
+    running_Y_M_stats = order_stats(running_Y_M_stats)
+    # 고유 러너 수는 그룹끼리 더할 수 없으므로 그룹별 HLL 스케치를 함께 저장 (group_id = 통계 행 번호)
+    with stage('hll_sketch', rows=len(partial['stats_hll'])):
+        running_Y_M_hll = build_sketch(running_Y_M_stats, partial['stats_hll'], STATS_KEYS)
+
+    # 거리x시간 분포 데이터 만들기 (해상도 피라미드)
+    with stage('pyramid', rows=len(partial['hist'])):
+        distance_duration_pyramid = build_pyramid(partial['hist'])
 
     # 주별 랭킹 데이터 만들기
-    df['year_week'] = df['year'].astype(str) + '-' + df['week'].astype(str)
-    ## active user = 1회에 1km 이상 러닝한 사람
-    running_W_ranking = df[df['distance'] > 1].groupby(['country', 'year_week']).agg({
-        'athlete': 'nunique',
-        'distance': 'mean',
-        'duration': 'mean',
-    }).reset_index().rename(columns={'athlete': 'total_runners'})
-    
-    # year_week를 datetime으로 변환하여 올바른 시간 순서로 정렬
-    running_W_ranking['year_week_dt'] = pd.to_datetime(running_W_ranking['year_week'] + '-1', format='%Y-%W-%w')
-    running_W_ranking = running_W_ranking.sort_values('year_week_dt').reset_index(drop=True)
-    running_W_ranking = running_W_ranking.drop('year_week_dt', axis=1)
-    running_W_ranking.to_csv("./data/processed/running_W_ranking.csv", index=False)
-
-    if data == 'running_Y_M_stats':
-        return running_Y_M_stats
-    elif data == 'distance_duration_df':
-        return distance_duration_df
-    elif data == 'running_W_ranking':
-        return running_W_ranking
-
-
-def data_compression(df, x_col='distance', y_col='duration', 
+    ranking = partial['ranking'].merge(runner_counts(partial['ranking_hll'], RANKING_KEYS), on=RANKING_KEYS)
+    running_W_ranking = ranking[RANKING_KEYS].assign(
+        total_runners=ranking['total_runners'],
+        distance=ranking['distance_sum'] / ranking['run_count'],
+        duration=ranking['duration_sum'] / ranking['run_count'],
+    ).join(ranking[['distance_sum', 'duration_sum', 'run_count']])
+    running_W_ranking = order_ranking(running_W_ranking)
+    with stage('hll_sketch', rows=len(partial['ranking_hll'])):
+        running_W_hll = build_sketch(running_W_ranking, partial['ranking_hll'], RANKING_KEYS)
+    with stage('quantile_sketch', rows=len(partial['ranking_quantiles'])):
+        running_W_quantiles = build_quantile_sketch(running_W_ranking, partial['ranking_quantiles'], RANKING_KEYS)
+
+    return {
+        'running_Y_M_stats': running_Y_M_stats,
+        'running_Y_M_hll': running_Y_M_hll,
+        'distance_duration_pyramid': distance_duration_pyramid,
+        'running_W_ranking': running_W_ranking,
+        'running_W_hll': running_W_hll,
+        'running_W_quantiles': running_W_quantiles,
+        # 성별 x 연령대 x 국가별 속도 분위수 스케치 (전체 기간 합계, '전체' 조합은 필터 큐브를 만들 때 합친다)
+        'filter_cube_country_quantiles': sort_by_keys(partial['country_quantiles'].copy(),
+                                                      PARTIAL_KEYS['country_quantiles']),
+        # 성별 x 연령대 x 월 분위수 구간 (저장하지 않고 필터 큐브의 조합 x 월 스케치로 합친다)
+        'month_quantiles': partial['month_quantiles'],
+    }
+
+
+def order_stats(df):
+    return sort_by_keys(df, STATS_KEYS)
+
+
+def order_ranking(df):
+    # week_key는 정수라 그대로 시간순 (연도가 바뀌는 주도 ISO 연도 기준으로 이어진다)
+    return sort_by_keys(df, ['week_key', 'country'])
+
+
+def runner_counts(registers, keys):
+    """그룹 키별 HLL 레지스터 -> 그룹별 고유 러너 수 추정 (keys + total_runners)"""
+    return hll_estimate(registers, keys).rename('total_runners').reset_index()
+
+
+def build_sketch(artifact, registers, keys):
+    """그룹 키별 HLL 레지스터를 산출물의 행 번호(group_id)에 연결"""
+    group_ids = artifact[keys].reset_index(names='group_id')
+    sketch = sort_by_keys(registers.copy(), keys).merge(group_ids, on=keys)
+    sketch = sketch[['group_id', 'register', 'rank']].astype({'group_id': 'int32'})
+    return sketch.sort_values(['group_id', 'register']).reset_index(drop=True)
+
+
+def build_quantile_sketch(artifact, buckets, keys):
+    """그룹별 로그 구간 건수를 산출물의 행 번호(group_id)에 연결"""
+    group_ids = artifact[keys].reset_index(names='group_id')
+    sketch = sort_by_keys(buckets.copy(), keys).merge(group_ids, on=keys)
+    sketch = sketch[['group_id', 'metric', 'bucket', 'count']].astype({'group_id': 'int32', 'count': 'int32'})
+    return sketch.sort_values(['group_id', 'metric', 'bucket']).reset_index(drop=True)
+
+
+def sort_by_keys(df, keys):
+    """그룹 키(카테고리는 문자열 순서) 기준 정렬"""
+    for col in keys:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype(str)
+    return df.sort_values(keys).reset_index(drop=True)
+
+
+def rollup(df, by=None):
+    """합계/건수 컬럼으로 원하는 단위(by)의 가중 평균을 다시 계산 (by가 없으면 전체 1행)"""
+    sum_cols = [col for col in SUM_COLUMNS if col in df.columns]
+    if by:
+        grouped = df.groupby(by, observed=True)[sum_cols].sum().reset_index()
+    else:
+        grouped = df[sum_cols].sum().to_frame().T
+    for col in sum_cols:
+        if col != 'run_count':
+            grouped[col.removesuffix('_sum')] = grouped[col] / grouped['run_count']
+    return grouped
+
+
+def filter_cube_cell(stats, hll, month_quantiles, country_quantiles, gender=FILTER_ALL, age_group=FILTER_ALL):
+    """성별/연령대 필터 하나에 해당하는 TAB2 지표 (요약, 월별 추세, 요일별 평균 러너 수, 국가별 평균 속도)
+    요약/월별/국가별에는 평균과 함께 분위수 스케치(성별 x 연령대 x 월, 성별 x 연령대 x 국가)로 구한 중앙값(_p50)과 p90(_p90)을 붙인다"""
+    filtered = stats
+    if gender != FILTER_ALL:
+        filtered = filtered[filtered['gender'] == gender]
+        month_quantiles = month_quantiles[month_quantiles['gender'] == gender]
+        country_quantiles = country_quantiles[country_quantiles['gender'] == gender]
+    if age_group != FILTER_ALL:
+        filtered = filtered[filtered['age_group'] == age_group]
+        month_quantiles = month_quantiles[month_quantiles['age_group'] == age_group]
+        country_quantiles = country_quantiles[country_quantiles['age_group'] == age_group]
+
+    summary = rollup(filtered).assign(total_runners=count_runners(filtered, hll)).join(sketch_quantiles(month_quantiles))
+    monthly = rollup(filtered, ['year', 'month']).merge(
+        count_runners(filtered, hll, ['year', 'month']), on=['year', 'month']).merge(
+        sketch_quantiles(month_quantiles, ['year', 'month']), on=['year', 'month'])
+    # 요일별 평균 러너 수 = 월별 요일 고유 러너 수의 평균
+    weekday = count_runners(filtered, hll, ['year', 'month', 'weekday'])
+    weekday = weekday.groupby('weekday', observed=True)['total_runners'].mean().reset_index()
+    country = rollup(filtered, 'country')[['country', 'speed_per_hour']].merge(
+        sketch_quantiles(country_quantiles, ['country'])[['country', 'speed_per_hour_p50', 'speed_per_hour_p90']],
+        on='country')
+    country = country.sort_values('speed_per_hour')
+    return {'summary': summary, 'monthly': monthly, 'weekday': weekday, 'country': country}
+
+
+def month_quantiles_from_cube(monthly, sketch):
+    """필터 큐브의 조합 x 월 스케치에서 '전체'가 아닌 조합의 행만 골라 성별 x 연령대 x 월 분위수 구간으로"""
+    cells = monthly[(monthly['gender'] != FILTER_ALL) & (monthly['age_group'] != FILTER_ALL)]
+    sketch = sketch[sketch['group_id'].isin(cells.index)].join(cells[['year', 'month', 'gender', 'age_group']],
+                                                               on='group_id')
+    return sketch[PARTIAL_KEYS['month_quantiles'] + ['count']].reset_index(drop=True)
+
+
+def build_filter_cube(stats, hll, month_quantiles, country_quantiles, months=None, old=None):
+    """성별 x 연령대('전체' 포함) 모든 조합의 TAB2 지표를 미리 계산해 filter_cube_* 테이블로
+    월 단위 표(합계, HLL 레지스터, 분위수 구간, 요일별 러너 수)는 months의 행만 계산해 old에서 그 월의 행을 교체하고
+    (months가 없으면 전체, month_quantiles는 그 월의 성별 x 연령대 x 월 분위수 구간),
+    요약/요일별/국가별은 월 단위 표와 국가별 속도 스케치를 합쳐 만든다"""
+    monthly, monthly_hll, monthly_quantiles, monthly_weekday = filter_cube_months(stats, hll, month_quantiles, months)
+    if old is not None:
+        replaced = np.isin(month_key(old['filter_cube_monthly']), list(months))
+        monthly, (monthly_hll, monthly_quantiles) = splice_artifact(
+            old['filter_cube_monthly'], monthly,
+            [old['filter_cube_monthly_hll'], old['filter_cube_monthly_quantiles']], [monthly_hll, monthly_quantiles],
+            replaced=replaced, order=order_filter_cube)
+        replaced = np.isin(month_key(old['filter_cube_monthly_weekday']), list(months))
+        monthly_weekday, _ = splice_artifact(old['filter_cube_monthly_weekday'], monthly_weekday, [], [],
+                                             replaced=replaced, order=order_filter_cube)
+
+    # 요약 = 조합별 월 합계/스케치를 다시 합친 값 (HLL은 월끼리 max, 분위수 구간은 더한다)
+    cells = ['gender', 'age_group']
+    summary = rollup(monthly, cells).merge(
+        count_runners(monthly, monthly_hll, cells), on=cells).merge(
+        quantiles(monthly, monthly_quantiles, cells), on=cells)
+    # 요일별 평균 러너 수 = 월별 요일 고유 러너 수의 평균
+    weekday = monthly_weekday.groupby(cells + ['weekday'], observed=True)['total_runners'].mean().reset_index()
+    country = rollup(filter_cells(stats, ['country'], SUM_COLUMNS, 'sum'), cells + ['country'])
+    country = country[cells + ['country', 'speed_per_hour']].merge(
+        sketch_quantiles(filter_cells(country_quantiles, ['country', 'metric', 'bucket'], ['count'], 'sum'),
+                         cells + ['country'])[cells + ['country', 'speed_per_hour_p50', 'speed_per_hour_p90']],
+        on=cells + ['country'])
+    return {
+        'filter_cube_summary': sort_by_keys(summary[cells + [col for col in summary.columns if col not in cells]], cells),
+        'filter_cube_monthly': monthly,
+        'filter_cube_weekday': sort_by_keys(weekday, cells + ['weekday']),
+        'filter_cube_country': sort_by_keys(country, cells).sort_values(cells + ['speed_per_hour']).reset_index(drop=True),
+        'filter_cube_monthly_hll': monthly_hll,
+        'filter_cube_monthly_quantiles': monthly_quantiles,
+        'filter_cube_monthly_weekday': monthly_weekday,
+    }
+
+
+def filter_cube_months(stats, hll, month_quantiles, months=None):
+    """필터 조합 x 월 단위 표 (합계/평균/고유 러너 수/분위수, 그 HLL/분위수 스케치, 요일별 고유 러너 수)
+    months가 있으면 그 월(month_key)의 통계 행과 스케치만 읽는다"""
+    if months is not None:
+        stats = stats[np.isin(month_key(stats), list(months))]
+        month_quantiles = month_quantiles[np.isin(month_key(month_quantiles), list(months))]
+    hll = hll[hll['group_id'].isin(stats.index)].join(stats[['gender', 'age_group', 'year', 'month', 'weekday']],
+                                                      on='group_id')
+    # 월/요일 단위로 먼저 줄인 뒤 '전체' 조합으로 합친다
+    registers = filter_cells(hll, ['year', 'month', 'weekday', 'register'], ['rank'], 'max')
+    buckets = filter_cells(month_quantiles, ['year', 'month', 'metric', 'bucket'], ['count'], 'sum')
+    monthly_weekday = order_filter_cube(
+        hll_estimate(registers, FILTER_CUBE_KEYS + ['weekday']).rename('total_runners').reset_index())
+    registers = registers.groupby(FILTER_CUBE_KEYS + ['register'], observed=True)['rank'].max().reset_index()
+
+    monthly = order_filter_cube(rollup(filter_cells(stats, ['year', 'month'], SUM_COLUMNS, 'sum'), FILTER_CUBE_KEYS))
+    monthly = monthly.merge(runner_counts(registers, FILTER_CUBE_KEYS), on=FILTER_CUBE_KEYS, how='left').merge(
+        sketch_quantiles(buckets, FILTER_CUBE_KEYS), on=FILTER_CUBE_KEYS, how='left')
+    return (monthly, build_sketch(monthly, registers, FILTER_CUBE_KEYS),
+            build_quantile_sketch(monthly, buckets, FILTER_CUBE_KEYS), monthly_weekday)
+
+
+def filter_cells(df, keys, values, how):
+    """성별/연령대별 행을 '전체'를 포함한 모든 필터 조합으로 합치기 (gender, age_group + keys 단위로 values를 how로)"""
+    base = df.groupby(['gender', 'age_group'] + keys, observed=True)[values].agg(how).reset_index()
+    base = base.astype({'gender': str, 'age_group': str})
+    frames = [base]
+    for merged in (['gender'], ['age_group'], ['gender', 'age_group']):
+        by = [col for col in ['gender', 'age_group'] if col not in merged] + keys
+        frames.append(base.groupby(by, observed=True)[values].agg(how).reset_index().assign(
+            **{col: FILTER_ALL for col in merged}))
+    return pd.concat(frames, ignore_index=True)[['gender', 'age_group'] + keys + values]
+
+
+def order_filter_cube(df):
+    return sort_by_keys(df, FILTER_CUBE_KEYS + (['weekday'] if 'weekday' in df.columns else []))
+
+
+def filter_cube_lookup(cube):
+    """filter_cube_* 테이블을 {(성별, 연령대): {summary, monthly, weekday, country}} 사전으로 (필터 변경 = 사전 조회)"""
+    lookup = {}
+    for name in FILTER_CUBE_TABLES:
+        table = cube[f'filter_cube_{name}']
+        for (gender, age_group), cell in table.groupby(['gender', 'age_group'], observed=True, sort=False):
+            lookup.setdefault((gender, age_group), {})[name] = cell.drop(columns=['gender', 'age_group']).reset_index(drop=True)
+    return lookup
+
+
+def build_leaderboard(ranking):
+    """주 x 지표별 국가 순위표 (dense 순위, 백분위, 전주 대비 순위 변화)를 (주, 지표, 순위) 순서로"""
+    weeks, week_pos = np.unique(ranking['week_key'].to_numpy(), return_inverse=True)
+    boards = []
+    for metric in LEADERBOARD_METRICS:
+        board = pd.DataFrame({
+            'week_pos': week_pos,
+            'country': ranking['country'].astype(str),
+            'value': ranking[metric].astype('float64'),
+        })
+        by_week = board.groupby('week_pos')['value']
+        board['rank'] = by_week.rank(method='dense', ascending=False).astype('int16')
+        board['percentile'] = by_week.rank(method='max', pct=True) * 100 # 값이 이 국가 이하인 국가 비율
+        # 전주 대비 순위 변화 (양수 = 상승, 전주 기록이 없으면 NaN)
+        previous = board[['week_pos', 'country', 'rank']].assign(week_pos=board['week_pos'] + 1)
+        board = board.merge(previous.rename(columns={'rank': 'prev_rank'}), on=['week_pos', 'country'], how='left')
+        board['rank_change'] = board['prev_rank'] - board['rank']
+        boards.append(board.assign(metric=metric).drop(columns='prev_rank'))
+
+    leaderboard = pd.concat(boards, ignore_index=True)
+    leaderboard['metric'] = pd.Categorical(leaderboard['metric'], categories=LEADERBOARD_METRICS)
+    leaderboard = leaderboard.sort_values(['week_pos', 'metric', 'rank', 'country']).reset_index(drop=True)
+    leaderboard.insert(0, 'week_key', weeks[leaderboard['week_pos'].to_numpy()])
+    return leaderboard[['week_key', 'metric', 'rank', 'country', 'value', 'percentile', 'rank_change']]
+
+
+def leaderboard_index(leaderboard):
+    """리더보드 행 위치 색인: (주, 지표) -> 행 구간, (주, 지표, 국가) -> 행 번호"""
+    weeks = leaderboard['week_key'].tolist()
+    metrics = leaderboard['metric'].astype(str).to_numpy()
+    countries = leaderboard['country'].astype(str).to_numpy()
+    segments = {}
+    for pos, key in enumerate(zip(weeks, metrics)):
+        start, _ = segments.get(key, (pos, pos))
+        segments[key] = (start, pos + 1)
+    return {
+        'segments': segments,
+        'countries': {key: pos for pos, key in enumerate(zip(weeks, metrics, countries))},
+    }
+
+
+def leaderboard_slice(leaderboard, index, week_key, metric, country=None, top=20):
+    """상위 top개 국가 + 선택 국가 행만 잘라오기 (정렬/집계 없이 O(top)), 값 컬럼 이름은 지표 이름으로"""
+    start, end = index['segments'][(week_key, metric)]
+    rows = list(range(start, min(start + top, end)))
+    pos = index['countries'].get((week_key, metric, country))
+    if pos is not None and pos >= start + top:
+        rows.append(pos)
+    board = leaderboard.iloc[rows]
+    return board[['country', 'value', 'rank', 'percentile', 'rank_change']].rename(columns={'value': metric})
+
+
+def build_prefix_sums(ranking):
+    """국가 x 주(빈 주 없이 촘촘한 축) 누적합 테이블: 각 행은 첫 주부터 그 주까지의 합계 (국가, 주 순서)"""
+    weeks = np.unique(ranking['week_key'].to_numpy())
+    countries = np.sort(ranking['country'].astype(str).unique())
+    cumulative = {}
+    for col in PREFIX_SUM_COLUMNS:
+        grid = ranking.pivot_table(index='country', columns='week_key', values=col, aggfunc='sum', observed=True)
+        # 러닝 횟수는 정수로, 거리/시간 합계는 float64로 누적
+        dtype = 'int64' if col == 'run_count' else 'float64'
+        grid = grid.reindex(index=countries, columns=weeks, fill_value=0).fillna(0).to_numpy(dtype=dtype)
+        cumulative[col] = grid.cumsum(axis=1).ravel()
+    return pd.DataFrame({
+        'country': np.repeat(countries, len(weeks)),
+        'week_key': np.tile(weeks, len(countries)),
+        **cumulative,
+    })
+
+
+def prefix_sum_arrays(prefix):
+    """누적합 테이블을 (국가, 주) 2차원 배열로 (행 순서가 국가 x 주라 reshape만 한다)"""
+    countries = prefix['country'].astype(str).unique()
+    weeks = prefix['week_key'].to_numpy()[:len(prefix) // len(countries)]
+    arrays = {'countries': countries, 'weeks': weeks.tolist()}
+    for col in PREFIX_SUM_COLUMNS:
+        arrays[col] = prefix[col].to_numpy().reshape(len(countries), len(weeks))
+    return arrays
+
+
+def range_ranking(arrays, start, end):
+    """주 구간 [start, end] (주 축 위치) 국가별 합계와 평균을 누적합 차이로 O(국가 수)에 계산 (기록이 없는 국가는 제외)"""
+    sums = {}
+    for col in PREFIX_SUM_COLUMNS:
+        cumulative = arrays[col]
+        sums[col] = cumulative[:, end] - (cumulative[:, start - 1] if start > 0 else 0)
+    ranking = pd.DataFrame({'country': arrays['countries'], **sums})
+    ranking = ranking[ranking['run_count'] > 0].reset_index(drop=True)
+    ranking['distance'] = ranking['distance_sum'] / ranking['run_count']
+    ranking['duration'] = ranking['duration_sum'] / ranking['run_count']
+    return ranking
+
+
+def range_runners(ranking, registers, first_week, last_week):
+    """주 구간 [first_week, last_week]의 국가별 고유 러너 수 (주별 HLL 스케치를 합쳐 추정)
+    ranking은 주 순서, 스케치는 group_id 순서라 구간에 해당하는 행만 이진 탐색으로 잘라 합친다.
+    누적합과 달리 비용은 O(국가 수)가 아니라 기간 안의 (주, 국가) 레지스터 수에 비례한다"""
+    week_keys = ranking['week_key'].to_numpy()
+    start, end = np.searchsorted(week_keys, first_week, 'left'), np.searchsorted(week_keys, last_week, 'right')
+    lo, hi = np.searchsorted(registers['group_id'].to_numpy(), [start, end], 'left')
+    return count_runners(ranking.iloc[start:end], registers.iloc[lo:hi], 'country')
+
+
+def build_pyramid(hist):
+    """가장 촘촘한 격자의 칸을 묶어 HIST_LEVELS 해상도별 히스토그램을 한 테이블로 (칸 번호 + 건수만 저장)"""
+    finest = max(HIST_LEVELS)
+    levels = []
+    for bins in HIST_LEVELS:
+        factor = finest // bins
+        level = hist.assign(xbin=hist['xbin'] // factor, ybin=hist['ybin'] // factor)
+        level = level.groupby(HIST_KEYS, observed=True)['count'].sum().reset_index()
+        levels.append(level.assign(bins=bins))
+    pyramid = pd.concat(levels, ignore_index=True)
+    return pyramid[['scale', 'bins'] + HIST_KEYS[1:] + ['count']]
+
+
+def pyramid_level(pyramid, bins=100, scale='linear', gender=None, age_group=None, min_count=1):
+    """피라미드에서 해상도/구간 종류/성별/연령대를 골라 (distance, duration, count) 구간 중심 테이블로"""
+    mask = (pyramid['bins'] == bins) & (pyramid['scale'] == scale)
+    if gender:
+        mask &= pyramid['gender'] == gender
+    if age_group:
+        mask &= pyramid['age_group'] == age_group
+    level = pyramid[mask].groupby(['xbin', 'ybin'])['count'].sum()
+    H = np.zeros((bins, bins))
+    H[level.index.get_level_values('xbin'), level.index.get_level_values('ybin')] = level.to_numpy()
+    return compress_histogram(H, hist_edges(scale, 'distance', bins), hist_edges(scale, 'duration', bins), min_count)
+
+
+def data_compression(df, x_col='distance', y_col='duration',
                         x_bins=100, y_bins=100, min_count=1):
     H, xedges, yedges = np.histogram2d(
-        df[x_col], df[y_col], 
+        df[x_col], df[y_col],
         bins=[x_bins, y_bins]
     )
-    compressed_data = []
-    for i in range(x_bins):
-        for j in range(y_bins):
-            count = H[i, j]
-            if count >= min_count:
-                x_center = (xedges[i] + xedges[i+1]) / 2
-                y_center = (yedges[j] + yedges[j+1]) / 2
-                compressed_data.append({
-                    'distance': x_center,
-                    'duration': y_center,
-                    'count': count
-                })
-    return pd.DataFrame(compressed_data)
+    return compress_histogram(H, xedges, yedges, min_count)
+
+
+def compress_histogram(H, xedges, yedges, min_count=1):
+    """2차원 히스토그램에서 min_count 이상인 칸만 (구간 중심, 건수)로 추리기"""
+    i, j = np.nonzero(H >= min_count)
+    return pd.DataFrame({
+        'distance': ((xedges[:-1] + xedges[1:]) / 2)[i],
+        'duration': ((yedges[:-1] + yedges[1:]) / 2)[j],
+        'count': H[i, j],
+    })
+
+
+def compact_floats(df):
+    """표시용 실수(평균, 분위수, 백분위)는 float32로 (합계(_sum)와 건수는 다른 단위로 다시 더하므로 float64 유지)"""
+    columns = {col: 'float32' for col in df.columns
+               if df[col].dtype == 'float64' and not col.endswith('_sum') and col != 'run_count'}
+    return df.astype(columns) if columns else df
+
+
+def file_hash(path, block_size=1 << 20):
+    """원본 파일의 sha256 해시"""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def write_manifest(out_dir, build_id, sources, artifacts, filtered_rows, build_seconds, chunksize=None):
+    """빌드 결과(원본 해시, 행 수, 빌드 시간)를 빌드 디렉터리에 남기고 out_dir의 manifest.json을 교체"""
+    manifest = {
+        'build_id': build_id,
+        'built_at': datetime.now().isoformat(timespec='seconds'),
+        'build_seconds': round(build_seconds, 2),
+        'sources': sources,
+        'filtered_rows': filtered_rows,
+        'chunksize': chunksize,
+        'format': BUILD_FORMAT,
+        'params': build_params(),
+        'artifacts': {
+            name: {'path': f'{BUILDS_DIR}/{build_id}/{name}', 'format': 'npy', 'rows': len(artifact)}
+            for name, artifact in artifacts.items()
+        },
+    }
+    # 빌드 디렉터리의 사본은 manifest가 교체된 뒤에도 이 빌드를 읽는 프로세스가 쓴다 (src.queries)
+    # 중간에 실패해도 이전 manifest가 깨지지 않도록 임시 파일에 쓴 뒤 교체
+    for path in [os.path.join(out_dir, BUILDS_DIR, build_id, MANIFEST_FILE), os.path.join(out_dir, MANIFEST_FILE)]:
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+    return manifest
+
+
+def build_params():
+    """산출물 값을 정하는 설정 (이상치 기준, 히스토그램 격자, 스케치 정밀도, JSON으로 저장한 값과 비교할 수 있는 형태)"""
+    return json.loads(json.dumps({
+        'max_distance': MAX_DISTANCE,
+        'max_duration': MAX_DURATION,
+        'max_speed': MAX_SPEED,
+        'active_distance': ACTIVE_DISTANCE,
+        'hist_ranges': HIST_RANGES,
+        'hist_levels': HIST_LEVELS,
+        'hll_precision': HLL_PRECISION,
+        'quantile_accuracy': QUANTILE_ACCURACY,
+    }))
+
+
+def prune_builds(out_dir, manifests):
+    """manifests(현재, 직전 빌드)가 가리키지 않는 빌드 디렉터리와 예전 형식(out_dir 바로 아래)의 산출물 지우기"""
+    used = {os.path.dirname(info['path']) or info['path']
+            for manifest in manifests if manifest for info in manifest['artifacts'].values()}
+    builds_dir = os.path.join(out_dir, BUILDS_DIR)
+    candidates = [f'{BUILDS_DIR}/{name}' for name in os.listdir(builds_dir)]
+    candidates += [name for name in os.listdir(out_dir) if os.path.exists(os.path.join(out_dir, name, SCHEMA_FILE))]
+    for name in candidates:
+        if name not in used:
+            shutil.rmtree(os.path.join(out_dir, name), ignore_errors=True)
+
+
+def load_manifest(out_dir=PROCESSED_DIR, build_id=None):
+    """manifest.json 로드 (build_id를 주면 그 빌드 디렉터리의 사본, 없으면 None)"""
+    if build_id is not None:
+        out_dir = os.path.join(out_dir, BUILDS_DIR, build_id)
+    path = os.path.join(out_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_artifact(name, manifest, out_dir=PROCESSED_DIR):
+    """manifest에 기록된 산출물 로드 (메모리 매핑이라 파싱 없이 바로 열림)"""
+    return load_table(os.path.join(out_dir, manifest['artifacts'][name]['path']))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='러닝 데이터 전처리 (모든 산출물 + manifest 빌드)')
+    parser.add_argument('--raw-dir', default=RAW_DIR)
+    parser.add_argument('--out-dir', default=PROCESSED_DIR)
+    parser.add_argument('--chunksize', type=int, default=CHUNK_SIZE, help='청크당 행 수 (0이면 한 번에 처리)')
+    parser.add_argument('--full', action='store_true', help='파티션 집계를 지우고 전체를 다시 빌드')
+    parser.add_argument('--workers', type=int, default=1, help='병렬 프로세스 수 (0이면 CPU 코어 수)')
+    parser.add_argument('--cache-dir', default=RAW_CACHE_DIR, help='파싱한 원본 스냅샷 디렉터리')
+    parser.add_argument('--no-cache', action='store_true', help='원본 스냅샷을 읽지도 쓰지도 않음')
+    args = parser.parse_args()
 
+    artifacts = preprocess_data(args.raw_dir, args.out_dir, chunksize=args.chunksize or None, full=args.full,
+                                workers=args.workers or os.cpu_count(), cache_dir=None if args.no_cache else args.cache_dir)
+    print(f"빌드 완료: {', '.join(f'{name}({len(df):,}행)' for name, df in artifacts.items())}")
@@ -0,0 +1,152 @@
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import threading
+from collections import deque
+
+# PROFILE_STAGES=1일 때만 측정 (꺼져 있으면 stage()가 아무것도 하지 않는 공용 객체를 돌려준다)
+ENABLED = os.environ.get('PROFILE_STAGES', '0') == '1'
+LOG_PATH = os.environ.get('PROFILE_LOG', './data/profile.jsonl')
+# 대시보드 디버그 패널용으로 메모리에 남겨두는 최근 기록 수
+MAX_RECORDS = 10_000
+
+records = deque(maxlen=MAX_RECORDS)
+_local = threading.local()
+_lock = threading.Lock()
+
+class Stage:
+    """단계 하나의 벽시계 시간, 메모리, 행 수 측정 (rows는 블록 안에서 정해지면 나중에 넣어도 된다)"""
+
+    def __init__(self, name, rows=None):
+        self.name = name
+        self.rows = rows
+
+    def __enter__(self):
+        stack = _stack()
+        stack.append(self.name)
+        self.path = '/'.join(stack)
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        seconds = time.perf_counter() - self.start
+        _stack().pop()
+        rss_mb, peak_rss_mb = memory_mb()
+        record({
+            'stage': self.path,
+            'seconds': seconds,
+            'rows': None if self.rows is None else int(self.rows),
+            'rss_mb': rss_mb,
+            'peak_rss_mb': peak_rss_mb,
+            'pid': os.getpid(),
+            'thread': threading.get_ident(),
+            'started_at': self.started_at,
+        })
+        return False
+
+
+class NullStage:
+    """측정이 꺼져 있을 때 쓰는 빈 단계"""
+    rows = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_STAGE = NullStage()
+
+def stage(name, rows=None):
+    """with stage('이름') as s: ... (s.rows = 처리한 행 수) 형태로 단계 측정, 중첩하면 '바깥/안쪽' 이름으로 기록"""
+    return Stage(name, rows) if ENABLED else NULL_STAGE
+
+
+def stage_iter(name, iterable):
+    """반복마다 다음 항목을 만드는 시간(예: CSV 청크 파싱)을 단계로 기록, 행 수는 항목의 길이"""
+    if not ENABLED:
+        return iterable
+    return _stage_iter(name, iter(iterable))
+
+
+def _stage_iter(name, iterator):
+    while True:
+        with stage(name) as s:
+            item = next(iterator, None)
+            s.rows = None if item is None else len(item)
+        if item is None:
+            return
+        yield item
+
+
+def _stack():
+    if not hasattr(_local, 'stack'):
+        _local.stack = []
+    return _local.stack
+
+
+def memory_mb():
+    """현재 RSS와 프로세스 최대 RSS (MB, 현재 RSS는 /proc이 없으면 None)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+    try:
+        with open('/proc/self/statm') as f:
+            rss = int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024 ** 2
+    except OSError:
+        rss = None
+    return rss, peak
+
+
+def record(entry):
+    """메모리 기록에 추가하고 JSON 로그(한 줄에 하나)에 이어 쓰기 (프로세스 풀 작업자도 같은 파일에 기록)"""
+    with _lock:
+        records.append(entry)
+        if LOG_PATH:
+            os.makedirs(os.path.dirname(LOG_PATH) or '.', exist_ok=True)
+            with open(LOG_PATH, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+
+def recent(since, thread=None):
+    """since(time.time()) 이후 시작한 기록 (thread를 주면 그 스레드 = Streamlit 세션 실행분만)"""
+    with _lock:
+        return [entry for entry in records
+                if entry['started_at'] >= since and (thread is None or entry['thread'] == thread)]
+
+
+def summarize(entries):
+    """단계별 호출 수, 합계/최대 시간, 처리 행 수, 최대 RSS (합계 시간 내림차순)"""
+    summary = {}
+    for entry in entries:
+        row = summary.setdefault(entry['stage'], {'stage': entry['stage'], 'calls': 0, 'seconds': 0.0,
+                                                  'max_seconds': 0.0, 'rows': 0, 'peak_rss_mb': 0.0})
+        row['calls'] += 1
+        row['seconds'] += entry['seconds']
+        row['max_seconds'] = max(row['max_seconds'], entry['seconds'])
+        row['rows'] += entry['rows'] or 0
+        row['peak_rss_mb'] = max(row['peak_rss_mb'], entry['peak_rss_mb'])
+    return sorted(summary.values(), key=lambda row: row['seconds'], reverse=True)
+
+
+def load_log(path=LOG_PATH):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='단계별 측정 로그 요약')
+    parser.add_argument('log', nargs='?', default=LOG_PATH)
+    args = parser.parse_args()
+
+    print(f"{'stage':<50} {'calls':>7} {'total s':>10} {'max s':>9} {'rows':>13} {'peak MB':>9}")
+    for row in summarize(load_log(args.log)):
+        print(f"{row['stage']:<50} {row['calls']:>7,d} {row['seconds']:>10.3f} {row['max_seconds']:>9.3f}"
+              f" {row['rows']:>13,d} {row['peak_rss_mb']:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
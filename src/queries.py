@@ -0,0 +1,227 @@
+"""전처리 산출물 조회 함수 (Streamlit과 무관한 순수 Python, 대시보드와 HTTP 서비스가 함께 사용)
+
+산출물과 파생 색인은 (out_dir, build_id)별로 한 번만 로드하고, 조회 결과는 build_id를 키에 넣어 캐시한다.
+재빌드되어 manifest가 바뀌면 다음 호출부터 새 산출물을 읽는다. 산출물은 읽기 전용 메모리 매핑이라 Streamlit 세션들이
+복사 없이 같은 페이지를 공유한다 (반환된 DataFrame도 공유되므로 수정하지 말 것).
+"""
+import os
+import threading
+from functools import lru_cache, wraps
+import pandas as pd
+from src.preprocessor import (PROCESSED_DIR, MANIFEST_FILE, FILTER_ALL, FILTER_CUBE_TABLES, HIST_LEVELS,
+                              HIST_RANGES, LEADERBOARD_METRICS, load_manifest, load_artifact, filter_cube_lookup,
+                              pyramid_level, leaderboard_index, leaderboard_slice, prefix_sum_arrays,
+                              range_ranking, range_runners, WEEKDAYS)
+from src.sketches import QUANTILE_METRICS, QUANTILES, quantiles
+from src.profiling import stage
+
+# 조회 결과 캐시 크기 (필터 조합/주/국가별 결과 수)
+QUERY_CACHE_SIZE = 4096
+
+_manifests = {}
+_lock = threading.Lock()
+
+def manifest(out_dir: str = PROCESSED_DIR) -> dict | None:
+    """현재 manifest (파일이 바뀌었을 때만 다시 읽는다, 빌드 전이면 None)"""
+    path = os.path.join(out_dir, MANIFEST_FILE)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    with _lock:
+        cached = _manifests.get(out_dir)
+        if cached is None or cached[0] != mtime:
+            cached = _manifests[out_dir] = (mtime, load_manifest(out_dir))
+    return cached[1]
+
+
+def build_id(out_dir: str = PROCESSED_DIR) -> str:
+    """현재 빌드 id (빌드 전이면 FileNotFoundError)"""
+    current = manifest(out_dir)
+    if current is None:
+        raise FileNotFoundError(f"{out_dir}에 전처리 산출물이 없습니다. 먼저 python -m src.preprocessor로 빌드해주세요.")
+    return current['build_id']
+
+
+@lru_cache(maxsize=64)
+def _resource(out_dir, build, name):
+    """산출물 또는 산출물에서 만든 색인 (빌드별로 한 번만 로드, 메모리 매핑이라 프로세스 안에서 공유)"""
+    # build_id를 확인한 뒤 manifest가 교체되었을 수 있으므로 항상 요청한 빌드의 manifest로 경로를 찾는다
+    current = manifest(out_dir)
+    if current is None or current['build_id'] != build:
+        current = load_manifest(out_dir, build)
+        if current is None:
+            raise FileNotFoundError(f"{out_dir}에 빌드 {build}가 없습니다 (새 빌드로 교체됨). 다시 조회해주세요.")
+    with stage(f'load/{name}'):
+        if name == 'filter_cube':
+            return filter_cube_lookup({f'filter_cube_{table}': load_artifact(f'filter_cube_{table}', current, out_dir)
+                                       for table in FILTER_CUBE_TABLES})
+        if name == 'leaderboard_index':
+            return leaderboard_index(_resource(out_dir, build, 'weekly_leaderboard'))
+        if name == 'prefix_sums':
+            return prefix_sum_arrays(_resource(out_dir, build, 'weekly_prefix_sums'))
+        return load_artifact(name, current, out_dir)
+
+
+def resource(name: str, out_dir: str = PROCESSED_DIR):
+    """현재 빌드의 산출물(이름은 manifest의 artifacts) 또는 filter_cube/leaderboard_index/prefix_sums"""
+    return _resource(out_dir, build_id(out_dir), name)
+
+
+def cached_query(func):
+    """조회 결과를 (build_id, 인자)별로 캐시 (out_dir는 키워드 인자로만 받는다)"""
+    @lru_cache(maxsize=QUERY_CACHE_SIZE)
+    def cached(build, *args, **kwargs):
+        return func(*args, **kwargs)
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        return cached(build_id(kwargs.get('out_dir', PROCESSED_DIR)), *args, **kwargs)
+
+    wrapper.cache_info = cached.cache_info
+    wrapper.cache_clear = cached.cache_clear
+    return wrapper
+
+
+def _filter_cell(gender, age_group, out_dir):
+    cube = resource('filter_cube', out_dir)
+    if (gender, age_group) not in cube:
+        raise ValueError(f"알 수 없는 필터 조합: {gender}, {age_group}")
+    return cube[(gender, age_group)]
+
+
+def _quantile_columns():
+    return [f'{metric}_p{round(q * 100)}' for metric in QUANTILE_METRICS for q in QUANTILES]
+
+
+@cached_query
+def filter_options(*, out_dir: str = PROCESSED_DIR) -> dict[str, list[str]]:
+    """TAB2 성별/연령대 선택지 ('전체'가 맨 앞)"""
+    cube = resource('filter_cube', out_dir)
+    return {
+        'gender': [FILTER_ALL] + sorted({gender for gender, _ in cube} - {FILTER_ALL}),
+        'age_group': [FILTER_ALL] + sorted({age for _, age in cube} - {FILTER_ALL}),
+    }
+
+
+@cached_query
+def summary(gender: str = FILTER_ALL, age_group: str = FILTER_ALL, *, out_dir: str = PROCESSED_DIR) -> dict[str, float]:
+    """요약 KPI (고유 러너 수, 러닝 횟수, 평균 속도/거리/시간과 각각의 중앙값(_p50)/p90(_p90))"""
+    row = _filter_cell(gender, age_group, out_dir)['summary'].iloc[0]
+    return {
+        'total_runners': int(row['total_runners']),
+        'run_count': int(row['run_count']),
+        'speed_per_hour': float(row['speed_per_hour']),
+        'distance': float(row['distance']),
+        'duration': float(row['duration']),
+        **{column: float(row[column]) for column in _quantile_columns()},
+    }
+
+
+@cached_query
+def runners_by_gender_age(*, out_dir: str = PROCESSED_DIR) -> pd.DataFrame:
+    """성별 x 연령대 조합별 고유 러너 수 (age_group, gender, total_runners)"""
+    cube = resource('filter_cube', out_dir)
+    return pd.DataFrame([
+        {'age_group': age, 'gender': gender, 'total_runners': int(cell['summary']['total_runners'].iloc[0])}
+        for (gender, age), cell in cube.items() if FILTER_ALL not in (gender, age)
+    ]).sort_values(['age_group', 'gender']).reset_index(drop=True)
+
+
+@cached_query
+def monthly_series(gender: str = FILTER_ALL, age_group: str = FILTER_ALL, *, out_dir: str = PROCESSED_DIR) -> pd.DataFrame:
+    """월별 고유 러너 수와 평균/중앙값/p90 거리/시간/속도 (date = '년도-월')"""
+    monthly = _filter_cell(gender, age_group, out_dir)['monthly']
+    return monthly.assign(date=monthly['year'].astype(str) + '-' + monthly['month'].astype(str))
+
+
+@cached_query
+def weekday_profile(gender: str = FILTER_ALL, age_group: str = FILTER_ALL, *, out_dir: str = PROCESSED_DIR) -> pd.DataFrame:
+    """요일별 평균 러너 수 (월별 요일 고유 러너 수의 평균, 월요일부터)"""
+    weekday = _filter_cell(gender, age_group, out_dir)['weekday']
+    weekday = weekday.assign(weekday=pd.Categorical(weekday['weekday'], categories=WEEKDAYS, ordered=True))
+    return weekday.sort_values('weekday').reset_index(drop=True)
+
+
+@cached_query
+def country_speed(gender: str = FILTER_ALL, age_group: str = FILTER_ALL, top: int = 10, *,
+                  out_dir: str = PROCESSED_DIR) -> pd.DataFrame:
+    """국가별 평균 속도와 속도 중앙값/p90 (평균 속도 오름차순 앞 top개)"""
+    _check_top(top)
+    return _filter_cell(gender, age_group, out_dir)['country'].head(top)
+
+
+@cached_query
+def distance_duration(bins: int = 100, scale: str = 'linear', *, out_dir: str = PROCESSED_DIR) -> pd.DataFrame:
+    """거리x시간 분포 (구간 중심 distance, duration과 count)"""
+    if bins not in HIST_LEVELS or scale not in HIST_RANGES:
+        raise ValueError(f"bins는 {HIST_LEVELS}, scale은 {list(HIST_RANGES)} 중 하나여야 합니다.")
+    return pyramid_level(resource('distance_duration_pyramid', out_dir), bins, scale)
+
+
+@cached_query
+def weeks(*, out_dir: str = PROCESSED_DIR) -> list[int]:
+    """리더보드 주 목록 (시간순 week_key = ISO 연도 * 100 + 주)"""
+    return list(dict.fromkeys(week for week, _ in resource('leaderboard_index', out_dir)['segments']))
+
+
+@cached_query
+def countries(*, out_dir: str = PROCESSED_DIR) -> list[str]:
+    """리더보드 국가 목록 (이름순)"""
+    return sorted(resource('weekly_leaderboard', out_dir)['country'].cat.categories.tolist())
+
+
+@cached_query
+def weekly_leaderboard(week_key: int, metric: str = 'total_runners', country: str | None = None, top: int = 20, *,
+                       out_dir: str = PROCESSED_DIR) -> pd.DataFrame:
+    """주 하나의 지표별 상위 top개 국가 + 선택 국가 (country, 지표 값, rank, percentile, rank_change)"""
+    _check_top(top)
+    index = resource('leaderboard_index', out_dir)
+    if (week_key, metric) not in index['segments']:
+        raise ValueError(f"알 수 없는 주/지표: {week_key}, {metric} (지표는 {LEADERBOARD_METRICS} 중 하나)")
+    return leaderboard_slice(resource('weekly_leaderboard', out_dir), index, week_key, metric, country, top)
+
+
+@cached_query
+def range_leaderboard(start_week: int, end_week: int, metric: str = 'total_runners', *,
+                      out_dir: str = PROCESSED_DIR) -> pd.DataFrame:
+    """기간 [start_week, end_week]의 국가별 고유 러너 수와 평균 거리/시간 (metric 내림차순)
+    평균 거리/시간은 누적합으로 O(국가 수), 고유 러너 수는 기간 안 주별 HLL 스케치를 합치므로 기간 길이에 비례"""
+    prefix_sums = resource('prefix_sums', out_dir)
+    week_list = prefix_sums['weeks']
+    if metric not in LEADERBOARD_METRICS:
+        raise ValueError(f"알 수 없는 지표: {metric} ({LEADERBOARD_METRICS} 중 하나)")
+    start, end = _week_range(week_list, start_week, end_week)
+    period = range_ranking(prefix_sums, start, end).merge(
+        range_runners(resource('running_W_ranking', out_dir), resource('running_W_hll', out_dir),
+                      week_list[start], week_list[end]),
+        on='country')
+    return period.sort_values(metric, ascending=False).reset_index(drop=True)
+
+
+@cached_query
+def country_distribution(start_week: int, end_week: int, country: str, *,
+                         out_dir: str = PROCESSED_DIR) -> dict[str, float]:
+    """기간 [start_week, end_week] 한 국가의 거리/시간/속도 중앙값과 p90 (주별 분위수 스케치를 합친 값, 1km 넘는 기록)"""
+    ranking = resource('running_W_ranking', out_dir)
+    week_list = resource('prefix_sums', out_dir)['weeks']
+    start, end = _week_range(week_list, start_week, end_week)
+    if country not in ranking['country'].cat.categories:
+        raise ValueError(f"알 수 없는 국가: {country}")
+    weeks = ranking['week_key'].to_numpy()
+    rows = ranking[(weeks >= week_list[start]) & (weeks <= week_list[end]) & (ranking['country'] == country)]
+    row = quantiles(rows, resource('running_W_quantiles', out_dir)).iloc[0]
+    return {column: float(row[column]) for column in _quantile_columns()}
+
+
+def _check_top(top):
+    """top은 1 이상 (음수면 head()가 뒤에서부터 잘라 거의 전체를 돌려준다)"""
+    if top < 1:
+        raise ValueError(f"top은 1 이상이어야 합니다: {top}")
+
+
+def _week_range(week_list, start_week, end_week):
+    """주 목록에서 두 주의 위치 (순서와 무관하게 앞, 뒤)"""
+    if start_week not in week_list or end_week not in week_list:
+        raise ValueError(f"알 수 없는 주: {start_week}, {end_week}")
+    return sorted((week_list.index(start_week), week_list.index(end_week)))
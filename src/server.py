@@ -0,0 +1,181 @@
+"""조회 함수(src.queries)를 JSON으로 내보내는 비동기 HTTP 서비스 (표준 라이브러리 asyncio만 사용)
+
+- GET만 지원, 응답은 application/json (DataFrame은 행 목록)
+- ETag는 (build_id, 경로, 쿼리 파라미터)로 만들어 조회 전에 비교하므로 If-None-Match가 맞으면 계산 없이 304
+- 조회는 스레드 풀에서 실행해 이벤트 루프를 막지 않는다
+
+사용법: python -m src.server [--host 127.0.0.1] [--port 8000] [--out-dir ./data/processed]
+예: curl 'http://127.0.0.1:8000/api/leaderboard?week=201910&metric=distance&country=Spain'
+"""
+import json
+import asyncio
+import hashlib
+import argparse
+from urllib.parse import urlsplit, parse_qsl
+import numpy as np
+import pandas as pd
+from src import queries
+from src.preprocessor import PROCESSED_DIR, FILTER_ALL
+
+MAX_HEADER_BYTES = 16 * 1024
+STATUS_TEXT = {200: 'OK', 304: 'Not Modified', 400: 'Bad Request', 404: 'Not Found',
+               405: 'Method Not Allowed', 500: 'Internal Server Error', 503: 'Service Unavailable'}
+
+def _filters(params):
+    return params.get('gender', FILTER_ALL), params.get('age_group', FILTER_ALL)
+
+
+# 경로 -> (쿼리 파라미터, out_dir) -> 결과
+ROUTES = {
+    '/api/build': lambda p, out_dir: {key: queries.manifest(out_dir)[key] for key in ('build_id', 'built_at')},
+    '/api/filters': lambda p, out_dir: queries.filter_options(out_dir=out_dir),
+    '/api/summary': lambda p, out_dir: queries.summary(*_filters(p), out_dir=out_dir),
+    '/api/runners-by-gender-age': lambda p, out_dir: queries.runners_by_gender_age(out_dir=out_dir),
+    '/api/monthly': lambda p, out_dir: queries.monthly_series(*_filters(p), out_dir=out_dir),
+    '/api/weekday': lambda p, out_dir: queries.weekday_profile(*_filters(p), out_dir=out_dir),
+    '/api/country-speed': lambda p, out_dir: queries.country_speed(*_filters(p), int(p.get('top', 10)), out_dir=out_dir),
+    '/api/distance-duration': lambda p, out_dir: queries.distance_duration(
+        int(p.get('bins', 100)), p.get('scale', 'linear'), out_dir=out_dir),
+    '/api/weeks': lambda p, out_dir: queries.weeks(out_dir=out_dir),
+    '/api/countries': lambda p, out_dir: queries.countries(out_dir=out_dir),
+    '/api/leaderboard': lambda p, out_dir: queries.weekly_leaderboard(
+        int(p['week']), p.get('metric', 'total_runners'), p.get('country'), int(p.get('top', 20)), out_dir=out_dir),
+    '/api/leaderboard/range': lambda p, out_dir: queries.range_leaderboard(
+        int(p['start']), int(p['end']), p.get('metric', 'total_runners'), out_dir=out_dir),
+    '/api/distribution': lambda p, out_dir: queries.country_distribution(
+        int(p['start']), int(p.get('end', p['start'])), p['country'], out_dir=out_dir),
+}
+
+def to_jsonable(value):
+    """조회 결과를 JSON으로 바꿀 수 있는 값으로 (DataFrame은 행 목록, NaN은 null)"""
+    if isinstance(value, pd.DataFrame):
+        return json.loads(value.to_json(orient='records', force_ascii=False))
+    if isinstance(value, dict):
+        return {key: to_jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_jsonable(item) for item in value]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    return value
+
+
+def make_etag(build, path, params):
+    """같은 빌드의 같은 조회는 항상 같은 결과이므로 (build_id, 경로, 파라미터)로 ETag 생성"""
+    key = json.dumps([build, path, sorted(params.items())], ensure_ascii=False)
+    return '"' + hashlib.sha1(key.encode('utf-8')).hexdigest()[:20] + '"'
+
+
+def etag_matches(header, etag):
+    """If-None-Match 헤더(여러 값, W/ 약한 비교, *)가 etag와 맞는지"""
+    if header is None:
+        return False
+    candidates = [candidate.strip().removeprefix('W/') for candidate in header.split(',')]
+    return '*' in candidates or etag in candidates
+
+
+async def handle(method, target, headers, out_dir):
+    """요청 하나 처리 -> (상태 코드, 추가 헤더, 본문 bytes)"""
+    if method != 'GET':
+        return 405, {'Allow': 'GET'}, _error_body('GET만 지원합니다.')
+    url = urlsplit(target)
+    route = ROUTES.get(url.path.rstrip('/') or '/')
+    if route is None:
+        return 404, {}, _error_body(f"알 수 없는 경로: {url.path}", routes=sorted(ROUTES))
+    params = dict(parse_qsl(url.query))
+    try:
+        build = queries.build_id(out_dir)
+    except FileNotFoundError as e:
+        return 503, {}, _error_body(str(e))
+
+    etag = make_etag(build, url.path, params)
+    cache_headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+    if etag_matches(headers.get('if-none-match'), etag):
+        return 304, cache_headers, b''
+    try:
+        result = await asyncio.get_running_loop().run_in_executor(None, route, params, out_dir)
+    except KeyError as e:
+        return 400, {}, _error_body(f"필수 파라미터가 없습니다: {e.args[0]}")
+    except ValueError as e:
+        return 400, {}, _error_body(str(e))
+    except Exception as e:
+        return 500, {}, _error_body(f"{type(e).__name__}: {e}")
+    body = json.dumps({'build_id': build, 'data': to_jsonable(result)}, ensure_ascii=False).encode('utf-8')
+    return 200, cache_headers, body
+
+
+def _error_body(message, **extra):
+    return json.dumps({'error': message, **extra}, ensure_ascii=False).encode('utf-8')
+
+
+async def read_request(reader):
+    """요청 줄과 헤더 읽기 (연결이 닫히면 None, 본문은 GET만 받으므로 읽고 버린다)"""
+    try:
+        head = await reader.readuntil(b'\r\n\r\n')
+    except (asyncio.IncompleteReadError, ConnectionError):
+        return None
+    except asyncio.LimitOverrunError:
+        raise ValueError('요청 헤더가 너무 깁니다.')
+    lines = head.decode('latin-1').split('\r\n')
+    method, target, version = lines[0].split(' ', 2)
+    headers = {}
+    for line in lines[1:]:
+        if ':' in line:
+            name, value = line.split(':', 1)
+            headers[name.strip().lower()] = value.strip()
+    if int(headers.get('content-length', 0)):
+        await reader.readexactly(int(headers['content-length']))
+    return method, target, version, headers
+
+
+async def serve_connection(reader, writer, out_dir):
+    """연결 하나에서 요청을 차례로 처리 (HTTP/1.1 keep-alive)"""
+    try:
+        while True:
+            try:
+                request = await read_request(reader)
+            except ValueError as e:
+                await write_response(writer, 400, {'Connection': 'close'}, _error_body(str(e)))
+                break
+            if request is None:
+                break
+            method, target, version, headers = request
+            keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+            status, extra, body = await handle(method, target, headers, out_dir)
+            extra['Connection'] = 'keep-alive' if keep_alive else 'close'
+            await write_response(writer, status, extra, body)
+            if not keep_alive:
+                break
+    finally:
+        writer.close()
+
+
+async def write_response(writer, status, headers, body):
+    lines = [f"HTTP/1.1 {status} {STATUS_TEXT[status]}"]
+    if status != 304:
+        lines += ['Content-Type: application/json; charset=utf-8', f"Content-Length: {len(body)}"]
+    lines += [f"{name}: {value}" for name, value in headers.items()]
+    writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body)
+    await writer.drain()
+
+
+async def start_server(host='127.0.0.1', port=8000, out_dir=PROCESSED_DIR):
+    """서버 시작 (port=0이면 빈 포트, 테스트에서는 server.sockets[0].getsockname()으로 확인)"""
+    return await asyncio.start_server(lambda r, w: serve_connection(r, w, out_dir), host, port, limit=MAX_HEADER_BYTES)
+
+
+async def serve(host, port, out_dir):
+    server = await start_server(host, port, out_dir)
+    print(f"http://{host}:{server.sockets[0].getsockname()[1]} 에서 대기 중 (경로: {', '.join(sorted(ROUTES))})")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='러닝 대시보드 조회 API 서버')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--out-dir', default=PROCESSED_DIR)
+    args = parser.parse_args()
+    asyncio.run(serve(args.host, args.port, args.out_dir))
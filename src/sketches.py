@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+
+# HyperLogLog 레지스터 수 = 2^HLL_PRECISION (1024개, 표준 오차 약 3.3%)
+HLL_PRECISION = 10
+
+def hash_athletes(athletes):
+    """athlete id를 64bit 해시로 변환 (splitmix64)"""
+    x = np.asarray(athletes).astype(np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def hll_registers(df, keys, p=HLL_PRECISION):
+    """athlete 기록으로 그룹 키별 HLL 레지스터 생성 (keys + register, rank, 값이 있는 레지스터만 저장하는 희소 형식)
+    같은 그룹의 레지스터는 max로 합쳐지므로 청크/파티션별로 만든 뒤 합쳐도 한 번에 만든 것과 같다"""
+    h = hash_athletes(df['athlete'])
+    register = (h >> np.uint64(64 - p)).astype('int16')
+    # 레지스터 다음 32bit에서 앞쪽 0의 개수 + 1
+    w = ((h >> np.uint64(32 - p)) & np.uint64(0xFFFFFFFF)).astype('float64')
+    rank = (33 - np.frexp(w)[1]).astype('int8')
+    registers = df[keys].assign(register=register, rank=rank)
+    return registers.groupby(keys + ['register'], observed=True, sort=False)['rank'].max().reset_index()
+
+
+def hll_estimate(registers, by=None, p=HLL_PRECISION):
+    """레지스터를 by 단위로 합친 뒤(max) 고유 개수 추정 (by가 없으면 전체 하나의 값)"""
+    m = 2 ** p
+    keys = list(by) if by else []
+    merged = registers.groupby(keys + ['register'], observed=True)['rank'].max()
+    inverse = pd.Series(np.exp2(-merged.to_numpy(dtype='float64')), index=merged.index)
+    if keys:
+        inverse = inverse.groupby(level=keys, observed=True)
+        inverse_sum, filled = inverse.sum(), inverse.size()
+    else:
+        inverse_sum, filled = pd.Series([inverse.sum()]), pd.Series([len(inverse)])
+
+    # 비어 있는 레지스터는 2^0 = 1로 계산
+    zeros = m - filled
+    alpha = 0.7213 / (1 + 1.079 / m)
+    estimate = alpha * m * m / (inverse_sum + zeros)
+    # 작은 값 보정 (linear counting)
+    small = (estimate <= 2.5 * m) & (zeros > 0)
+    estimate[small] = m * np.log(m / zeros[small])
+    estimate = estimate.round().astype('int64')
+    return estimate if keys else int(estimate.iloc[0])
+
+
+def count_runners(stats, registers, by=None):
+    """통계 행(index = group_id)들의 스케치를 합쳐 by 단위 고유 러너 수 추정"""
+    registers = registers[registers['group_id'].isin(stats.index)]
+    if not by:
+        return hll_estimate(registers)
+    by = [by] if isinstance(by, str) else list(by)
+    registers = registers.join(stats[by], on='group_id')
+    return hll_estimate(registers, by).rename('total_runners').reset_index()
+
+
+# 분위수 스케치 = 지표별 고정 로그 구간 히스토그램 (구간 i = (gamma^(i-1), gamma^i], 건수만 저장하므로 더하면 합쳐진다)
+# 구간 대표값은 구간 안 어떤 값과도 상대 오차 QUANTILE_ACCURACY 이내
+QUANTILE_METRICS = ['distance', 'duration', 'speed_per_hour']
+QUANTILE_ACCURACY = 0.02
+QUANTILE_GAMMA = (1 + QUANTILE_ACCURACY) / (1 - QUANTILE_ACCURACY)
+QUANTILES = [0.5, 0.9]
+
+def quantile_buckets(values, gamma=QUANTILE_GAMMA):
+    """양수 값이 속한 로그 구간 번호"""
+    return np.ceil(np.log(np.asarray(values, dtype='float64')) / np.log(gamma)).astype('int16')
+
+
+def bucket_values(buckets, gamma=QUANTILE_GAMMA):
+    """로그 구간 대표값"""
+    return 2 * gamma ** np.asarray(buckets, dtype='float64') / (gamma + 1)
+
+
+def sketch_quantiles(sketch, by=None, qs=QUANTILES):
+    """구간별 건수를 by 단위로 더한 뒤 지표별 분위수 ({지표}_p50 등 컬럼, by가 없으면 1행)"""
+    keys = list(by) if by else ['_all']
+    if not by:
+        sketch = sketch.assign(_all=0)
+    counts = sketch.groupby(keys + ['metric', 'bucket'], observed=True)['count'].sum().reset_index()
+    groups = counts.groupby(keys + ['metric'], observed=True, sort=False)['count']
+    cumulative, total = groups.cumsum(), groups.transform('sum')
+    columns = []
+    for q in qs:
+        # 0부터 센 순위 q * (n - 1)을 처음 넘는 구간
+        hit = counts[cumulative > q * (total - 1)].drop_duplicates(keys + ['metric']).set_index(keys + ['metric'])
+        columns.append(pd.Series(bucket_values(hit['bucket']), index=hit.index, name=f'p{round(q * 100)}'))
+    wide = pd.concat(columns, axis=1).unstack('metric')
+    wide.columns = [f'{metric}_{p}' for p, metric in wide.columns]
+    wide = wide.reindex(columns=[f'{metric}_p{round(q * 100)}' for metric in QUANTILE_METRICS for q in qs])
+    return wide.reset_index() if by else wide.reindex([0]).reset_index(drop=True)
+
+
+def quantiles(stats, sketch, by=None, qs=QUANTILES):
+    """통계 행(index = group_id)들의 분위수 스케치를 합쳐 by 단위 분위수"""
+    sketch = sketch[sketch['group_id'].isin(stats.index)]
+    if not by:
+        return sketch_quantiles(sketch, qs=qs)
+    by = [by] if isinstance(by, str) else list(by)
+    return sketch_quantiles(sketch.join(stats[by], on='group_id'), by, qs)
@@ -0,0 +1,84 @@
+import os
+import json
+import shutil
+import numpy as np
+import pandas as pd
+
+SCHEMA_FILE = '_schema.json'
+
+def save_table(df, path):
+    """DataFrame을 컬럼별 .npy 파일로 저장 (문자열/카테고리는 정수 코드 + 사전, 정수는 가장 작은 타입, 날짜는 datetime64)"""
+    tmp_path = path + '.tmp'
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+
+    schema = {'rows': len(df), 'columns': [], 'categories': {}}
+    for i, col in enumerate(df.columns):
+        values, categories = encode_column(df[col])
+        if categories is not None:
+            schema['categories'][col] = categories
+        np.save(os.path.join(tmp_path, f'{i}.npy'), values)
+        schema['columns'].append(col)
+    with open(os.path.join(tmp_path, SCHEMA_FILE), 'w', encoding='utf-8') as f:
+        json.dump(schema, f, ensure_ascii=False)
+
+    # 다 쓴 뒤 한 번에 교체 (읽는 쪽이 쓰다 만 테이블을 보지 않도록)
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp_path, path)
+
+
+def encode_column(series):
+    """컬럼 하나를 저장용 numpy 배열로 변환 (카테고리면 사전도 함께 반환)"""
+    if isinstance(series.dtype, pd.CategoricalDtype) or pd.api.types.is_object_dtype(series.dtype) \
+            or pd.api.types.is_string_dtype(series.dtype):
+        categorical = series.astype('category')
+        categories = categorical.cat.categories
+        codes = categorical.cat.codes.to_numpy().astype(smallest_int(len(categories)))
+        return codes, categories.astype(str).tolist()
+    if pd.api.types.is_integer_dtype(series.dtype) and not series.isna().any():
+        values = series.to_numpy(dtype='int64')
+        low, high = (values.min(), values.max()) if len(values) else (0, 0)
+        return values.astype(smallest_int(max(high, -low))), None
+    if pd.api.types.is_bool_dtype(series.dtype):
+        return series.to_numpy(dtype='bool'), None
+    if pd.api.types.is_datetime64_dtype(series.dtype):
+        return series.to_numpy(), None # datetime64 그대로 (NaT 포함)
+    return series.to_numpy(dtype='float64' if series.dtype != 'float32' else 'float32'), None
+
+
+def smallest_int(max_abs):
+    """max_abs를 담을 수 있는 가장 작은 부호 있는 정수 타입"""
+    for dtype in ('int8', 'int16', 'int32'):
+        if max_abs <= np.iinfo(dtype).max:
+            return dtype
+    return 'int64'
+
+
+def load_table(path, mmap=True):
+    """save_table로 저장한 테이블 로드 (mmap이면 읽기 전용 메모리 매핑으로 프로세스 간 페이지 공유)"""
+    with open(os.path.join(path, SCHEMA_FILE), encoding='utf-8') as f:
+        schema = json.load(f)
+    columns = {}
+    for i, col in enumerate(schema['columns']):
+        values = np.load(os.path.join(path, f'{i}.npy'), mmap_mode='r' if mmap else None)
+        if col in schema['categories']:
+            values = pd.Categorical.from_codes(values, categories=schema['categories'][col])
+        columns[col] = values
+    return pd.DataFrame(columns, copy=False)
+
+
+def save_tables(tables, path):
+    """여러 테이블을 한 디렉터리에 저장 (테이블마다 하위 디렉터리)"""
+    tmp_path = path + '.tmp'
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    for name, df in tables.items():
+        save_table(df, os.path.join(tmp_path, name))
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp_path, path)
+
+
+def load_tables(path, names=None, mmap=True):
+    """save_tables로 저장한 테이블들 로드 (names를 주면 그 테이블만)"""
+    names = names or sorted(os.listdir(path))
+    return {name: load_table(os.path.join(path, name), mmap=mmap) for name in names}
@@ -0,0 +1,29 @@
+"""테스트 공용 fixture (benchmarks.synthetic로 만든 작은 합성 원본과 그 빌드)"""
+import pytest
+from benchmarks.synthetic import generate
+from src.preprocessor import preprocess_data
+
+ATHLETES = 60
+DAYS = 42 # 연도별 앞 6주만 남긴다 (파티션 수를 줄여 빌드를 빠르게)
+# 청크 경계가 여러 번 생기도록 작은 청크로 읽는다
+CHUNKSIZE = 1_000
+
+
+@pytest.fixture(scope='session')
+def raw_dir(tmp_path_factory):
+    """2019, 2020년 1~2월 합성 원본 CSV 두 개가 있는 폴더 (athlete ATHLETES명, 하루 한 행씩)"""
+    path = tmp_path_factory.mktemp('raw')
+    for csv in generate(2 * 365 * ATHLETES, str(path)):
+        with open(csv, encoding='utf-8') as f:
+            lines = f.readlines()[:1 + DAYS * ATHLETES]
+        with open(csv, 'w', encoding='utf-8') as f:
+            f.writelines(lines)
+    return path
+
+
+@pytest.fixture(scope='session')
+def processed_dir(raw_dir, tmp_path_factory):
+    """raw_dir 전체 빌드 (조회/API 테스트가 함께 쓰므로 수정하지 말 것)"""
+    path = tmp_path_factory.mktemp('processed')
+    preprocess_data(str(raw_dir), str(path), chunksize=CHUNKSIZE, cache_dir=None)
+    return str(path)
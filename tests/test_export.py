@@ -0,0 +1,24 @@
+"""정적 랭킹 내보내기: 입력 해시가 같은 페이지는 다시 그리지 않는지 확인"""
+import json
+from src import export, queries
+
+
+def test_export_skips_unchanged_pages(processed_dir, tmp_path, monkeypatch):
+    weeks = queries.weeks(out_dir=processed_dir)[-1:]
+    pages = len(weeks) * len(queries.countries(out_dir=processed_dir))
+    first = export.export_leaderboards(processed_dir, str(tmp_path), weeks)
+    assert (first['pages'], first['rendered'], first['skipped']) == (pages, pages, 0)
+    index = json.loads((tmp_path / export.INDEX_FILE).read_text(encoding='utf-8'))
+    page = sorted(index['pages'])[0]
+    assert (tmp_path / f'{page}.html').exists() and (tmp_path / f'{page}.json').exists()
+
+    # 같은 빌드를 다시 내보내면 아무것도 그리지 않는다
+    second = export.export_leaderboards(processed_dir, str(tmp_path), weeks)
+    assert (second['rendered'], second['skipped']) == (0, pages)
+    # 파일이 사라진 페이지만 다시 그린다
+    (tmp_path / f'{page}.json').unlink()
+    third = export.export_leaderboards(processed_dir, str(tmp_path), weeks)
+    assert third['rendered'] == 1 and (tmp_path / f'{page}.json').exists()
+    # 차트 코드가 바뀌면 (해시가 달라지면) 모두 다시 그린다
+    monkeypatch.setattr(export, 'chart_version', lambda: 'changed')
+    assert export.export_leaderboards(processed_dir, str(tmp_path), weeks)['rendered'] == pages
@@ -0,0 +1,43 @@
+"""Figure 캐시의 LRU 제거와 빌드 교체 시 무효화 확인"""
+import plotly.graph_objects as go
+from src.figure_cache import FigureCache
+
+
+def figure(title):
+    return go.Figure(layout={'title': {'text': title}})
+
+
+def builder(title, calls):
+    def build():
+        calls.append(title)
+        return figure(title)
+    return build
+
+
+def test_lru_eviction_keeps_recently_used():
+    entry = len(figure('a').to_json())
+    cache, calls = FigureCache(max_bytes=2 * entry + entry // 2), []
+    cache.get('b1', ('tab1', 'a'), builder('a', calls))
+    cache.get('b1', ('tab1', 'b'), builder('b', calls))
+    # a를 다시 쓰면 가장 오래 안 쓴 항목은 b가 된다
+    assert cache.get('b1', ('tab1', 'a'), builder('a', calls)).layout.title.text == 'a'
+    cache.get('b1', ('tab1', 'c'), builder('c', calls))
+    assert list(cache.entries) == [('tab1', 'a'), ('tab1', 'c')]
+    cache.get('b1', ('tab1', 'b'), builder('b', calls))
+    assert calls == ['a', 'b', 'c', 'b']
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['evictions'], stats['entries']) == (1, 4, 2, 2)
+    assert stats['bytes'] <= cache.max_bytes
+
+
+def test_new_build_invalidates_entries():
+    cache, calls = FigureCache(), []
+    cache.get('b1', ('tab2', '전체'), builder('old', calls))
+    assert cache.get('b1', ('tab2', '전체'), builder('old', calls)).layout.title.text == 'old'
+    # build_id가 바뀌면 같은 키라도 새 빌드의 산출물로 다시 만든다
+    assert cache.get('b2', ('tab2', '전체'), builder('new', calls)).layout.title.text == 'new'
+    assert calls == ['old', 'new']
+    assert cache.build_id == 'b2' and len(cache.entries) == 1
+    # 반환된 Figure를 고쳐도 캐시에 저장된 값은 그대로다
+    cache.get('b2', ('tab2', '전체'), builder('new', calls)).update_layout(title_text='changed')
+    assert cache.get('b2', ('tab2', '전체'), builder('new', calls)).layout.title.text == 'new'
@@ -0,0 +1,29 @@
+"""필터 큐브(월 단위 스케치를 합쳐 만든 표)가 조합마다 통계 전체를 다시 집계한 값과 같은지 확인"""
+import pandas as pd
+from src.preprocessor import (FILTER_CUBE_TABLES, load_manifest, load_artifact, filter_cube_cell, filter_cube_lookup,
+                              month_quantiles_from_cube)
+
+
+def test_cube_matches_direct_aggregation(processed_dir):
+    manifest = load_manifest(processed_dir)
+    stats, hll, monthly, sketch, country_quantiles = (load_artifact(name, manifest, processed_dir) for name in [
+        'running_Y_M_stats', 'running_Y_M_hll', 'filter_cube_monthly', 'filter_cube_monthly_quantiles',
+        'filter_cube_country_quantiles'])
+    month_quantiles = month_quantiles_from_cube(monthly, sketch)
+    cube = filter_cube_lookup({f'filter_cube_{name}': load_artifact(f'filter_cube_{name}', manifest, processed_dir)
+                               for name in FILTER_CUBE_TABLES})
+    assert len(cube) == 12
+    for (gender, age_group), cell in cube.items():
+        expected = filter_cube_cell(stats, hll, month_quantiles, country_quantiles, gender, age_group)
+        for name in FILTER_CUBE_TABLES:
+            actual, direct = cell[name], expected[name].reset_index(drop=True)
+            if name == 'weekday':
+                actual, direct = (df.sort_values('weekday', key=lambda s: s.astype(str)).reset_index(drop=True)
+                                  for df in (actual, direct))
+            for col in direct.columns:
+                a, b = actual[col], direct[col]
+                if isinstance(a.dtype, pd.CategoricalDtype) or isinstance(b.dtype, pd.CategoricalDtype):
+                    assert a.astype(str).tolist() == b.astype(str).tolist(), (gender, age_group, name, col)
+                else:
+                    pd.testing.assert_series_equal(a.astype('float64'), b.astype('float64'), rtol=1e-5,
+                                                   check_names=False, obj=f'{gender}/{age_group} {name}.{col}')
@@ -0,0 +1,71 @@
+"""주별 리더보드 순위/백분위/순위 변화와 잘라오기, 기간별 랭킹(누적합 차이) 확인"""
+import numpy as np
+import pandas as pd
+from src.preprocessor import (build_leaderboard, leaderboard_index, leaderboard_slice, build_prefix_sums,
+                              prefix_sum_arrays, range_ranking, range_runners, load_manifest, load_artifact)
+from src.sketches import count_runners
+
+
+def weekly_ranking():
+    # 2주: 첫 주는 A > B = C, 둘째 주는 C > A (B는 기록 없음), D는 둘째 주에 처음 등장
+    rows = [
+        (202001, 'A', 30), (202001, 'B', 20), (202001, 'C', 20),
+        (202002, 'A', 10), (202002, 'C', 40), (202002, 'D', 5),
+    ]
+    ranking = pd.DataFrame(rows, columns=['week_key', 'country', 'total_runners'])
+    return ranking.assign(country=ranking['country'].astype('category'),
+                          distance=ranking['total_runners'] / 10, duration=ranking['total_runners'] * 6.0)
+
+
+def test_rank_percentile_and_rank_change():
+    board = build_leaderboard(weekly_ranking())
+    runners = board[board['metric'] == 'total_runners'].set_index(['week_key', 'country'])
+    # dense 순위 (동점은 같은 순위, 다음 순위는 건너뛰지 않는다)
+    assert runners.loc[202001, 'rank'].to_dict() == {'A': 1, 'B': 2, 'C': 2}
+    assert runners.loc[202002, 'rank'].to_dict() == {'C': 1, 'A': 2, 'D': 3}
+    # 백분위 = 값이 그 국가 이하인 국가 비율
+    np.testing.assert_allclose(runners.loc[202001, 'percentile'].loc[['A', 'B', 'C']], [100, 200 / 3, 200 / 3])
+    np.testing.assert_allclose(runners.loc[202002, 'percentile'].loc[['C', 'A', 'D']], [100, 200 / 3, 100 / 3])
+    # 전주 대비 순위 변화 (양수 = 상승, 전주 기록이 없으면 NaN)
+    changes = runners.loc[202002, 'rank_change']
+    assert changes['C'] == 1 and changes['A'] == -1 and np.isnan(changes['D'])
+    assert runners.loc[202001, 'rank_change'].isna().all()
+    # (주, 지표, 순위) 순서로 저장된다
+    assert board['week_key'].is_monotonic_increasing
+    assert board[board['metric'] == 'distance']['rank'].tolist() == [1, 2, 2, 1, 2, 3]
+
+
+def test_slice_returns_top_rows_and_selected_country():
+    board = build_leaderboard(weekly_ranking())
+    index = leaderboard_index(board)
+    top = leaderboard_slice(board, index, 202002, 'total_runners', top=2)
+    assert top['country'].astype(str).tolist() == ['C', 'A']
+    assert list(top.columns) == ['country', 'total_runners', 'rank', 'percentile', 'rank_change']
+    # 상위 밖의 선택 국가는 뒤에 붙고, 상위 안이면 중복하지 않는다
+    assert leaderboard_slice(board, index, 202002, 'total_runners', 'D', top=2)['country'].astype(str).tolist() == \
+        ['C', 'A', 'D']
+    assert leaderboard_slice(board, index, 202002, 'total_runners', 'A', top=2)['country'].astype(str).tolist() == \
+        ['C', 'A']
+
+
+def test_range_ranking_matches_brute_force_sum(processed_dir):
+    manifest = load_manifest(processed_dir)
+    ranking = load_artifact('running_W_ranking', manifest, processed_dir)
+    hll = load_artifact('running_W_hll', manifest, processed_dir)
+    arrays = prefix_sum_arrays(build_prefix_sums(ranking))
+    weeks = arrays['weeks']
+    for start, end in [(0, 0), (0, len(weeks) - 1), (3, 7), (len(weeks) - 1, len(weeks) - 1)]:
+        # 기간 안 주별 행을 직접 더한 값 (빈 주가 있는 국가도 있다)
+        rows = ranking[(ranking['week_key'] >= weeks[start]) & (ranking['week_key'] <= weeks[end])]
+        expected = rows.groupby('country', observed=True)[['run_count', 'distance_sum', 'duration_sum']].sum()
+        actual = range_ranking(arrays, start, end).set_index('country')
+        assert sorted(actual.index) == sorted(expected.index.astype(str))
+        expected = expected.set_axis(expected.index.astype(str)).loc[actual.index]
+        np.testing.assert_array_equal(actual['run_count'], expected['run_count'])
+        np.testing.assert_allclose(actual['distance_sum'], expected['distance_sum'], rtol=1e-9)
+        np.testing.assert_allclose(actual['distance'], expected['distance_sum'] / expected['run_count'], rtol=1e-9)
+        np.testing.assert_allclose(actual['duration'], expected['duration_sum'] / expected['run_count'], rtol=1e-9)
+        # 고유 러너 수는 기간 안 레지스터만 잘라 합친 값 = 같은 행 전체로 추정한 값
+        runners = range_runners(ranking, hll, weeks[start], weeks[end]).set_index('country')['total_runners']
+        brute = count_runners(rows, hll, 'country').set_index('country')['total_runners']
+        assert runners.to_dict() == brute.to_dict()
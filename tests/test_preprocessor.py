@@ -0,0 +1,110 @@
+"""전처리 빌드 방식과 상관없이 산출물이 같은지, 빌드 교체가 읽는 쪽을 깨지 않는지 확인"""
+import shutil
+import functools
+import pandas as pd
+from src import queries, preprocessor
+from src.preprocessor import preprocess_data, load_manifest, load_artifact
+from tests.conftest import CHUNKSIZE
+
+
+def build(raw_dir, out_dir, **options):
+    options.setdefault('cache_dir', None)
+    preprocess_data(str(raw_dir), str(out_dir), chunksize=CHUNKSIZE, **options)
+    return load_manifest(str(out_dir))
+
+
+def assert_same_artifacts(out_a, out_b):
+    """두 빌드의 산출물이 값과 타입까지 같은지 (카테고리는 코드가 아니라 값으로 비교)"""
+    manifest_a, manifest_b = load_manifest(str(out_a)), load_manifest(str(out_b))
+    assert sorted(manifest_a['artifacts']) == sorted(manifest_b['artifacts'])
+    assert manifest_a['filtered_rows'] == manifest_b['filtered_rows']
+    for name in manifest_a['artifacts']:
+        a = load_artifact(name, manifest_a, str(out_a))
+        b = load_artifact(name, manifest_b, str(out_b))
+        for df in (a, b):
+            for col in df.columns:
+                if isinstance(df[col].dtype, pd.CategoricalDtype):
+                    df[col] = df[col].astype(str)
+        pd.testing.assert_frame_equal(a, b, check_exact=True, obj=name)
+
+
+def test_rebuild_keeps_previous_build(raw_dir, tmp_path):
+    out = tmp_path / 'out'
+    first = build(raw_dir, out)
+    old_weeks = queries.weeks(out_dir=str(out))
+    second = build(raw_dir, out, full=True)
+    third = build(raw_dir, out, full=True)
+    # 현재 빌드와 직전 빌드만 남고, 산출물은 각 빌드 디렉터리에 있다
+    assert sorted(path.name for path in (out / 'builds').iterdir()) == sorted([second['build_id'], third['build_id']])
+    assert all(info['path'].startswith(f"builds/{third['build_id']}/") for info in third['artifacts'].values())
+    assert load_manifest(str(out), second['build_id'])['build_id'] == second['build_id']
+    # 교체 전에 build_id를 받은 조회도 그 빌드의 파일을 끝까지 읽는다
+    assert queries._resource(str(out), second['build_id'], 'weekly_leaderboard') is not None
+    assert queries.weeks(out_dir=str(out)) == old_weeks
+    assert first['build_id'] != third['build_id']
+
+
+def test_incremental_build_matches_full_build(raw_dir, processed_dir, tmp_path):
+    raw, out = tmp_path / 'raw', tmp_path / 'out'
+    shutil.copytree(raw_dir, raw)
+    build(raw, out)
+    # 이미 있는 주에 걸친 원본을 하나 더 넣으면 그 파티션은 원본이 둘이 된다
+    first = sorted(raw.iterdir())[0]
+    with open(first, encoding='utf-8') as f:
+        lines = f.readlines()[:1 + 500]
+    with open(raw / 'extra.csv', 'w', encoding='utf-8') as f:
+        f.writelines(lines)
+    added = build(raw, out)
+    assert added['sources']['extra.csv']['partitions']
+    full = tmp_path / 'full'
+    build(raw, full, full=True)
+    assert_same_artifacts(out, full)
+    # 지우면 처음 빌드와 같아진다
+    (raw / 'extra.csv').unlink()
+    build(raw, out)
+    assert_same_artifacts(out, processed_dir)
+
+
+def test_changed_params_force_full_build(raw_dir, processed_dir, tmp_path, monkeypatch):
+    raw, out = tmp_path / 'raw', tmp_path / 'out'
+    shutil.copytree(raw_dir, raw)
+    before = build(raw, out)
+    # 원본이 그대로여도 이상치 기준이 바뀌면 예전 산출물을 돌려주지 않고 다시 집계한다
+    monkeypatch.setattr(preprocessor, 'MAX_DISTANCE', 15)
+    after = build(raw, out)
+    assert after['params']['max_distance'] == 15
+    assert after['filtered_rows'] < before['filtered_rows']
+    full = tmp_path / 'full'
+    build(raw, full, full=True)
+    assert_same_artifacts(out, full)
+
+
+def test_parallel_build_matches_sequential_build(raw_dir, processed_dir, tmp_path, monkeypatch):
+    # 원본을 여러 구간으로 나눠 풀에서 집계해도 (구간 결과가 여러 조각으로 쌓여도) 순차 빌드와 같다
+    monkeypatch.setattr(preprocessor, 'byte_ranges', functools.partial(preprocessor.byte_ranges, task_bytes=20_000))
+    out = tmp_path / 'out'
+    build(raw_dir, out, workers=2)
+    assert_same_artifacts(out, processed_dir)
+
+
+def test_snapshot_build_matches_csv_build(raw_dir, tmp_path, monkeypatch):
+    raw, cache = tmp_path / 'raw', tmp_path / 'cache'
+    shutil.copytree(raw_dir, raw)
+    first = sorted(raw.iterdir())[0]
+    # 헤더만 있는 원본과 내용이 같은 원본이 섞여 있어도 스냅샷은 내용(sha256)별로 하나씩만 쓴다
+    with open(first, encoding='utf-8') as f:
+        (raw / 'empty.csv').write_text(f.readline(), encoding='utf-8')
+    shutil.copy(first, raw / 'copy.csv')
+    written = build(raw, tmp_path / 'written', cache_dir=str(cache))
+    assert sorted(path.name for path in cache.iterdir()) == \
+        sorted({source['sha256'] for name, source in written['sources'].items() if name != 'empty.csv'})
+
+    # 스냅샷이 있으면 CSV를 다시 읽지 않는다
+    def no_csv(*args, **kwargs):
+        raise AssertionError('스냅샷이 있는 원본을 CSV로 다시 읽었습니다.')
+    monkeypatch.setattr(preprocessor, 'read_raw_chunks', no_csv)
+    build(raw, tmp_path / 'snapshot', cache_dir=str(cache))
+    monkeypatch.undo()
+    build(raw, tmp_path / 'csv')
+    assert_same_artifacts(tmp_path / 'written', tmp_path / 'csv')
+    assert_same_artifacts(tmp_path / 'snapshot', tmp_path / 'csv')
@@ -0,0 +1,65 @@
+"""HTTP API 상태 코드 (200/304/400/404) 확인"""
+import json
+import asyncio
+from src.server import start_server
+
+
+async def get(port, target, headers=None):
+    """GET 요청 하나 -> (상태 코드, 헤더, 본문)"""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    lines = [f"GET {target} HTTP/1.1", 'Host: 127.0.0.1', 'Connection: close']
+    lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+    writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b'\r\n\r\n')
+    status_line, *header_lines = head.decode('latin-1').split('\r\n')
+    response_headers = dict(line.split(': ', 1) for line in header_lines)
+    return int(status_line.split(' ')[1]), response_headers, body
+
+
+def request_all(out_dir, requests):
+    """빈 포트로 서버를 띄워 requests(각 항목은 port를 받아 응답을 돌려주는 코루틴 함수)를 차례로 실행"""
+    async def run():
+        server = await start_server('127.0.0.1', 0, out_dir)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            return [await request(port) for request in requests]
+    return asyncio.run(run())
+
+
+def test_status_codes(processed_dir):
+    ok, missing_param, bad_value, unknown = request_all(processed_dir, [
+        lambda port: get(port, '/api/weeks'),
+        lambda port: get(port, '/api/leaderboard'),
+        lambda port: get(port, '/api/distance-duration?bins=7'),
+        lambda port: get(port, '/api/nope'),
+    ])
+    status, headers, body = ok
+    assert status == 200 and 'ETag' in headers
+    weeks = json.loads(body)['data']
+    assert weeks == sorted(weeks) and len(weeks) > 10
+    assert missing_param[0] == 400 and 'week' in json.loads(missing_param[2])['error']
+    assert bad_value[0] == 400
+    assert unknown[0] == 404
+
+    etag = headers['ETag']
+    not_modified, other_week = request_all(processed_dir, [
+        lambda port: get(port, '/api/weeks', {'If-None-Match': etag}),
+        lambda port: get(port, f'/api/leaderboard?week={weeks[-1]}', {'If-None-Match': etag}),
+    ])
+    assert not_modified[0] == 304 and not_modified[2] == b''
+    assert other_week[0] == 200 and json.loads(other_week[2])['data']
+
+
+def test_top_must_be_positive(processed_dir):
+    week = json.loads(request_all(processed_dir, [lambda port: get(port, '/api/weeks')])[0][2])['data'][-1]
+    negative, zero, one = request_all(processed_dir, [
+        lambda port: get(port, '/api/country-speed?top=-3'),
+        lambda port: get(port, f'/api/leaderboard?week={week}&top=0'),
+        lambda port: get(port, '/api/country-speed?top=1'),
+    ])
+    assert negative[0] == 400 and 'top' in json.loads(negative[2])['error']
+    assert zero[0] == 400
+    assert one[0] == 200 and len(json.loads(one[2])['data']) == 1
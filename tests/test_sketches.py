@@ -0,0 +1,105 @@
+"""스케치 추정값을 정확한 값과 비교 (HyperLogLog 고유 러너 수, 로그 구간 분위수)"""
+import numpy as np
+import pandas as pd
+from src import queries
+from src.preprocessor import STATS_KEYS, RAW_DTYPES, ACTIVE_DISTANCE, prepare_chunk, load_manifest, load_artifact
+from src.sketches import (QUANTILES, QUANTILE_METRICS, QUANTILE_ACCURACY, hll_registers, hll_estimate,
+                          quantile_buckets, sketch_quantiles)
+
+
+def runs(athletes, group=0, seed=0):
+    """athlete 목록을 섞고 일부를 중복시킨 기록 (같은 athlete가 여러 번 달린 경우)"""
+    rng = np.random.default_rng(seed)
+    athletes = np.concatenate([athletes, rng.choice(athletes, len(athletes) // 2)])
+    return pd.DataFrame({'group': group, 'athlete': rng.permutation(athletes)})
+
+
+def test_hll_estimate_close_to_exact():
+    for n in [1, 10, 100, 1_000, 5_000, 50_000]:
+        estimate = hll_estimate(hll_registers(runs(np.arange(n)), ['group']))
+        # 표준 오차 약 3.3% (작은 값은 linear counting이라 더 작다), 3표준오차 안쪽이면 통과
+        assert abs(estimate - n) <= max(1, 0.1 * n), (n, estimate)
+
+
+def test_hll_merge_equals_single_pass():
+    df = pd.concat([runs(np.arange(3_000), group=0), runs(np.arange(2_000, 9_000), group=1)], ignore_index=True)
+    whole = hll_registers(df, ['group'])
+    halves = pd.concat([hll_registers(df.iloc[:5_000], ['group']), hll_registers(df.iloc[5_000:], ['group'])])
+    pd.testing.assert_series_equal(hll_estimate(halves, ['group']), hll_estimate(whole, ['group']))
+    # 그룹을 합치면(max) 두 그룹의 합집합 크기를 추정
+    assert abs(hll_estimate(whole) - 9_000) <= 0.1 * 9_000
+
+
+def prepared_runs(raw_dir):
+    """원본 CSV 전체를 빌드와 같은 규칙으로 정리한 기록"""
+    raw = pd.concat([pd.read_csv(path, usecols=list(RAW_DTYPES), dtype=RAW_DTYPES) for path in sorted(raw_dir.iterdir())],
+                    ignore_index=True)
+    return prepare_chunk(raw)
+
+
+def exact_quantile(values, q):
+    # 스케치는 0부터 센 순위 q * (n - 1)을 처음 넘는 구간이므로 보간 없이 그 순위의 값과 비교
+    return np.quantile(np.asarray(values, dtype='float64'), q, method='lower')
+
+
+def assert_close(estimate, exact, label):
+    assert abs(estimate - exact) <= QUANTILE_ACCURACY * exact * (1 + 1e-6), (label, estimate, exact)
+
+
+def test_total_runners_match_exact_counts(raw_dir, processed_dir):
+    exact = prepared_runs(raw_dir).groupby(STATS_KEYS, observed=True)['athlete'].nunique().rename('exact').reset_index()
+    stats = load_artifact('running_Y_M_stats', load_manifest(processed_dir), processed_dir)
+    stats = stats.astype({col: str for col in ['gender', 'age_group', 'weekday', 'country']})
+    exact = exact.astype({col: str for col in ['gender', 'age_group', 'weekday', 'country']})
+    merged = stats.merge(exact, on=STATS_KEYS, validate='one_to_one')
+    assert len(merged) == len(stats) == len(exact)
+    # 그룹이 작아 모두 linear counting 구간 (해시 충돌이 없으면 정확)
+    assert (merged['total_runners'] - merged['exact']).abs().max() <= 1
+
+
+def test_quantile_sketch_within_relative_accuracy():
+    rng = np.random.default_rng(0)
+    values = {group: rng.lognormal(mean, 0.8, size) for group, (mean, size) in enumerate([(0, 1), (2, 7), (3, 20_000)])}
+    parts = []
+    for group, samples in values.items():
+        # 두 조각으로 나눠 센 구간 건수를 더해도 한 번에 센 것과 같다
+        for half in np.array_split(samples, 2):
+            buckets = pd.Series(quantile_buckets(half)).value_counts()
+            parts.append(pd.DataFrame({'group': group, 'metric': 'distance', 'bucket': buckets.index,
+                                       'count': buckets.to_numpy()}))
+    estimates = sketch_quantiles(pd.concat(parts, ignore_index=True), ['group']).set_index('group')
+    for group, samples in values.items():
+        for q in QUANTILES:
+            assert_close(estimates.loc[group, f'distance_p{round(q * 100)}'], exact_quantile(samples, q), (group, q))
+
+
+def test_built_quantiles_match_exact_quantiles(raw_dir, processed_dir):
+    runs = prepared_runs(raw_dir)
+    columns = [f'{metric}_p{round(q * 100)}' for metric in QUANTILE_METRICS for q in QUANTILES]
+    # TAB2 요약/월별 (성별 x 연령대 x 월 스케치를 합친 값)
+    summary = queries.summary('F', out_dir=processed_dir)
+    female = runs[runs['gender'] == 'F']
+    for column in columns:
+        metric, q = column.rsplit('_p', 1)
+        assert_close(summary[column], exact_quantile(female[metric], int(q) / 100), ('summary', column))
+    monthly = queries.monthly_series(out_dir=processed_dir).set_index(['year', 'month'])
+    for (year, month), rows in runs.groupby(['year', 'month']):
+        for column in columns:
+            metric, q = column.rsplit('_p', 1)
+            assert_close(monthly.loc[(year, month), column], exact_quantile(rows[metric], int(q) / 100),
+                         ('monthly', year, month, column))
+    # TAB2 국가별 속도 (성별 x 연령대 x 국가 스케치)
+    country = queries.country_speed(age_group='35 - 54', top=100, out_dir=processed_dir).set_index('country')
+    middle = runs[runs['age_group'] == '35 - 54']
+    for name, rows in middle.groupby('country', observed=True):
+        assert_close(country.loc[name, 'speed_per_hour_p90'], exact_quantile(rows['speed_per_hour'], 0.9),
+                     ('country', name))
+    # TAB3 국가 x 기간 (국가 x 주 스케치, 1km 넘는 기록)
+    weeks = queries.weeks(out_dir=processed_dir)
+    active = runs[(runs['distance'] > ACTIVE_DISTANCE) & runs['week_key'].between(weeks[2], weeks[8])]
+    name = active['country'].value_counts().index[0]
+    distribution = queries.country_distribution(weeks[2], weeks[8], name, out_dir=processed_dir)
+    for column in columns:
+        metric, q = column.rsplit('_p', 1)
+        assert_close(distribution[column], exact_quantile(active.loc[active['country'] == name, metric], int(q) / 100),
+                     ('distribution', name, column))